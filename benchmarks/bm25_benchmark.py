@@ -0,0 +1,140 @@
+"""
+Check that the BM25 index ranks like rank_bm25's BM25Okapi (what LangChain's
+BM25Retriever uses) on a fixed synthetic corpus, then time queries on corpora
+of increasing size.
+
+Usage:
+    python benchmarks/bm25_benchmark.py --sizes 10000 100000 1000000 --output data/bm25_benchmark.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from src.stores.bm25_index import BM25Index, tokenize
+
+VOCAB_SIZE = 50_000
+
+def make_corpus(size: int, seed: int) -> list:
+    """Zipf-distributed synthetic chunks of 50-250 tokens."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(50, 250, size=size)
+    term_ids = np.minimum(rng.zipf(1.2, size=int(lengths.sum())), VOCAB_SIZE) - 1
+    words = np.array([f"t{i}" for i in range(VOCAB_SIZE)])
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    return [" ".join(words[term_ids[bounds[i]:bounds[i + 1]]]) for i in range(size)]
+
+def make_queries(count: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(count):
+        length = int(rng.integers(2, 7))
+        # Mix frequent and rare terms, like real keyword queries
+        terms = np.minimum(rng.zipf(1.1, size=length), VOCAB_SIZE) - 1
+        queries.append(" ".join(f"t{i}" for i in terms))
+    return queries
+
+def build_index(index_dir: Path, texts: list) -> BM25Index:
+    index = BM25Index(index_dir)
+    index.rebuild((f"c{i}", text, {}) for i, text in enumerate(texts))
+    return index
+
+def same_ranking(expected: list, actual: list, reference_scores: np.ndarray, tolerance: float = 1e-6) -> bool:
+    """
+    Rankings agree when scores match position by position and every returned
+    document has that score under the reference, so equally scored documents
+    may swap, also across the top-k cut.
+    """
+    if len(expected) != len(actual):
+        return False
+    if any(abs(e[1] - a[1]) > tolerance for e, a in zip(expected, actual)):
+        return False
+    return all(abs(reference_scores[int(doc[1:])] - score) <= tolerance for doc, score in actual)
+
+def check_parity(corpus_size: int, queries: list, k: int) -> dict:
+    from rank_bm25 import BM25Okapi
+
+    texts = make_corpus(corpus_size, seed=7)
+    reference = BM25Okapi([tokenize(text) for text in texts])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = build_index(Path(tmp_dir), texts)
+        mismatches = []
+        for query in queries:
+            scores = reference.get_scores(tokenize(query))
+            order = np.argsort(-scores, kind="stable")[:k]
+            expected = [(f"c{i}", float(scores[i])) for i in order if scores[i] > 0]
+            if not same_ranking(expected, index.search(query, k=k), scores):
+                mismatches.append(query)
+
+    return {"corpus": corpus_size, "queries": len(queries), "mismatches": len(mismatches), "examples": mismatches[:5]}
+
+def time_queries(search, queries: list) -> dict:
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return {"p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--parity-corpus", type=int, default=2_000, help="Size of the parity fixture corpus")
+    parser.add_argument("--baseline-max", type=int, default=100_000, help="Largest corpus to also time with rank_bm25")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, seed=11)
+
+    parity = check_parity(args.parity_corpus, queries, args.k)
+    print(f"Parity on {parity['corpus']} docs: {parity['queries'] - parity['mismatches']}/{parity['queries']} queries rank identically")
+
+    rows = []
+    for size in args.sizes:
+        texts = make_corpus(size, seed=size)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            start_time = time.perf_counter()
+            index = build_index(Path(tmp_dir), texts)
+            build_seconds = time.perf_counter() - start_time
+
+            row = {
+                "docs": size,
+                "build_seconds": build_seconds,
+                "index": time_queries(lambda q: index.search(q, k=args.k), queries),
+            }
+
+            if size <= args.baseline_max:
+                from rank_bm25 import BM25Okapi
+                reference = BM25Okapi([tokenize(text) for text in texts])
+                row["rank_bm25"] = time_queries(lambda q: reference.get_top_n(tokenize(q), texts, n=args.k), queries)
+                row["speedup"] = row["rank_bm25"]["p50_ms"] / row["index"]["p50_ms"] if row["index"]["p50_ms"] else 0.0
+
+        rows.append(row)
+        baseline = (
+            f" | rank_bm25 p50 {row['rank_bm25']['p50_ms']:8.2f}ms ({row['speedup']:.0f}x)" if "rank_bm25" in row else ""
+        )
+        print(
+            f"{size:>9} docs: build {build_seconds:7.1f}s | index p50 {row['index']['p50_ms']:7.2f}ms "
+            f"p95 {row['index']['p95_ms']:7.2f}ms{baseline}"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"parity": parity, "sizes": rows}, indent=2))
+        print(f"Report written to {args.output}")
+
+    if parity["mismatches"]:
+        sys.exit(f"{parity['mismatches']} queries ranked differently from rank_bm25")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare the ONNX embedding backend against the PyTorch model: vector
+agreement, single-query latency and batch throughput on CPU.
+
+Usage:
+    python benchmarks/embedding_backends.py --texts 512 --batch-size 64 --output data/embedding_backends.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.embeddings.embedder import build_embedder
+
+SAMPLE_SENTENCES = [
+    "We propose a transformer architecture for long-document summarization.",
+    "Table 2 reports accuracy on the held-out test split.",
+    "The loss converges after roughly ten thousand optimization steps.",
+    "Figure 3 shows attention maps for the retrieval-augmented model.",
+    "Our ablation removes the contrastive objective and measures recall.",
+    "Graph neural networks aggregate messages over node neighbourhoods.",
+    "We evaluate on three benchmarks covering question answering and reasoning.",
+    "Quantization reduces memory traffic at a small cost in precision.",
+]
+
+def load_texts(limit: int) -> list:
+    """Chunk texts from the vector store, topped up with synthetic sentences."""
+    texts = []
+    try:
+        from src.stores.vector_store import get_all_documents
+        texts = [doc["document"] for doc in get_all_documents() if doc["document"]][:limit]
+    except Exception as e:
+        print(f"Vector store unavailable ({e}), using synthetic texts")
+
+    i = 0
+    while len(texts) < limit:
+        texts.append(f"{SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)]} (variant {i})")
+        i += 1
+    return texts
+
+def percentile(values: list, q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def time_backend(embedder, texts: list, queries: int, batch_size: int) -> dict:
+    """Single-query latency and batch throughput of one backend."""
+    embedder.embed_query(texts[0])  # warm-up
+
+    latencies = []
+    for text in texts[:queries]:
+        start_time = time.perf_counter()
+        embedder.embed_query(text)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    vectors = []
+    start_time = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        vectors += embedder.embed_documents(texts[start:start + batch_size])
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": percentile(latencies, 95),
+        "batch_seconds": seconds,
+        "texts_per_sec": len(texts) / seconds if seconds else 0.0,
+        "vectors": np.asarray(vectors, dtype=np.float32),
+    }
+
+def cosine_agreement(a: np.ndarray, b: np.ndarray) -> dict:
+    """Row-wise cosine similarity between two embeddings of the same texts."""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cosines = np.sum(a * b, axis=1)
+    return {"mean": float(cosines.mean()), "min": float(cosines.min())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512, help="Number of texts to embed")
+    parser.add_argument("--queries", type=int, default=100, help="Number of single-query timings")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBED_BATCH_SIZE)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        print(f"Loading {backend} backend...")
+        results[backend] = time_backend(build_embedder(backend), texts, args.queries, args.batch_size)
+
+    agreement = cosine_agreement(results["torch"]["vectors"], results["onnx"]["vectors"])
+    for result in results.values():
+        del result["vectors"]
+
+    torch_result, onnx_result = results["torch"], results["onnx"]
+    summary = {
+        "texts": len(texts),
+        "onnx_file": settings.EMBEDDING_ONNX_FILE,
+        "cosine_mean": agreement["mean"],
+        "cosine_min": agreement["min"],
+        "query_speedup": torch_result["query_p50_ms"] / onnx_result["query_p50_ms"] if onnx_result["query_p50_ms"] else 0.0,
+        "batch_speedup": onnx_result["texts_per_sec"] / torch_result["texts_per_sec"] if torch_result["texts_per_sec"] else 0.0,
+    }
+
+    print("-" * 80)
+    for backend, result in results.items():
+        print(
+            f"{backend:6s} query p50 {result['query_p50_ms']:6.2f}ms p95 {result['query_p95_ms']:6.2f}ms | "
+            f"batch {result['texts_per_sec']:8.1f} texts/s"
+        )
+    print(
+        f"cosine agreement mean {summary['cosine_mean']:.4f}, min {summary['cosine_min']:.4f} | "
+        f"query {summary['query_speedup']:.2f}x, batch {summary['batch_speedup']:.2f}x"
+    )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"summary": summary, "backends": results}, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
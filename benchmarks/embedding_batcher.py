@@ -0,0 +1,98 @@
+"""
+Measure query-embedding throughput under concurrent clients, calling the model
+directly versus through the micro-batching dispatcher. The embedding cache is
+bypassed so every request reaches the model.
+
+Usage:
+    python benchmarks/embedding_batcher.py --clients 32 --requests 20 --output data/embedding_batcher.json
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.embeddings.batcher import BatchedEmbeddings, EmbeddingBatcher
+from src.embeddings.embedder import build_embedder
+
+class SerializedEmbeddings:
+    """The current behaviour: one forward pass per request on a shared model."""
+    def __init__(self, inner):
+        self.inner = inner
+        self._lock = Lock()
+
+    def embed_query(self, text: str):
+        with self._lock:
+            return self.inner.embed_query(text)
+
+def run_clients(embedder, clients: int, requests: int) -> dict:
+    """Each client embeds its own unique queries back to back."""
+    def client(client_id: int) -> list:
+        latencies = []
+        for i in range(requests):
+            start_time = time.perf_counter()
+            embedder.embed_query(f"client {client_id} query {i}: retrieval augmented generation for papers")
+            latencies.append((time.perf_counter() - start_time) * 1000)
+        return latencies
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = [ms for result in executor.map(client, range(clients)) for ms in result]
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "seconds": seconds,
+        "queries_per_sec": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=20, help="Queries per client")
+    parser.add_argument("--max-batch", type=int, default=settings.EMBEDDING_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EMBEDDING_MAX_WAIT_MS)
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    model = build_embedder()
+    model.embed_query("warm-up")
+
+    direct = run_clients(SerializedEmbeddings(model), args.clients, args.requests)
+
+    batcher = EmbeddingBatcher(model, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    batched = run_clients(BatchedEmbeddings(batcher), args.clients, args.requests)
+    batched["dispatcher"] = batcher.stats()
+
+    summary = {
+        "clients": args.clients,
+        "queries": args.clients * args.requests,
+        "speedup": batched["queries_per_sec"] / direct["queries_per_sec"] if direct["queries_per_sec"] else 0.0,
+    }
+
+    for name, result in (("direct", direct), ("batched", batched)):
+        print(
+            f"{name:8s} {result['queries_per_sec']:8.1f} queries/s | "
+            f"p50 {result['p50_ms']:7.1f}ms p95 {result['p95_ms']:7.1f}ms"
+        )
+    print(
+        f"{summary['clients']} clients: {summary['speedup']:.2f}x throughput, "
+        f"{batched['dispatcher']['avg_texts_per_batch']:.1f} texts per forward pass"
+    )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"summary": summary, "direct": direct, "batched": batched}, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Profile the import of the API app with `python -X importtime` and report the
+wall time and the slowest modules, optionally against a saved baseline.
+
+Usage:
+    python benchmarks/import_profile.py --output data/import_profile.json
+    python benchmarks/import_profile.py --baseline data/import_profile.json --max-regression 0.2
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# "import time:      self [us] |  cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile_import(module: str) -> dict:
+    """Import a module in a fresh interpreter and parse its -X importtime output."""
+    start_time = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start_time
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+
+    return {"module": module, "wall_seconds": seconds, "modules": modules}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest modules to print")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed wall time increase vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = profile_import(args.module)
+
+    # Cumulative time includes everything a module imports in turn
+    slowest = sorted(report["modules"], key=lambda m: m["cumulative_ms"], reverse=True)[:args.top]
+    for entry in slowest:
+        print(f"{entry['cumulative_ms']:10.1f}ms cumulative {entry['self_ms']:9.1f}ms self  {'  ' * entry['depth']}{entry['module']}")
+    print("-" * 80)
+    print(f"import {report['module']}: {report['wall_seconds']:.2f}s wall, {len(report['modules'])} modules")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        change = report["wall_seconds"] / baseline["wall_seconds"] - 1 if baseline["wall_seconds"] else 0.0
+        print(f"vs baseline {baseline['wall_seconds']:.2f}s: {change:+.0%}")
+        if change > args.max_regression:
+            sys.exit(f"Startup regression: import time grew {change:.0%} (allowed {args.max_regression:.0%})")
+
+if __name__ == "__main__":
+    main()
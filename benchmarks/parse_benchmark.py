@@ -0,0 +1,79 @@
+"""
+Compare the tiered parser against the full hi_res parse on a sample corpus.
+
+Usage:
+    python benchmarks/parse_benchmark.py --pdf-dir data/raw_papers --limit 10 --output data/parse_benchmark.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.ingest.parser.multimodal_parser import parse_pdf
+
+def time_parse(pdf_path: Path, strategy: str) -> dict:
+    """Parse one PDF with the given strategy, bypassing the parse cache."""
+    start_time = time.perf_counter()
+    elements, page_strategies = parse_pdf(str(pdf_path), strategy=strategy)
+    seconds = time.perf_counter() - start_time
+
+    hi_res_pages = sum(1 for s in page_strategies.values() if s == "hi_res")
+    return {
+        "seconds": seconds,
+        "elements": len(elements),
+        "pages": len(page_strategies),
+        "hi_res_pages": hi_res_pages,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", type=Path, default=settings.RAW_PAPERS_DIR)
+    parser.add_argument("--limit", type=int, default=10, help="Number of PDFs to parse")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    pdf_paths = sorted(args.pdf_dir.glob("*.pdf"))[:args.limit]
+    if not pdf_paths:
+        sys.exit(f"No PDFs found in {args.pdf_dir}")
+
+    rows = []
+    for pdf_path in pdf_paths:
+        hi_res = time_parse(pdf_path, "hi_res")
+        tiered = time_parse(pdf_path, "tiered")
+        speedup = hi_res["seconds"] / tiered["seconds"] if tiered["seconds"] else 0.0
+        rows.append({"pdf": pdf_path.name, "hi_res": hi_res, "tiered": tiered, "speedup": speedup})
+        print(
+            f"{pdf_path.name:40s} hi_res {hi_res['seconds']:7.1f}s | tiered {tiered['seconds']:7.1f}s "
+            f"({tiered['hi_res_pages']}/{tiered['pages']} pages hi_res) | {speedup:4.1f}x"
+        )
+
+    total_hi_res = sum(r["hi_res"]["seconds"] for r in rows)
+    total_tiered = sum(r["tiered"]["seconds"] for r in rows)
+    total_pages = sum(r["tiered"]["pages"] for r in rows)
+    hi_res_pages = sum(r["tiered"]["hi_res_pages"] for r in rows)
+    summary = {
+        "pdfs": len(rows),
+        "hi_res_seconds": total_hi_res,
+        "tiered_seconds": total_tiered,
+        "speedup": total_hi_res / total_tiered if total_tiered else 0.0,
+        "hi_res_page_share": hi_res_pages / total_pages if total_pages else 0.0,
+    }
+
+    print("-" * 80)
+    print(
+        f"{summary['pdfs']} PDFs: hi_res {total_hi_res:.1f}s, tiered {total_tiered:.1f}s, "
+        f"speedup {summary['speedup']:.2f}x, {summary['hi_res_page_share']:.0%} of pages needed hi_res"
+    )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"summary": summary, "pdfs": rows}, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
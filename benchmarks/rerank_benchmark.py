@@ -0,0 +1,159 @@
+"""
+Measure what the cross-encoder rerank stage adds on top of fused hybrid
+retrieval: recall@k, MRR and nDCG@k on a labelled fixture, and the latency
+it costs (cold, and warm from the score cache). The fixture is indexed into
+a throwaway directory (stores, embedding cache and metrics log), so the
+real data is not touched.
+
+Usage:
+    python benchmarks/rerank_benchmark.py --k 5 --candidates 20 --output data/rerank_benchmark.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+DEFAULT_FIXTURE = PROJECT_ROOT / "benchmarks" / "fixtures" / "retrieval_fixture.json"
+
+def use_scratch_stores(scratch_dir: Path):
+    """
+    Point every store, the embedding cache and the metrics log at a scratch
+    directory; must run before project imports.
+    """
+    os.environ["CHROMA_PERSIST_DIR"] = str(scratch_dir / "chroma")
+    os.environ["BM25_INDEX_DIR"] = str(scratch_dir / "bm25")
+    os.environ["PAPER_CATALOG_PATH"] = str(scratch_dir / "paper_catalog.sqlite3")
+    os.environ["EXACT_INDEX_DIR"] = str(scratch_dir / "exact_index")
+    os.environ["EMBEDDING_CACHE_PATH"] = str(scratch_dir / "embedding_cache.sqlite3")
+    os.environ["METRICS_LOG_FILE"] = str(scratch_dir / "metrics_log.jsonl")
+
+def index_fixture(fixture: dict):
+    """Ingest the fixture chunks through the normal upsert path."""
+    from config import TextCategory
+    from src.ingest.loader.arxiv_loader import paper_published
+    from src.models.document import DocumentChunk
+    from src.stores.vector_store import init_collection, upsert_chunk_stream
+
+    init_collection()
+    chunks = []
+    for paper in fixture["papers"]:
+        published = int(paper["published"].replace("-", "")) if paper.get("published") else paper_published(paper["paper_id"])
+        for chunk in paper["chunks"]:
+            chunks.append(DocumentChunk(
+                paper_id=paper["paper_id"],
+                chunk_id=chunk["chunk_id"],
+                type=TextCategory(chunk["type"]),
+                content=chunk["content"],
+                metadata={"published": published} if published else {}
+            ))
+    return upsert_chunk_stream(chunks)
+
+def score_ranking(ranked: list, relevant: set, k: int) -> dict:
+    """Binary-relevance recall@k, reciprocal rank and nDCG@k of one ranking."""
+    top = ranked[:k]
+    hits = [1.0 if chunk_id in relevant else 0.0 for chunk_id in top]
+    first = next((rank for rank, hit in enumerate(hits, 1) if hit), None)
+    dcg = sum(hit / math.log2(rank + 1) for rank, hit in enumerate(hits, 1))
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return {
+        "recall": sum(hits) / len(relevant) if relevant else 0.0,
+        "mrr": 1.0 / first if first else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+def run_queries(retriever, queries: list, k: int) -> dict:
+    """Quality averages and latency percentiles of one retriever over the fixture queries."""
+    latencies, quality = [], []
+    for item in queries:
+        start_time = time.perf_counter()
+        docs = retriever.retrieve(item["query"], k=k)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        quality.append(score_ranking([doc.metadata.get("chunk_id") for doc in docs], set(item["relevant"]), k))
+
+    return {
+        **{f"{name}@{k}": float(np.mean([q[name] for q in quality])) for name in ("recall", "mrr", "ndcg")},
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", type=Path, default=DEFAULT_FIXTURE, help="Labelled corpus and queries (JSON)")
+    parser.add_argument("--k", type=int, default=5, help="Results per query that are scored")
+    parser.add_argument("--candidates", type=int, default=20, help="Per-leg depth and reranked candidates")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Override RERANK_BUDGET_MS")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    fixture = json.loads(args.fixture.read_text())
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        use_scratch_stores(Path(scratch_dir))
+        os.environ["RERANK_CANDIDATES"] = str(args.candidates)
+        if args.budget_ms is not None:
+            os.environ["RERANK_BUDGET_MS"] = str(args.budget_ms)
+
+        from config import settings
+        from src.agents.tools.hybrid_retriever import BM25IndexRetriever, EnsembleRetriever, WindowedVectorRetriever
+        from src.agents.tools.reranker import CrossEncoderReranker
+
+        stats = index_fixture(fixture)
+        print(f"Indexed {stats['chunks']} chunks in {stats['seconds']:.1f}s")
+
+        legs = [WindowedVectorRetriever(k=args.candidates), BM25IndexRetriever(k=args.candidates)]
+        fused = EnsembleRetriever(legs, weights=[0.7, 0.3], cache=None)
+        reranker = CrossEncoderReranker()
+        reranked = EnsembleRetriever(legs, weights=[0.7, 0.3], cache=None, reranker=reranker)
+
+        # Load both models before timing anything
+        fused.retrieve(fixture["queries"][0]["query"], k=args.k)
+        reranker.model
+
+        queries = fixture["queries"]
+        results = {
+            "fused": run_queries(fused, queries, args.k),
+            "reranked_cold": run_queries(reranked, queries, args.k),
+            "reranked_warm": run_queries(reranked, queries, args.k),
+        }
+
+    summary = {
+        "queries": len(queries),
+        "k": args.k,
+        "candidates": args.candidates,
+        "model": settings.RERANK_MODEL,
+        "budget_ms": settings.RERANK_BUDGET_MS,
+        "fallbacks": reranker.stats()["fallbacks"],
+        "ndcg_gain": results["reranked_cold"][f"ndcg@{args.k}"] - results["fused"][f"ndcg@{args.k}"],
+        "mrr_gain": results["reranked_cold"][f"mrr@{args.k}"] - results["fused"][f"mrr@{args.k}"],
+        "added_p50_ms": results["reranked_cold"]["p50_ms"] - results["fused"]["p50_ms"],
+        "added_p50_ms_warm": results["reranked_warm"]["p50_ms"] - results["fused"]["p50_ms"],
+    }
+
+    print("-" * 80)
+    for name, result in results.items():
+        print(
+            f"{name:14s} recall@{args.k} {result[f'recall@{args.k}']:.3f} | MRR {result[f'mrr@{args.k}']:.3f} | "
+            f"nDCG@{args.k} {result[f'ndcg@{args.k}']:.3f} | p50 {result['p50_ms']:7.1f}ms p95 {result['p95_ms']:7.1f}ms"
+        )
+    print(
+        f"rerank: nDCG {summary['ndcg_gain']:+.3f}, MRR {summary['mrr_gain']:+.3f}, "
+        f"+{summary['added_p50_ms']:.1f}ms p50 cold, +{summary['added_p50_ms_warm']:.1f}ms warm, "
+        f"{summary['fallbacks']} budget fallbacks"
+    )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"summary": summary, "results": results}, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Measure retrieval quality and latency per leg (vector, BM25) and for the
+fused hybrid ranking: recall@k, MRR and nDCG@k on a labelled fixture, with
+p50/p95 latency. The fixture is indexed into a throwaway directory
+(stores, embedding cache and metrics log), so the real data is not touched.
+
+Write a report with --output and compare a later run (e.g. after changing
+fusion weights, the RRF constant or leg depths) against it with --baseline;
+the run fails when quality drops or latency grows beyond the tolerances.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py --output benchmarks/baselines/retrieval.json
+    python benchmarks/retrieval_benchmark.py --weights 0.6 0.4 --rrf-k 30 --baseline benchmarks/baselines/retrieval.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.rerank_benchmark import DEFAULT_FIXTURE, index_fixture, score_ranking, use_scratch_stores
+
+QUALITY_METRICS = ("recall", "mrr", "ndcg")
+
+def run_leg(search, queries: list, k: int) -> dict:
+    """Quality averages and latency percentiles of one search function (query -> Documents)."""
+    latencies, quality = [], []
+    for item in queries:
+        start_time = time.perf_counter()
+        docs = search(item["query"])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        quality.append(score_ranking([doc.metadata.get("chunk_id") for doc in docs], set(item["relevant"]), k))
+
+    return {
+        **{f"{name}@{k}": float(np.mean([q[name] for q in quality])) for name in QUALITY_METRICS},
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def compare(results: dict, baseline: dict, k: int, quality_tolerance: float, latency_tolerance: float) -> list:
+    """
+    Differences to a baseline report, one row per leg and metric. Quality may
+    drop by at most quality_tolerance (absolute), p95 latency may grow by at
+    most latency_tolerance (relative) before a row counts as a regression.
+    """
+    rows = []
+    for leg, result in results.items():
+        previous = baseline["results"].get(leg)
+        if previous is None:
+            continue
+        for metric in [f"{name}@{k}" for name in QUALITY_METRICS] + ["p50_ms", "p95_ms"]:
+            if metric not in previous:
+                continue
+            delta = result[metric] - previous[metric]
+            if metric.endswith("_ms"):
+                regression = metric == "p95_ms" and result[metric] > previous[metric] * (1 + latency_tolerance)
+            else:
+                regression = delta < -quality_tolerance
+            rows.append({
+                "leg": leg,
+                "metric": metric,
+                "baseline": previous[metric],
+                "current": result[metric],
+                "delta": delta,
+                "regression": regression,
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", type=Path, default=DEFAULT_FIXTURE, help="Labelled corpus and queries (JSON)")
+    parser.add_argument("--k", type=int, default=10, help="Results per query that are scored")
+    parser.add_argument("--vector-k", type=int, default=10, help="Vector leg depth")
+    parser.add_argument("--bm25-k", type=int, default=5, help="BM25 leg depth")
+    parser.add_argument("--weights", type=float, nargs=2, default=[0.7, 0.3], help="Fusion weights (vector, BM25)")
+    parser.add_argument("--rrf-k", type=int, default=60, help="Reciprocal rank fusion constant")
+    parser.add_argument("--search-mode", choices=["auto", "exact", "hnsw"], default=None, help="Override VECTOR_SEARCH_MODE")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the queries, for stabler latency percentiles")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier report to compare against")
+    parser.add_argument("--quality-tolerance", type=float, default=0.01, help="Allowed absolute drop of recall/MRR/nDCG")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Allowed relative growth of p95 latency")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    fixture = json.loads(args.fixture.read_text())
+    queries = fixture["queries"] * max(1, args.repeat)
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        use_scratch_stores(Path(scratch_dir))
+        if args.search_mode:
+            os.environ["VECTOR_SEARCH_MODE"] = args.search_mode
+
+        from src.agents.tools.hybrid_retriever import BM25IndexRetriever, EnsembleRetriever, WindowedVectorRetriever
+        from src.stores.vector_store import sync_exact_index
+        from src.stores.vector_search import search_mode
+
+        stats = index_fixture(fixture)
+        sync_exact_index()
+        print(f"Indexed {stats['chunks']} chunks in {stats['seconds']:.1f}s (vector search: {search_mode()})")
+
+        vector = WindowedVectorRetriever(k=args.vector_k)
+        bm25 = BM25IndexRetriever(k=args.bm25_k)
+        fused = EnsembleRetriever([vector, bm25], weights=args.weights, cache=None, rrf_k=args.rrf_k)
+
+        # Load the embedding model before timing anything
+        fused.retrieve(queries[0]["query"], k=args.k)
+
+        results = {
+            "vector": run_leg(vector.invoke, queries, args.k),
+            "bm25": run_leg(bm25.invoke, queries, args.k),
+            "fused": run_leg(lambda query: fused.retrieve(query, k=args.k), queries, args.k),
+        }
+        mode = search_mode()
+
+    config = {
+        "fixture": str(args.fixture),
+        "queries": len(fixture["queries"]),
+        "repeat": args.repeat,
+        "k": args.k,
+        "vector_k": args.vector_k,
+        "bm25_k": args.bm25_k,
+        "weights": args.weights,
+        "rrf_k": args.rrf_k,
+        "search_mode": mode,
+    }
+
+    print("-" * 80)
+    for name, result in results.items():
+        print(
+            f"{name:8s} recall@{args.k} {result[f'recall@{args.k}']:.3f} | MRR {result[f'mrr@{args.k}']:.3f} | "
+            f"nDCG@{args.k} {result[f'ndcg@{args.k}']:.3f} | p50 {result['p50_ms']:7.2f}ms p95 {result['p95_ms']:7.2f}ms"
+        )
+
+    comparison = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"].get("k") != args.k:
+            sys.exit(f"Baseline was scored at k={baseline['config'].get('k')}, this run at k={args.k}")
+        comparison = compare(results, baseline, args.k, args.quality_tolerance, args.latency_tolerance)
+        print("-" * 80)
+        print(f"Against {args.baseline}:")
+        for row in comparison:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['leg']:8s} {row['metric']:10s} {row['baseline']:9.3f} -> {row['current']:9.3f} "
+                f"({row['delta']:+.3f}){flag}"
+            )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        report = {"config": config, "results": results}
+        if comparison:
+            report["comparison"] = {"baseline": str(args.baseline), "rows": comparison}
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+    regressions = [row for row in comparison if row["regression"]]
+    if regressions:
+        sys.exit(f"{len(regressions)} metrics regressed against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Compare exact vector search (the mmap'd NumPy index, float32 and float16)
+with Chroma's HNSW index on synthetic clustered embeddings of increasing
+size: query latency, build time and recall@n against exact float32 scores.
+The largest size whose exact p95 stays under --target-ms is the suggested
+EXACT_SEARCH_MAX_VECTORS.
+
+Usage:
+    python benchmarks/vector_search_benchmark.py --sizes 10000 50000 100000 200000 --search-ef 10 50 100 --output data/vector_search_benchmark.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.stores.vector_search import ExactVectorIndex
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+def make_vectors(size: int, seed: int, clusters: int = 200) -> np.ndarray:
+    """Normalized vectors around random topic centroids, like chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, DIMENSION)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, size=size)] + 0.8 * rng.standard_normal((size, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def make_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Perturbed corpus vectors, so every query has close neighbours."""
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), size=count)] + 0.5 * rng.standard_normal((count, DIMENSION)).astype(np.float32) / np.sqrt(DIMENSION)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def ground_truth(vectors: np.ndarray, queries: np.ndarray, n: int) -> list:
+    scores = queries @ vectors.T
+    return [set(np.argpartition(-row, n - 1)[:n].tolist()) for row in scores]
+
+def time_search(search, queries: np.ndarray, truth: list) -> dict:
+    """Latency percentiles and mean recall of a search function returning row ids."""
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start_time = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        recalls.append(len(expected & set(found)) / len(expected))
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": float(np.mean(recalls)),
+    }
+
+def bench_exact(vectors: np.ndarray, queries: np.ndarray, truth: list, n: int, dtype: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ExactVectorIndex(Path(tmp_dir), dtype=dtype)
+        start_time = time.perf_counter()
+        index.rebuild((f"w{i}", vector, {"chunk_id": str(i)}) for i, vector in enumerate(vectors))
+        build_seconds = time.perf_counter() - start_time
+        result = time_search(lambda q: [int(chunk_id) for chunk_id, _ in index.search(q, n)], queries, truth)
+        return {"build_seconds": build_seconds, "matrix_mb": index.stats()["matrix_bytes"] / 2**20, **result}
+
+def bench_hnsw(vectors: np.ndarray, queries: np.ndarray, truth: list, n: int, search_efs: list) -> dict:
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        client = chromadb.PersistentClient(path=tmp_dir, settings=ChromaSettings(anonymized_telemetry=False))
+        for search_ef in search_efs:
+            collection = client.create_collection(
+                name=f"bench_ef{search_ef}",
+                metadata={
+                    "hnsw:space": "cosine",
+                    "hnsw:M": settings.HNSW_M,
+                    "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+                    "hnsw:search_ef": search_ef,
+                }
+            )
+            start_time = time.perf_counter()
+            for start in range(0, len(vectors), 5000):
+                batch = vectors[start:start + 5000]
+                collection.add(ids=[str(i) for i in range(start, start + len(batch))], embeddings=batch.tolist())
+            build_seconds = time.perf_counter() - start_time
+
+            def search(query):
+                results = collection.query(query_embeddings=[query.tolist()], n_results=n, include=[])
+                return [int(i) for i in results["ids"][0]]
+
+            rows[f"ef{search_ef}"] = {"build_seconds": build_seconds, **time_search(search, queries, truth)}
+            client.delete_collection(name=f"bench_ef{search_ef}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000, 200_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--n", type=int, default=40, help="Windows per query (query_windows asks for k * fanout = 40)")
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[settings.HNSW_SEARCH_EF, 100], help="HNSW search_ef values")
+    parser.add_argument("--skip-hnsw", action="store_true", help="Only time the exact index")
+    parser.add_argument("--target-ms", type=float, default=10.0, help="Exact-search p95 budget for the suggested threshold")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        vectors = make_vectors(size, seed=size)
+        queries = make_queries(vectors, args.queries, seed=size + 1)
+        truth = ground_truth(vectors, queries, args.n)
+
+        row = {
+            "vectors": size,
+            "exact_float32": bench_exact(vectors, queries, truth, args.n, "float32"),
+            "exact_float16": bench_exact(vectors, queries, truth, args.n, "float16"),
+        }
+        if not args.skip_hnsw:
+            row["hnsw"] = bench_hnsw(vectors, queries, truth, args.n, args.search_ef)
+        rows.append(row)
+
+        line = " | ".join(
+            f"{name} p50 {result['p50_ms']:6.2f}ms p95 {result['p95_ms']:6.2f}ms recall {result['recall']:.3f}"
+            for name, result in [
+                ("fp32", row["exact_float32"]), ("fp16", row["exact_float16"]),
+                *((f"hnsw {ef}", result) for ef, result in row.get("hnsw", {}).items())
+            ]
+        )
+        print(f"{size:>9} vectors: {line}")
+
+    within = [row["vectors"] for row in rows if row["exact_float32"]["p95_ms"] <= args.target_ms]
+    suggestion = max(within) if within else None
+    print("-" * 80)
+    print(
+        f"Exact search stays under {args.target_ms:.0f}ms p95 up to {suggestion} vectors "
+        f"(EXACT_SEARCH_MAX_VECTORS is {settings.EXACT_SEARCH_MAX_VECTORS})"
+        if suggestion else f"Exact search exceeds {args.target_ms:.0f}ms p95 at every size"
+    )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            "n": args.n,
+            "target_ms": args.target_ms,
+            "suggested_exact_max_vectors": suggestion,
+            "sizes": rows,
+        }, indent=2))
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
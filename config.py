@@ -1,7 +1,7 @@
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -17,16 +17,61 @@ class Settings(BaseSettings):
     PROCESSED_DIR: Path = Path("data/processed")
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     VECTOR_COLLECTION: str = "arxiv_multimodal"
+    WINDOW_COLLECTION: str = "arxiv_multimodal_windows"  # one vector per token window of each chunk
     FEEDBACK_COLLECTION: str = "feedback"
 
     # Models
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch or onnx
+    EMBEDDING_ONNX_FILE: str = "onnx/model_quint8_avx2.onnx"  # int8-quantized graph; onnx/model.onnx for fp32
+    EMBEDDING_CACHE_PATH: Path = Path("data/embedding_cache.sqlite3")
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = 10_000  # in-process LRU entries
+    EMBEDDING_CACHE_DISK_ITEMS: int = 1_000_000  # persistent entries before LRU eviction
+    EMBEDDING_MAX_BATCH: int = 64  # texts per coalesced forward pass
+    EMBEDDING_MAX_WAIT_MS: float = 5.0  # how long the dispatcher waits for more requests
     SUMMARIZER_MODEL: str = "facebook/bart-large-cnn"
     CAPTIONER_MODEL: str = "Salesforce/blip-image-captioning-large"
     LLM_MODEL: str = "meta-llama/Llama-3.3-70B-Instruct"
     LLM_TASK: str = "text-generation"
     LLM_MAX_NEW_TOKENS: int = 8192
 
+    # Windowed embeddings
+    EMBED_WINDOW_TOKENS: int = 254  # MiniLM's 256 word pieces minus [CLS]/[SEP]
+    EMBED_WINDOW_STRIDE: int = 192  # tokens between window starts (64 tokens of overlap)
+    WINDOW_AGGREGATION: str = "max"  # max or sum of window similarities per chunk
+    WINDOW_QUERY_FANOUT: int = 4  # windows fetched per requested chunk before aggregation
+
+    # Vector search
+    VECTOR_SEARCH_MODE: str = "auto"  # exact, hnsw, or auto (exact up to EXACT_SEARCH_MAX_VECTORS windows)
+    EXACT_SEARCH_MAX_VECTORS: int = 50_000  # see benchmarks/vector_search_benchmark.py
+    EXACT_SEARCH_DTYPE: str = "float32"  # or float16: half the memory, same top-k, but several times slower to scan
+    EXACT_INDEX_DIR: Path = Path("data/exact_index")  # mmap'd window vectors for exact search
+    HNSW_M: int = 16  # graph links per node; applies to newly created collections
+    HNSW_CONSTRUCTION_EF: int = 100  # build-time candidate list; applies to newly created collections
+    HNSW_SEARCH_EF: int = 10  # query-time candidate list (at least n_results); higher = better recall, slower
+
+    # Retrieval
+    RETRIEVER_WORKERS: int = 8  # threads running retriever legs, shared by all queries
+    RETRIEVER_LEG_TIMEOUT: float = 5.0  # seconds; fusion proceeds without legs that take longer
+    RETRIEVAL_CACHE_ITEMS: int = 1024  # fused results kept in memory (LRU); 0 disables the cache
+    RETRIEVAL_CACHE_TTL: float = 600.0  # seconds; entries are also dropped on every corpus write
+
+    # Reranking and diversification
+    RERANK_ENABLED: bool = False  # rescore fused candidates with a cross-encoder
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # top fused candidates that get rescored
+    RERANK_BATCH_SIZE: int = 16  # query-passage pairs per forward pass
+    RERANK_BUDGET_MS: float = 300.0  # scoring time before falling back to the fused order
+    RERANK_CACHE_ITEMS: int = 50_000  # cached (query, chunk) scores (LRU)
+    MMR_ENABLED: bool = False  # diversify results with maximal marginal relevance (always on for comparisons)
+    MMR_LAMBDA: float = 0.7  # 1.0 = relevance only, 0.0 = diversity only
+    MMR_CANDIDATES: int = 30  # fused candidates MMR selects from
+    COMPARE_PER_PAPER_CAP: int = 2  # chunks per paper for comparisons while other papers have candidates
+
+    # Startup
+    FAST_START: bool = True  # load models on first use; False warms up WARMUP_COMPONENTS at startup
+    WARMUP_COMPONENTS: List[str] = ["embedder", "retriever", "chat_model"]  # required for /api/ready
+
     # SUMMARIZATION PARAMETERS 
     CHUNK_SIZE: int = 3000
     CHUNK_OVERLAP: int = 100
@@ -36,6 +81,33 @@ class Settings(BaseSettings):
     MAX_PAPERS: int = 10
     QUERY: str = "LLM agents"
 
+    # Downloads
+    DOWNLOAD_CONCURRENCY: int = 8  # parallel PDF downloads (also the HTTP pool size)
+    DOWNLOAD_MIN_INTERVAL: float = 0.25  # seconds between request starts, across all threads
+    DOWNLOAD_TIMEOUT: int = 30
+    DOWNLOAD_CHUNK_BYTES: int = 1024 * 1024
+    ARXIV_METADATA_CACHE: Path = Path("data/arxiv_metadata.json")
+    ARXIV_ID_BATCH_SIZE: int = 100  # ids per id_list query
+
+    # Ingestion
+    EMBED_BATCH_SIZE: int = 64  # chunks per embedding forward pass / Chroma upsert
+    INGEST_WORKERS: int = 4  # parse processes; 1 parses inline in the calling process
+    PARSE_STRATEGY: str = "tiered"  # tiered (fast text pass + hi_res where needed) or hi_res
+    PARSE_MIN_PAGE_CHARS: int = 100  # pages with less extracted text are re-parsed with hi_res
+    PARSE_CACHE_DIR: Path = Path("data/parse_cache")
+    PARSE_CACHE_MAX_BYTES: int = 2 * 1024 ** 3  # evict least recently used entries beyond this
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # block size when streaming uploads to disk
+    MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024  # per PDF
+    MAX_UPLOAD_REQUEST_BYTES: int = 1024 * 1024 * 1024  # whole PDF upload request, all files together
+    MAX_AUDIO_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    BLOB_STORE_DIR: Path = Path("data/blobs")  # figure bytes, addressed by sha256
+    JOBS_DIR: Path = Path("data/jobs")
+    JOB_WORKERS: int = 2  # ingest jobs running at once
+    BM25_INDEX_DIR: Path = Path("data/bm25")  # mmap'd postings segments + SQLite doc store
+    BM25_COMPACT_MIN_DOCS: int = 5000  # pending delta docs + tombstones before compaction...
+    BM25_COMPACT_RATIO: float = 0.1  # ...or this share of the compacted segment, whichever is larger
+    PAPER_CATALOG_PATH: Path = Path("data/paper_catalog.sqlite3")  # paper -> chunks index for the papers endpoints
+
     # API KEYS - Load from environment
     OPENAI_API_KEY: Optional[str] = None
     HUGGINGFACEHUB_API_TOKEN: Optional[str] = None
@@ -89,4 +161,6 @@ class TextCategory(str, Enum):
     UNCATEGORIZED = "UncategorizedText"
     FIGURECAPTION = "FigureCaption"
     FORMULA = "Formula"
-    CODESNIPPET = "CodeSnippet"
\ No newline at end of file
+    CODESNIPPET = "CodeSnippet"
+    TABLE = "Table"
+    FIGURE = "figure"
\ No newline at end of file
@@ -1,6 +1,6 @@
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
-from typing import TypedDict, Annotated, List, Literal
+from typing import TypedDict, Annotated, List, Literal, Optional
 import operator
 
 from src.agents.nodes.router import route_query
@@ -18,6 +18,7 @@ class AgentState(TypedDict):
     query: str
     query_type: str
     route: str
+    filters: Optional[dict]
     retrieved_chunks: List
     summaries: List[str]
     figure_insights: List[str]
@@ -0,0 +1,39 @@
+from threading import Lock
+from typing import Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+from config import settings
+
+_chat_model: Optional[ChatHuggingFace] = None
+_chat_model_lock = Lock()
+
+def get_chat_model() -> ChatHuggingFace:
+    """
+    Returns the chat model shared by all agent nodes, creating it on first use.
+    """
+    global _chat_model
+    if _chat_model is None:
+        with _chat_model_lock:
+            if _chat_model is None:
+                # Initialize a HuggingFaceEndpoint LLM
+                llm = HuggingFaceEndpoint(
+                    repo_id=settings.LLM_MODEL,
+                    task=settings.LLM_TASK,
+                    max_new_tokens=settings.LLM_MAX_NEW_TOKENS,
+                    do_sample=False,
+                )
+                _chat_model = ChatHuggingFace(llm=llm)
+    return _chat_model
+
+def chat_model_loaded() -> bool:
+    """Whether the shared chat model has been created."""
+    return _chat_model is not None
+
+def lazy_chat_model() -> Runnable:
+    """
+    A Runnable standing in for the shared chat model, so chains can be composed
+    at import time while the model itself is only created on first invocation.
+    """
+    return RunnableLambda(lambda messages: get_chat_model().invoke(messages), name="chat_model")
@@ -1,10 +1,27 @@
+from threading import Lock
+from typing import Optional
 from src.agents.tools.hybrid_retriever import EnsembleRetriever
 from langchain_core.messages import AIMessage
 from src.monitoring.metrics_tracker import track_node_execution
+from config import settings
 
+_retriever: Optional[EnsembleRetriever] = None
+_retriever_lock = Lock()
 
-# Initialize with a proper corpus fetch
-retriever = EnsembleRetriever([]).get_hybrid_retriever()
+def get_retriever() -> EnsembleRetriever:
+    """
+    Returns the hybrid retriever, building it (with a proper corpus fetch) on first use.
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = EnsembleRetriever([]).get_hybrid_retriever()
+    return _retriever
+
+def retriever_loaded() -> bool:
+    """Whether the hybrid retriever has been built."""
+    return _retriever is not None
 
 @track_node_execution("retrieve")
 def retrieve(state):
@@ -12,7 +29,13 @@ def retrieve(state):
     Retrieve relevant documents based on the user's query.
     """
     query = state["query"]
-    docs = retriever.retrieve(query)
+    if state.get("route") == "comparison":
+        # Comparisons need coverage across papers, not near-duplicates from one
+        docs = get_retriever().retrieve(
+            query, filters=state.get("filters"), mmr=True, per_paper_cap=settings.COMPARE_PER_PAPER_CAP
+        )
+    else:
+        docs = get_retriever().retrieve(query, filters=state.get("filters"))
     return {
         "retrieved_chunks": docs, 
         "messages": [AIMessage(content=f"Retrieved {len(docs)} chunks.")]
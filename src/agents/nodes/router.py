@@ -1,19 +1,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Literal
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+from src.agents.llm import lazy_chat_model
 
-from config import settings
-
-# Initialize a HuggingFaceEndpoint LLM
-llm = HuggingFaceEndpoint(
-    repo_id=settings.LLM_MODEL,
-    task=settings.LLM_TASK,
-    max_new_tokens=settings.LLM_MAX_NEW_TOKENS,
-    do_sample=False,
-)
-
-# Create a ChatHuggingFace instance with the LLM
-chat_model = ChatHuggingFace(llm=llm)
+# Shared chat model, created on first invocation
+chat_model = lazy_chat_model()
 
 router_prompt = ChatPromptTemplate.from_messages([
     ("system", """You are a routing assistant that analyzes user queries and determines the best processing path.
@@ -2,8 +2,6 @@ from src.agents.tools.summarizer import Summarizer
 from langchain_core.messages import AIMessage
 from src.monitoring.metrics_tracker import track_node_execution
 
-summarizer = Summarizer()
-
 @track_node_execution("summarize")
 def summarize_node(state):
     """
@@ -22,7 +20,8 @@ def summarize_node(state):
     texts = [c.page_content for c in chunks if c.page_content]
     
     # Summarize
-    summaries = summarizer.summarize_texts(texts[:5])  # Limit to top 5
+    # Singleton: the model is loaded on the first summarization request
+    summaries = Summarizer().summarize_texts(texts[:5])  # Limit to top 5
     
     # Combine summaries
     combined = "\n\n".join(summaries)
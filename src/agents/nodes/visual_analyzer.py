@@ -1,23 +1,12 @@
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+from src.agents.llm import lazy_chat_model
+from src.agents.nodes.retriever import get_retriever
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
-from src.agents.tools.image_captioner import ImageCaptioner
 from src.monitoring.metrics_tracker import track_node_execution
+from config import TextCategory
 
-from config import settings
-
-captioner = ImageCaptioner()
-
-# Initialize a HuggingFaceEndpoint LLM
-llm = HuggingFaceEndpoint(
-    repo_id=settings.LLM_MODEL,
-    task=settings.LLM_TASK,
-    max_new_tokens=settings.LLM_MAX_NEW_TOKENS,
-    do_sample=False,
-)
-
-# Create a ChatHuggingFace instance with the LLM
-chat_model = ChatHuggingFace(llm=llm)
+# Shared chat model, created on first invocation
+chat_model = lazy_chat_model()
 
 prompt = ChatPromptTemplate.from_messages([
     ("system", "You are a visual research assistant. Explain this figure in the context of research."),
@@ -28,12 +17,17 @@ chain = prompt | chat_model
 
 @track_node_execution("analyze_figures")
 def analyze_figures(state):
-    """Analyze and explain figures from the retrieved chunks."""
-    chunks = state.get("retrieved_chunks", [])
+    """Analyze and explain the figures most relevant to the query."""
+    # Figures the graph already retrieved (within the request's filters) come first
+    chunks = [c for c in state.get("retrieved_chunks") or [] if c.metadata.get("type") == TextCategory.FIGURE.value]
+    if not chunks:
+        # None among them: search figure chunks only, within the request's other filters
+        filters = {**(state.get("filters") or {}), "chunk_types": [TextCategory.FIGURE.value]}
+        chunks = get_retriever().retrieve(state["query"], filters=filters)
     insights = []
     
     for c in chunks:
-        if c.metadata.get("type") == "figure" and c.metadata.get("caption"):
+        if c.metadata.get("caption"):
             try:
                 insight = chain.invoke({
                     "caption": c.metadata.get("caption", ""),
@@ -1,12 +1,28 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from langchain_community.retrievers import BM25Retriever
 from langchain_chroma import Chroma
-from typing import List, Any
-from src.embeddings.embedder import embedder
+from typing import Dict, List, Any, Optional, Tuple
+from src.embeddings.embedder import embedder, embedding_model
+from src.stores.bm25_index import BM25Index, bm25_index
+from src.stores.filters import matches_filters
+from src.stores.retrieval_cache import RetrievalCache, retrieval_cache
+from src.agents.tools.reranker import CrossEncoderReranker
+from src.agents.tools.mmr import mmr_select
+from src.stores.vector_store import get_all_documents, get_chunk_embeddings, query_windows
+from src.monitoring.metrics_tracker import metrics_tracker
 from config import settings
 from langchain_core.documents import Document
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 
+logger = logging.getLogger(__name__)
+
+# Runs the legs of every query concurrently
+leg_executor = ThreadPoolExecutor(max_workers=settings.RETRIEVER_WORKERS, thread_name_prefix="retriever-leg")
+
 # Initialize ChromaDB client
 chroma_client = chromadb.PersistentClient(
     path=settings.CHROMA_PERSIST_DIR,
@@ -23,80 +39,231 @@ chroma_langchain = Chroma(
     embedding_function=embedder
 )
 
+class WindowedVectorRetriever:
+    """
+    Vector retriever over the per-window index: window similarities are
+    aggregated per parent chunk, so each chunk is returned at most once.
+    """
+    name = "vector"
+    supports_filters = True
+
+    def __init__(self, k: int = 10, aggregation: str = settings.WINDOW_AGGREGATION):
+        self.k = k
+        self.aggregation = aggregation
+
+    def invoke(self, query: str, filters: Optional[Dict] = None, k: Optional[int] = None) -> List[Document]:
+        hits = query_windows(
+            embedder.embed_query(query),
+            k=max(self.k, k or 0),
+            aggregation=self.aggregation,
+            filters=filters
+        )
+        return [
+            Document(
+                page_content=hit["document"] or "",
+                metadata={**(hit["metadata"] or {}), "chunk_id": hit["chunk_id"], "score": hit["score"]}
+            )
+            for hit in hits
+        ]
+
+class BM25IndexRetriever:
+    """
+    Keyword retriever over the persistent BM25 index. Hits come back as
+    Documents with their stored metadata and chunk_id.
+    """
+    name = "bm25"
+    supports_filters = True
+
+    def __init__(self, index: BM25Index = bm25_index, k: int = 5):
+        self.index = index
+        self.k = k
+
+    def invoke(self, query: str, filters: Optional[Dict] = None, k: Optional[int] = None) -> List[Document]:
+        hits = self.index.search(query, k=max(self.k, k or 0), filters=filters)
+        stored = self.index.get_documents([chunk_id for chunk_id, _ in hits])
+        return [
+            Document(
+                page_content=stored[chunk_id][0],
+                metadata={**stored[chunk_id][1], "chunk_id": chunk_id, "score": score}
+            )
+            for chunk_id, score in hits if chunk_id in stored
+        ]
+
+def _leg_name(retriever: Any) -> str:
+    return getattr(retriever, "name", None) or type(retriever).__name__
+
+def _run_leg(retriever: Any, query: str, filters: Optional[Dict] = None, depth: Optional[int] = None) -> List[Document]:
+    """
+    Runs one leg and records its latency, also when the caller stopped waiting.
+    Legs that cannot filter while searching (the in-memory BM25Retriever) are
+    filtered afterwards; they also keep their own depth.
+    """
+    start_time = time.time()
+    success = True
+    try:
+        if getattr(retriever, "supports_filters", False):
+            return retriever.invoke(query, filters=filters, k=depth)
+        docs = retriever.invoke(query)
+        return [doc for doc in docs if matches_filters(doc.metadata, filters)] if filters else docs
+    except Exception:
+        success = False
+        raise
+    finally:
+        metrics_tracker.record_operation(
+            operation=f"retrieve_{_leg_name(retriever)}",
+            latency=time.time() - start_time,
+            success=success,
+            metadata={"query": query, "filtered": bool(filters)}
+        )
+
 class EnsembleRetriever:
-    def __init__(self, retrievers: List[Any], weights: List[float] = None):
+    def __init__(
+        self,
+        retrievers: List[Any],
+        weights: List[float] = None,
+        timeouts: List[float] = None,
+        cache: Optional[RetrievalCache] = retrieval_cache,
+        reranker: Optional[CrossEncoderReranker] = None,
+        rrf_k: int = 60
+    ):
         self.retrievers = [r for r in retrievers if r]
+        self.cache = cache
+        self.reranker = reranker
+        # Reciprocal rank fusion constant: larger values flatten the gap between top and lower ranks
+        self.rrf_k = rrf_k
         self.weights = weights or [1.0 / len(self.retrievers) for _ in self.retrievers]
+        self.timeouts = timeouts or [settings.RETRIEVER_LEG_TIMEOUT for _ in self.retrievers]
         if len(self.weights) != len(self.retrievers):
             raise ValueError("Number of weights must match number of retrievers")
+        if len(self.timeouts) != len(self.retrievers):
+            raise ValueError("Number of timeouts must match number of retrievers")
 
     def get_hybrid_retriever(self, corpus: List[str] = None) -> "EnsembleRetriever":
         """
         Initialize a hybrid retriever combining vector and BM25 retrievers.
-        :param corpus: Optional list of texts for BM25. If None, use ChromaDB documents.
+        :param corpus: Optional list of texts for an in-memory BM25. If None, use the persistent BM25 index.
         """
-        # Vector retriever
-        vector_retriever = chroma_langchain.as_retriever(
-            search_kwargs={"k": 10}
-        )
+        # Optional cross-encoder pass over the fused candidates; the model loads on first query
+        reranker = CrossEncoderReranker() if settings.RERANK_ENABLED else None
+        # Reranking can only promote what the legs return, so they fetch deeper
+        vector_k, bm25_k = (settings.RERANK_CANDIDATES, settings.RERANK_CANDIDATES) if reranker else (10, 5)
+
+        # Vector retriever over all windows of each chunk
+        vector_retriever = WindowedVectorRetriever(k=vector_k)
 
         # BM25 retriever
         if corpus is None:
-            print(f"Fetching all documents from ChromaDB for BM25 index...")
-            
-            # Get all documents from ChromaDB
-            collection = chroma_client.get_collection(name=settings.VECTOR_COLLECTION)
-            
-            # Fetch documents in batches
-            all_docs = []
-            offset = 0
-            limit = 1000
-            
-            while True:
-                results = collection.get(
-                    limit=limit,
-                    offset=offset,
-                    include=["documents"]
+            if bm25_index.count() == 0 and chroma_client.get_collection(name=settings.VECTOR_COLLECTION).count() > 0:
+                # One-off migration: index written before the BM25 index existed
+                print("Building BM25 index from ChromaDB documents...")
+                bm25_index.rebuild(
+                    (doc["id"], doc["document"], doc["metadata"]) for doc in get_all_documents()
                 )
-                
-                if not results["ids"]:
-                    break
-                
-                all_docs.extend(results["documents"])
-                offset += limit
-                
-                if len(results["ids"]) < limit:
-                    break
-            
-            bm25_texts = [doc for doc in all_docs if doc and doc.strip()]
+            bm25 = BM25IndexRetriever(k=bm25_k)
         else:
             bm25_texts = [text for text in corpus if text and text.strip()]
+            if not bm25_texts:
+                print("Warning: No valid text for BM25. Falling back to vector retriever only.")
+                return EnsembleRetriever(retrievers=[vector_retriever], weights=[1.0], reranker=reranker)
 
-        if not bm25_texts:
-            print("Warning: No valid text for BM25. Falling back to vector retriever only.")
-            return EnsembleRetriever(retrievers=[vector_retriever], weights=[1.0])
-
-        print(f"Initializing BM25Retriever with {len(bm25_texts)} documents.")
-        bm25 = BM25Retriever.from_texts(bm25_texts)
-        bm25.k = 5
+            print(f"Initializing BM25Retriever with {len(bm25_texts)} documents.")
+            bm25 = BM25Retriever.from_texts(bm25_texts)
+            bm25.k = bm25_k
 
         return EnsembleRetriever(
             retrievers=[vector_retriever, bm25],
-            weights=[0.7, 0.3]
+            weights=[0.7, 0.3],
+            reranker=reranker
         )
 
-    def retrieve(self, query: str, k: int = 10) -> List[Document]:
+    def retrieve(
+        self,
+        query: str,
+        k: int = 10,
+        filters: Optional[Dict] = None,
+        mmr: bool = settings.MMR_ENABLED,
+        per_paper_cap: Optional[int] = None
+    ) -> List[Document]:
         """
         Perform hybrid retrieval using the user query.
         :param query: The user query to search for.
         :param k: Number of results to return.
+        :param filters: Optional normalized metadata filters (paper_ids, chunk_types, published_from/to).
+        :param mmr: Select the results from the fused candidates with maximal marginal relevance.
+        :param per_paper_cap: With mmr, the most chunks per paper while other papers have candidates.
         :return: List of ranked documents.
         """
+        if self.cache is None:
+            return self._retrieve(query, k, filters, mmr, per_paper_cap)[0]
+
+        start_time = time.time()
+        key = self.cache.make_key(query, filters, k, f"mmr:{per_paper_cap or 0}" if mmr else "")
+        generation = self.cache.generation
+        cached = self.cache.get(key)
+        if cached is not None:
+            docs, saved_seconds = cached
+            metrics_tracker.record_operation(
+                operation="retrieval_cache",
+                latency=time.time() - start_time,
+                success=True,
+                metadata={"hit": True, "saved_seconds": saved_seconds}
+            )
+            return docs
+
+        docs, complete = self._retrieve(query, k, filters, mmr, per_paper_cap)
+        latency = time.time() - start_time
+        # Results missing a timed-out or failed leg, or not reranked in time, are not worth repeating
+        if complete:
+            self.cache.put(key, docs, generation, latency)
+        metrics_tracker.record_operation(
+            operation="retrieval_cache",
+            latency=latency,
+            success=True,
+            metadata={"hit": False, "saved_seconds": 0.0}
+        )
+        return docs
+
+    def _retrieve(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[Dict],
+        mmr: bool = False,
+        per_paper_cap: Optional[int] = None
+    ) -> Tuple[List[Document], bool]:
+        """
+        Runs and fuses the legs, then reranks the fused candidates if a
+        reranker is set and diversifies them if mmr is set. Also returns
+        whether every leg contributed and reranking finished within its budget.
+        """
+        # MMR can only spread over what the legs return, so they fetch as deep as its candidate pool
+        depth = settings.MMR_CANDIDATES if mmr else None
+
+        # With FAST_START the first query loads the embedding model; do that before the
+        # deadlines start, or the vector leg times out and keeps a leg worker busy meanwhile
+        if not embedding_model.loaded and any(isinstance(r, WindowedVectorRetriever) for r in self.retrievers):
+            embedding_model.inner
+
+        # All legs run concurrently; each one gets its own deadline
+        start_time = time.time()
+        futures = [leg_executor.submit(_run_leg, retriever, query, filters, depth) for retriever in self.retrievers]
+
         results = []
-        for retriever, weight in zip(self.retrievers, self.weights):
-            docs = retriever.invoke(query)
+        complete = True
+        for retriever, weight, timeout, future in zip(self.retrievers, self.weights, self.timeouts, futures):
+            try:
+                docs = future.result(timeout=max(0.0, start_time + timeout - time.time()))
+            except FutureTimeoutError:
+                logger.warning(f"Retriever leg '{_leg_name(retriever)}' timed out after {timeout}s; fusing without it")
+                complete = False
+                continue
+            except Exception as e:
+                logger.error(f"Retriever leg '{_leg_name(retriever)}' failed: {e}")
+                complete = False
+                continue
+
             for rank, doc in enumerate(docs, 1):
-                score = weight / (rank + 60)
+                score = weight / (rank + self.rrf_k)
                 results.append((doc, score))
 
         doc_scores = {}
@@ -117,4 +284,57 @@ class EnsembleRetriever:
                 reverse=True
             )
         ]
-        return ranked_docs[:k]
\ No newline at end of file
+
+        if self.reranker is not None:
+            rerank_start = time.time()
+            ranked_docs, reranked = self.reranker.rerank(query, ranked_docs)
+            metrics_tracker.record_operation(
+                operation="rerank",
+                latency=time.time() - rerank_start,
+                success=True,
+                metadata={
+                    "query": query,
+                    "candidates": min(len(ranked_docs), settings.RERANK_CANDIDATES),
+                    "fallback": not reranked
+                }
+            )
+            complete = complete and reranked
+
+        if mmr:
+            return self._diversify(query, ranked_docs[:settings.MMR_CANDIDATES], k, per_paper_cap), complete
+        return ranked_docs[:k], complete
+
+    def _diversify(self, query: str, docs: List[Document], k: int, per_paper_cap: Optional[int]) -> List[Document]:
+        """
+        Maximal marginal relevance over the fused candidates, using their
+        stored vectors (one lookup, no re-embedding) and the query vector the
+        vector leg already embedded (served from the embedding cache).
+        """
+        if len(docs) <= 1:
+            return docs[:k]
+
+        start_time = time.time()
+        stored = get_chunk_embeddings([doc.metadata["chunk_id"] for doc in docs if doc.metadata.get("chunk_id")])
+        query_vector = np.asarray(embedder.embed_query(query), dtype=np.float32)
+        # Candidates without a stored vector (e.g. from an in-memory BM25 corpus) count as unrelated
+        vectors = np.zeros((len(docs), len(query_vector)), dtype=np.float32)
+        for i, doc in enumerate(docs):
+            vector = stored.get(doc.metadata.get("chunk_id"))
+            if vector is not None:
+                vectors[i] = vector
+
+        selected = mmr_select(
+            query_vector,
+            vectors,
+            k,
+            lambda_mult=settings.MMR_LAMBDA,
+            groups=[doc.metadata.get("paper_id", "") for doc in docs],
+            per_group_cap=per_paper_cap
+        )
+        metrics_tracker.record_operation(
+            operation="mmr",
+            latency=time.time() - start_time,
+            success=True,
+            metadata={"query": query, "candidates": len(docs), "papers": len({doc.metadata.get("paper_id") for doc in docs})}
+        )
+        return [docs[i] for i in selected]
\ No newline at end of file
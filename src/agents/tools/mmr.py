@@ -0,0 +1,72 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+    groups: Optional[Sequence[str]] = None,
+    per_group_cap: Optional[int] = None
+) -> List[int]:
+    """
+    Maximal marginal relevance: greedily picks candidates that are similar to
+    the query but not to the candidates already picked. All pairwise
+    similarities come from a single matrix product.
+
+    Args:
+        query_vector (Sequence[float]): The query embedding.
+        candidate_vectors (np.ndarray): One embedding per candidate (n x d). All-zero
+            rows (no stored embedding) count as unrelated to everything.
+        k (int): Number of candidates to select.
+        lambda_mult (float): 1.0 ranks by relevance only, 0.0 by diversity only.
+        groups (Sequence[str]): Optional group per candidate, e.g. its paper_id.
+        per_group_cap (int): At most this many picks per group while other groups
+            still have candidates; remaining slots are then filled regardless.
+
+    Returns:
+        List[int]: Indexes of the selected candidates, in selection order.
+    """
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    n = len(vectors)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    if groups is not None and per_group_cap:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+    else:
+        group_ids = None
+    group_counts = np.zeros(int(group_ids.max()) + 1 if group_ids is not None else 0, dtype=np.int64)
+
+    selected: List[int] = []
+    available = np.ones(n, dtype=bool)
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+
+    for _ in range(k):
+        redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+
+        eligible = available
+        if group_ids is not None:
+            under_cap = available & (group_counts[group_ids] < per_group_cap)
+            if under_cap.any():
+                eligible = under_cap
+
+        best = int(np.flatnonzero(eligible)[np.argmax(scores[eligible])])
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[:, best])
+        if group_ids is not None:
+            group_counts[group_ids[best]] += 1
+
+    return selected
@@ -0,0 +1,165 @@
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    """
+    Re-scores fused retrieval candidates with a small CPU cross-encoder.
+
+    Candidates are scored in batches against a latency budget; when the
+    budget runs out the fused order is kept. Scores are cached per
+    (query, chunk, content) so repeated and overlapping queries only
+    score new candidates.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        """Set up the score cache; the model itself is loaded on first use"""
+        self._model = None
+        self._model_lock = Lock()
+        self._scores: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._cache_lock = Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fallbacks = 0
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        """Cross-encoder model, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    logger.info(f"Loading reranker {settings.RERANK_MODEL}...")
+                    self._model = CrossEncoder(settings.RERANK_MODEL, device="cpu")
+        return self._model
+
+    @staticmethod
+    def _cache_key(query: str, doc: Document) -> Tuple[str, str, str]:
+        # The content hash keeps scores of re-ingested, changed chunks apart
+        chunk_id = doc.metadata.get("chunk_id") or doc.page_content
+        return " ".join(query.split()), chunk_id, doc.metadata.get("content_hash", "")
+
+    def _cached_scores(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], float]:
+        with self._cache_lock:
+            found = {}
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    found[key] = score
+            self.cache_hits += len(found)
+            self.cache_misses += len(keys) - len(found)
+            return found
+
+    def _store_scores(self, scores: Dict[Tuple[str, str, str], float]):
+        with self._cache_lock:
+            for key, score in scores.items():
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > settings.RERANK_CACHE_ITEMS:
+                self._scores.popitem(last=False)
+
+    def rerank(
+        self,
+        query: str,
+        docs: List[Document],
+        top_n: int = settings.RERANK_CANDIDATES,
+        batch_size: int = settings.RERANK_BATCH_SIZE,
+        budget_ms: float = settings.RERANK_BUDGET_MS
+    ) -> Tuple[List[Document], bool]:
+        """
+        Reorders the first top_n documents by cross-encoder score; the rest
+        keep their place after them.
+
+        Args:
+            query (str): The user query.
+            docs (List[Document]): Fused candidates, best first.
+            top_n (int): Number of candidates to score.
+            batch_size (int): Query-passage pairs per forward pass.
+            budget_ms (float): Scoring time allowed (model loading excluded).
+
+        Returns:
+            Tuple[List[Document], bool]: The documents, and whether they were
+            reranked (False means the fused order was kept).
+        """
+        candidates = docs[:top_n]
+        if len(candidates) < 2:
+            return docs, True
+
+        model = self.model
+        start_time = time.time()
+        keys = [self._cache_key(query, doc) for doc in candidates]
+        scores = self._cached_scores(keys)
+        pending = [(key, doc) for key, doc in zip(keys, candidates) if key not in scores]
+
+        scored = {}
+        batch_seconds = 0.0
+        completed = True
+        for start in range(0, len(pending), batch_size):
+            elapsed = time.time() - start_time
+            # Stop before a batch that would likely overrun the budget
+            if (elapsed + batch_seconds) * 1000 > budget_ms:
+                completed = False
+                break
+            batch = pending[start:start + batch_size]
+            batch_start = time.time()
+            values = model.predict([(query, doc.page_content) for _, doc in batch], batch_size=len(batch))
+            batch_seconds = time.time() - batch_start
+            scored.update({key: float(value) for (key, _), value in zip(batch, values)})
+
+        # Finished batches are cached either way, so a repeat of the query gets further
+        self._store_scores(scored)
+        scores.update(scored)
+
+        if not completed:
+            self.fallbacks += 1
+            logger.warning(
+                f"Reranking exceeded {budget_ms:.0f}ms ({len(scored)}/{len(pending)} scored); keeping the fused order"
+            )
+            return docs, False
+
+        order = sorted(range(len(candidates)), key=lambda i: scores[keys[i]], reverse=True)
+        reranked = [
+            Document(
+                page_content=candidates[i].page_content,
+                metadata={**candidates[i].metadata, "rerank_score": scores[keys[i]]}
+            )
+            for i in order
+        ]
+        return reranked + docs[top_n:], True
+
+    def stats(self) -> Dict:
+        """Score cache counters and budget fallbacks."""
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "model": settings.RERANK_MODEL,
+                "loaded": self.model_loaded,
+                "cache_entries": len(self._scores),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": (self.cache_hits / lookups) * 100 if lookups else 0.0,
+                "fallbacks": self.fallbacks
+            }
@@ -10,24 +10,40 @@ import logging
 import tempfile
 import time
 from datetime import datetime
+from threading import Thread
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 
 from config import settings
 from typing import List, Optional
-from src.ingest.pipeline import process_single_pdf
-from src.ingest.loader.arxiv_loader import search_arxiv_papers, download_single_arxiv_paper
+from src.ingest.jobs import job_queue
+from src.ingest.parser.parse_cache import parse_cache
+from src.ingest.loader.arxiv_loader import search_arxiv_papers
 from src.agents.graph import app as agent_app
 from src.agents.tools.image_captioner import ImageCaptioner
-from src.stores.vector_store import init_collection, get_collection
+from src.agents.tools.reranker import CrossEncoderReranker
+from src.stores.vector_store import (
+    backfill_figures, backfill_paper_catalog, backfill_windows, check_hnsw_settings, delete_chunks, figure_mime,
+    init_collection, get_collection, index_stats, sync_exact_index
+)
+from src.stores.blob_store import blob_store
+from src.stores.bm25_index import bm25_index
+from src.stores.paper_catalog import paper_catalog
+from src.stores.filters import normalize_filters
+from src.stores.retrieval_cache import retrieval_cache
+from src.stores.vector_search import exact_index
+from src.embeddings.embedder import embedding_batcher, embedding_cache
 from src.models.request import ArxivSearchRequest, IngestPapersRequest, QueryRequest, QueryResponse
 
 # Import voice and monitoring components
 from src.app.voice_handler import voice_handler
+from src.app.warmup import readiness, warm_up
+from src.app.uploads import MULTIPART_OVERHEAD_BYTES, RequestSizeLimit, save_upload
 from src.monitoring.metrics_tracker import metrics_tracker
 
 logging.basicConfig(level=logging.INFO)
@@ -42,13 +58,37 @@ async def lifespan(app: FastAPI):
     logger.info(f"Metrics Tracking: Enabled")
     logger.info(f"Whisper Model: {getattr(settings, 'WHISPER_MODEL', 'base')}")
     logger.info("=" * 50)
+    job_queue.start()
+    # Figure images still stored as base64 move to the blob store, then chunks stored
+    # before windowed indexing get their windows; one after the other, in the background
+    Thread(target=lambda: (backfill_figures(), backfill_windows()), name="chunk-backfill", daemon=True).start()
+    # One-off catalog build for chunks stored before the paper catalog existed
+    Thread(target=backfill_paper_catalog, name="catalog-backfill", daemon=True).start()
+    # Load (or rebuild from Chroma) the exact index; queries use HNSW until it is ready
+    Thread(target=sync_exact_index, name="exact-index-sync", daemon=True).start()
+    check_hnsw_settings()
+    if not settings.FAST_START:
+        # Serve immediately; /api/ready reports when the models are loaded
+        Thread(target=warm_up, name="warmup", daemon=True).start()
     yield
     # Shutdown actions
     logger.info("Shutting down ArXiv Insight Engine...")
+    job_queue.shutdown()
+    exact_index.flush()
 
 # Initialize FastAPI
 app = FastAPI(title="ArXiv Insight Engine", version="1.0.0", lifespan=lifespan)
 
+# Reject oversized uploads before their bodies are spooled to disk
+app.add_middleware(
+    RequestSizeLimit,
+    limits={
+        "/api/ingest/upload": settings.MAX_UPLOAD_REQUEST_BYTES,
+        "/api/voice/transcribe": settings.MAX_AUDIO_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/api/voice/query": settings.MAX_AUDIO_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    }
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -86,6 +126,20 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/api/ready")
+async def ready_check():
+    """Readiness check: 200 once the required models are loaded, 503 before"""
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@app.post("/api/warmup")
+async def warmup(components: Optional[List[str]] = None):
+    """Load models now instead of on first use (default: WARMUP_COMPONENTS)"""
+    try:
+        return await run_in_threadpool(warm_up, components)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/stats")
 async def get_stats():
     """Get collection statistics"""
@@ -93,65 +147,76 @@ async def get_stats():
         collection = get_collection()
         count = collection.count()
         
-        # Estimate papers (rough estimate: 1 paper = ~150 chunks)
-        papers_estimate = max(1, count // 150)
-        
+        index = index_stats()
+
         return {
-            "papers_count": papers_estimate,
-            "chunks_count": count
+            "papers_count": paper_catalog.paper_count(),
+            "chunks_count": count,
+            "windows_count": index["windows"],
+            "windows_per_chunk": index["windows_per_chunk"],
+            "window_vector_bytes": index["window_vector_bytes"],
+            "vector_search_mode": index["search_mode"],
+            "exact_index": index["exact_index"],
+            "bm25_index": bm25_index.stats()
         }
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         return {"papers_count": 0, "chunks_count": 0}
     
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get hit/miss counters and sizes of the parse, embedding, retrieval and rerank score caches, and embedding batch sizes"""
+    return {
+        "success": True,
+        "parse_cache": parse_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "reranker": CrossEncoderReranker().stats()
+    }
+
 # Upload Endpoints
 @app.post("/api/ingest/upload")
 async def upload_pdfs(files: List[UploadFile] = File(...)):
-    """Upload PDF files and process them into the vector store."""
+    """Upload PDF files and queue them for processing into the vector store."""
     start_time = time.time()
     
     try: 
-        processed_files = []
-
-        for file in files:
-            if not file.filename.endswith(".pdf"):
-                continue
+        saved_files = []
 
-            # Save file
-            file_path = settings.RAW_PAPERS_DIR / file.filename
-            settings.RAW_PAPERS_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            for file in files:
+                if not file.filename.endswith(".pdf"):
+                    continue
 
-            content = await file.read()
-            file_path.write_bytes(content)
+                # Stream file to disk
+                file_path = settings.RAW_PAPERS_DIR / Path(file.filename).name
+                await save_upload(file, file_path)
 
-            # Process PDF
-            paper_id = file_path.stem
-            logger.info(f"Processing uploaded file: {file.filename} as paper ID: {paper_id}")
+                paper_id = file_path.stem
+                logger.info(f"Queueing uploaded file: {file.filename} as paper ID: {paper_id}")
+                saved_files.append((file.filename, str(file_path), paper_id))
+        except Exception:
+            # Nothing gets queued, so don't leave the files saved before the failing one behind
+            for _, pdf_path, _ in saved_files:
+                Path(pdf_path).unlink(missing_ok=True)
+            raise
 
-            chunks_count = await process_single_pdf(str(file_path), paper_id)
+        job = job_queue.submit_upload(saved_files)
 
-            processed_files.append({
-                "filename": file.filename,
-                "paper_id": paper_id,
-                "chunks_added": chunks_count
-            })
-        
-        # Track metrics
-        latency = time.time() - start_time
-        metrics_tracker.record_operation(
-            operation="pdf_upload",
-            latency=latency,
-            success=True,
-            tokens_used=sum(f["chunks_added"] for f in processed_files) * 100,
-            metadata={"files_count": len(processed_files)}
-        )
-        
         return {
             'success': True,
-            'message': f"Processed {len(processed_files)} files.",
-            'files': processed_files
+            'message': f"Queued {len(saved_files)} files for processing.",
+            'job_id': job.job_id,
+            'status_url': f"/api/jobs/{job.job_id}",
+            'files': [
+                {"filename": filename, "paper_id": paper_id}
+                for filename, _, paper_id in saved_files
+            ]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading PDFs: {e}")
         metrics_tracker.record_operation(
@@ -184,111 +249,69 @@ async def search_arxiv(request: ArxivSearchRequest):
 
 @app.post("/api/arxiv/ingest")
 async def ingest_arxiv_papers(request: IngestPapersRequest):
-    """Download and ingest selected ArXiv papers."""
-    start_time = time.time()
-    
+    """Queue selected ArXiv papers for download and ingestion."""
     try:
-        processed = []
-        failed = []
-
-        for paper_id in request.paper_ids:
-            logger.info(f"Processing ArXiv paper: {paper_id}")
-            pdf_path = download_single_arxiv_paper(paper_id, settings.RAW_PAPERS_DIR)
-
-            if pdf_path:
-                try:
-                    chunks_count = await process_single_pdf(pdf_path, paper_id)
-
-                    processed.append({
-                        "paper_id": paper_id,
-                        "chunks_added": chunks_count,
-                        "status": "success"
-                    })
-                    logger.info(f"Successfully processed {paper_id}: {chunks_count} chunks")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {paper_id}: {e}")
-                    failed.append({
-                        "paper_id": paper_id,
-                        "error": str(e),
-                        "status": "processing_failed"
-                    })
-            else:
-                logger.warning(f"Failed to download {paper_id}")
-                failed.append({
-                    "paper_id": paper_id,
-                    "error": "Download failed",
-                    "status": "download_failed"
-                })
-        
-        # Track metrics
-        latency = time.time() - start_time
-        metrics_tracker.record_operation(
-            operation="arxiv_ingest",
-            latency=latency,
-            success=len(processed) > 0,
-            tokens_used=sum(p["chunks_added"] for p in processed) * 100,
-            metadata={
-                "requested": len(request.paper_ids),
-                "successful": len(processed),
-                "failed": len(failed)
-            }
-        )
-        
+        job = job_queue.submit_arxiv(request.paper_ids)
+
         return {
-            'success': len(processed) > 0,
-            'message': f"Processed {len(processed)} papers successfully. {len(failed)} failed.",
-            'papers': processed,
-            'failed': failed,
-            'total_requested': len(request.paper_ids),
-            'successful': len(processed),
-            'failed_count': len(failed)
+            'success': True,
+            'message': f"Queued {len(request.paper_ids)} papers for ingestion.",
+            'job_id': job.job_id,
+            'status_url': f"/api/jobs/{job.job_id}",
+            'total_requested': len(request.paper_ids)
         }
         
     except Exception as e:
         logger.error(f"Error in ingest endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error ingesting ArXiv papers: {str(e)}")
 
+# Ingest Job Endpoints
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 20):
+    """Get the most recent ingest jobs"""
+    jobs = job_queue.list_jobs(limit=limit)
+    return {
+        "success": True,
+        "jobs": jobs,
+        "count": len(jobs)
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get per-paper stage, progress and errors of an ingest job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {
+        "success": True,
+        "job": job
+    }
+
 @app.get("/api/papers/list")
 async def list_papers():
-    """Get all papers and their chunks from the database"""
+    """Get all papers and their chunks from the paper catalog"""
     try:
-        from src.stores.vector_store import get_all_documents
-        
-        all_docs = get_all_documents()
-        
-        # Group chunks by paper_id
-        papers_dict = {}
-        for doc in all_docs:
-            metadata = doc.get("metadata", {})
-            paper_id = metadata.get("paper_id", "Unknown")
-            
-            if paper_id not in papers_dict:
-                papers_dict[paper_id] = {
-                    "paper_id": paper_id,
-                    "title": metadata.get("title", "Unknown Title"),
-                    "chunk_count": 0,
-                    "chunks": [],
-                    "total_size": 0
-                }
-            
-            papers_dict[paper_id]["chunk_count"] += 1
-            papers_dict[paper_id]["total_size"] += len(doc.get("document", ""))
-            papers_dict[paper_id]["chunks"].append({
-                "chunk_id": doc.get("id"),
-                "content_preview": doc.get("document", "")[:200] + "...",
-                "content_length": len(doc.get("document", "")),
-                "type": metadata.get("type", "text")
-            })
-        
-        # Convert to list and sort by paper_id
-        papers_list = sorted(papers_dict.values(), key=lambda x: x["paper_id"])
+        papers_list = paper_catalog.list_papers()
+        
+        # Attach chunk summaries, grouped by paper_id
+        papers_dict = {paper["paper_id"]: {**paper, "chunks": []} for paper in papers_list}
+        total_chunks = 0
+        for chunk in paper_catalog.get_chunks():
+            total_chunks += 1
+            paper = papers_dict.get(chunk["paper_id"])
+            if paper is not None:
+                paper["chunks"].append({
+                    "chunk_id": chunk["chunk_id"],
+                    "content_preview": chunk["content_preview"] + "...",
+                    "content_length": chunk["content_length"],
+                    "type": chunk["type"]
+                })
         
         return {
             "success": True,
-            "papers": papers_list,
-            "total_papers": len(papers_list),
-            "total_chunks": len(all_docs)
+            "papers": list(papers_dict.values()),
+            "total_papers": len(papers_dict),
+            "total_chunks": total_chunks
         }
     
     except Exception as e:
@@ -299,22 +322,12 @@ async def list_papers():
 async def delete_papers(paper_ids: List[str]):
     """Delete selected papers and all their chunks"""
     try:
-        from src.stores.vector_store import get_collection, get_all_documents
-        
-        collection = get_collection()
-        all_docs = get_all_documents()
-        
         # Find all chunk IDs for the selected papers
-        chunk_ids_to_delete = []
-        for doc in all_docs:
-            metadata = doc.get("metadata", {})
-            paper_id = metadata.get("paper_id", "")
-            if paper_id in paper_ids:
-                chunk_ids_to_delete.append(doc.get("id"))
+        chunk_ids_to_delete = paper_catalog.chunk_ids(paper_ids)
         
         if chunk_ids_to_delete:
             # Delete from ChromaDB
-            collection.delete(ids=chunk_ids_to_delete)
+            delete_chunks(chunk_ids_to_delete)
             logger.info(f"Deleted {len(chunk_ids_to_delete)} chunks for papers: {paper_ids}")
         
         return {
@@ -332,33 +345,36 @@ async def delete_papers(paper_ids: List[str]):
 async def get_paper_details(paper_id: str):
     """Get detailed information about a specific paper"""
     try:
-        from src.stores.vector_store import get_all_documents
+        paper = paper_catalog.get_paper(paper_id)
+        if paper is None:
+            raise HTTPException(status_code=404, detail=f"Paper {paper_id} not found")
         
-        all_docs = get_all_documents()
+        # Fetch this paper's chunks by id, in catalog order
+        chunk_ids = paper_catalog.chunk_ids([paper_id])
+        stored = get_collection().get(ids=chunk_ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: (document, metadata or {})
+            for chunk_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        }
         
-        # Find all chunks for this paper
         paper_chunks = []
-        paper_metadata = {}
-        
-        for doc in all_docs:
-            metadata = doc.get("metadata", {})
-            if metadata.get("paper_id") == paper_id:
-                paper_chunks.append({
-                    "chunk_id": doc.get("id"),
-                    "content": doc.get("document", ""),
-                    "type": metadata.get("type", "text"),
-                    "page": metadata.get("page", "N/A")
-                })
-                
-                # Store paper metadata (title, etc.)
-                if not paper_metadata:
-                    paper_metadata = {
-                        "paper_id": paper_id,
-                        "title": metadata.get("title", "Unknown Title"),
-                    }
-        
-        if not paper_chunks:
-            raise HTTPException(status_code=404, detail=f"Paper {paper_id} not found")
+        for chunk_id in chunk_ids:
+            if chunk_id not in by_id:
+                continue
+            document, metadata = by_id[chunk_id]
+            paper_chunks.append({
+                "chunk_id": chunk_id,
+                "content": document or "",
+                "type": metadata.get("type", "text"),
+                "page": metadata.get("page", "N/A"),
+                "image_url": f"/api/figures/{metadata['image_ref']}" if metadata.get("image_ref") else None
+            })
+        
+        paper_metadata = {
+            "paper_id": paper_id,
+            "title": paper["title"],
+            "ingested_at": paper["ingested_at"]
+        }
         
         return {
             "success": True,
@@ -373,6 +389,25 @@ async def get_paper_details(paper_id: str):
         logger.error(f"Error getting paper details: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving paper: {str(e)}")
 
+@app.get("/api/figures/{digest}")
+async def get_figure(digest: str):
+    """Serve the bytes of an extracted figure from the blob store"""
+    try:
+        path = blob_store.path_for(digest)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid figure reference")
+
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Figure {digest} not found")
+
+    media_type = await run_in_threadpool(figure_mime, digest)
+    if not media_type:
+        # Blob without a referencing chunk (e.g. the chunk was deleted since)
+        with open(path, "rb") as f:
+            header = f.read(8)
+        media_type = "image/png" if header.startswith(b"\x89PNG") else "image/jpeg"
+    return FileResponse(path, media_type=media_type)
+
 # Query Endpoints
 @app.post("/api/query/text", response_model=QueryResponse)
 async def query_text(request: QueryRequest):
@@ -383,6 +418,7 @@ async def query_text(request: QueryRequest):
         # Prepare initial state
         initial_state = {
             "query": request.query,
+            "filters": normalize_filters(request.filters),
             "messages": [],
             "retrieved_chunks": [],
             "summaries": [],
@@ -469,6 +505,18 @@ async def query_image(
         logger.error(f"Error processing image query: {e}")
         raise HTTPException(status_code=500, detail="Error processing image query.")
 
+async def save_audio_upload(audio: UploadFile) -> str:
+    """Stream an uploaded audio file to a temporary file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as tmp:
+        tmp_path = tmp.name
+
+    try:
+        await save_upload(audio, Path(tmp_path), max_bytes=settings.MAX_AUDIO_UPLOAD_BYTES)
+    except Exception:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return tmp_path
+
 @app.post("/api/voice/transcribe")
 async def transcribe_audio(
     audio: UploadFile = File(...)
@@ -479,17 +527,15 @@ async def transcribe_audio(
     start_time = time.time()
     
     try:
-        # Save uploaded audio to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as tmp:
-            content = await audio.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        # Stream uploaded audio to a temporary file
+        tmp_path = await save_audio_upload(audio)
         
         # Transcribe
-        transcribed_text, error = voice_handler.transcribe_audio(tmp_path)
-        
-        # Clean up temp file
-        Path(tmp_path).unlink(missing_ok=True)
+        try:
+            transcribed_text, error = voice_handler.transcribe_audio(tmp_path)
+        finally:
+            # Clean up temp file
+            Path(tmp_path).unlink(missing_ok=True)
         
         if error:
             raise HTTPException(status_code=500, detail=error)
@@ -521,6 +567,8 @@ async def transcribe_audio(
             success=False,
             metadata={"error": str(e)}
         )
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
 @app.post("/api/voice/synthesize")
@@ -578,13 +626,12 @@ async def voice_query(audio: UploadFile = File(...)):
     
     try:
         # Transcribe audio to text
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as tmp:
-            content = await audio.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        tmp_path = await save_audio_upload(audio)
         
-        transcribed_text, transcribe_error = voice_handler.transcribe_audio(tmp_path)
-        Path(tmp_path).unlink(missing_ok=True)
+        try:
+            transcribed_text, transcribe_error = voice_handler.transcribe_audio(tmp_path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
         
         if transcribe_error:
             raise HTTPException(status_code=500, detail=f"Transcription failed: {transcribe_error}")
@@ -592,6 +639,7 @@ async def voice_query(audio: UploadFile = File(...)):
         # Process query through agent
         initial_state = {
             "query": transcribed_text,
+            "filters": None,
             "messages": [],
             "retrieved_chunks": [],
             "summaries": [],
@@ -643,6 +691,8 @@ async def voice_query(audio: UploadFile = File(...)):
             success=False,
             metadata={"error": str(e)}
         )
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Voice query failed: {str(e)}")
 
 @app.get("/api/metrics/summary")
@@ -700,6 +750,7 @@ async def metrics_dashboard(hours: int = 24):
     try:
         stats = metrics_tracker.get_summary_stats(hours=hours)
         errors = metrics_tracker.get_recent_errors(limit=5)
+        cache_summary = metrics_tracker.get_cache_summary("retrieval_cache", hours=hours)
         
         # Calculate additional insights
         ops_breakdown = stats.get("operations_breakdown", {})
@@ -727,6 +778,7 @@ async def metrics_dashboard(hours: int = 24):
                 "total_cost": stats["total_cost"],
                 "time_window_hours": hours
             },
+            "retrieval_cache": cache_summary,
             "operations": ops_breakdown,
             "recent_errors": errors,
             "insights": {
@@ -43,6 +43,24 @@ const API = {
         return response.json();
     },
     
+    async getJob(jobId) {
+        const response = await fetch(`${this.baseURL}/api/jobs/${jobId}`);
+        return response.json();
+    },
+    
+    async waitForJob(jobId, onProgress = null, intervalMs = 2000) {
+        while (true) {
+            const result = await this.getJob(jobId);
+            if (!result.success) throw new Error(`Job ${jobId} not found`);
+            
+            if (onProgress) onProgress(result.job);
+            if (result.job.status === 'completed' || result.job.status === 'failed') {
+                return result.job;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    },
+    
     async getStats() {
         const response = await fetch(`${this.baseURL}/api/stats`);
         return response.json();
@@ -88,7 +88,16 @@ const Search = {
             const result = await API.ingestPapers(AppState.selectedPapers);
             
             if (result.success) {
-                UI.showToast(`${AppState.selectedPapers.length} papers ingested successfully!`, 'success');
+                const job = await API.waitForJob(result.job_id, (job) => {
+                    btn.innerHTML = `<div class="loading"></div> Ingesting... ${Math.round(job.progress)}%`;
+                });
+                const ingested = job.papers.filter(p => p.stage === 'done').length;
+                
+                if (ingested === job.papers.length) {
+                    UI.showToast(`${ingested} papers ingested successfully!`, 'success');
+                } else {
+                    UI.showToast(`${ingested} of ${job.papers.length} papers ingested`, 'error');
+                }
                 await Upload.loadStats();
             } else {
                 UI.showToast('Error ingesting papers', 'error');
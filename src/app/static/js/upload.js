@@ -65,7 +65,16 @@ const Upload = {
             const result = await API.uploadPDFs(AppState.selectedFiles);
             
             if (result.success) {
-                UI.showToast('Papers uploaded and indexed successfully!', 'success');
+                const job = await API.waitForJob(result.job_id, (job) => {
+                    uploadBtn.innerHTML = `<div class="loading"></div> Processing... ${Math.round(job.progress)}%`;
+                });
+                const failed = job.papers.filter(p => p.stage === 'failed').length;
+                
+                if (job.status === 'completed' && failed === 0) {
+                    UI.showToast('Papers uploaded and indexed successfully!', 'success');
+                } else {
+                    UI.showToast(`${failed} of ${job.papers.length} papers failed to process`, 'error');
+                }
                 await this.loadStats();
             } else {
                 UI.showToast('Error uploading files', 'error');
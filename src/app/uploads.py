@@ -0,0 +1,112 @@
+import os
+from pathlib import Path
+from typing import Dict
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from config import settings
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class RequestSizeLimit:
+    """
+    ASGI middleware that rejects oversized request bodies on the given paths
+    with 413 before they are received in full: at once when Content-Length
+    is over the limit, else as soon as the streamed body passes it. Starlette
+    spools a multipart body completely before the endpoint runs, so
+    save_upload alone only notices after the whole upload was written to a
+    temp file.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        too_large = JSONResponse(
+            {"detail": f"Request exceeds the {limit // (1024 * 1024)} MB upload limit."}, status_code=413
+        )
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit and not response_started:
+                    # Answer now; the endpoint sees a disconnect and its output is dropped
+                    rejected = True
+                    await too_large(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+async def save_upload(
+    upload: UploadFile,
+    dest: Path,
+    max_bytes: int = settings.MAX_UPLOAD_BYTES,
+    chunk_size: int = settings.UPLOAD_CHUNK_BYTES
+) -> int:
+    """
+    Stream an uploaded file to disk in fixed-size blocks so memory use stays
+    constant regardless of file size. The file is written to a .part path and
+    only renamed into place once complete.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+        dest (Path): Where to store it.
+        max_bytes (int): Size limit; larger uploads are rejected with 413.
+        chunk_size (int): Block size for reading and writing.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(f"{dest.name}.part")
+
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                block = await upload.read(chunk_size)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{upload.filename} exceeds the {max_bytes // (1024 * 1024)} MB upload limit."
+                    )
+                f.write(block)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        await upload.close()
+
+    return written
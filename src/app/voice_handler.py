@@ -1,4 +1,3 @@
-import whisper
 import torch
 from gtts import gTTS
 import io
@@ -8,6 +7,8 @@ from typing import Optional, Tuple
 import numpy as np
 from threading import Lock
 
+from config import settings
+
 class VoiceHandler:
     """Handles speech-to-text and text-to-speech operations"""
     _instance = None
@@ -22,11 +23,26 @@ class VoiceHandler:
         return cls._instance
     
     def _initialize(self):
-        """Initialize Whisper model for speech recognition"""
+        """Pick the device; the Whisper model itself is loaded on first transcription"""
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Loading Whisper model on {self.device}...")
-        self.whisper_model = whisper.load_model("base", device=self.device)
-        print("Whisper model loaded successfully")
+        self._whisper_model = None
+        self._model_lock = Lock()
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._whisper_model is not None
+
+    @property
+    def whisper_model(self):
+        """Whisper model for speech recognition, loaded on first use"""
+        if self._whisper_model is None:
+            with self._model_lock:
+                if self._whisper_model is None:
+                    import whisper
+                    print(f"Loading Whisper model on {self.device}...")
+                    self._whisper_model = whisper.load_model(settings.WHISPER_MODEL, device=self.device)
+                    print("Whisper model loaded successfully")
+        return self._whisper_model
     
     def transcribe_audio(self, audio_path: str) -> Tuple[str, Optional[str]]:
         """Transcribe audio file to text using Whisper"""
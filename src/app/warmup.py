@@ -0,0 +1,91 @@
+import logging
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from src.agents.llm import chat_model_loaded, get_chat_model
+from src.agents.nodes.retriever import get_retriever, retriever_loaded
+from src.agents.tools.image_captioner import ImageCaptioner
+from src.agents.tools.reranker import CrossEncoderReranker
+from src.agents.tools.summarizer import Summarizer
+from src.app.voice_handler import voice_handler
+from src.embeddings.embedder import embedding_model
+from src.monitoring.metrics_tracker import metrics_tracker
+
+logger = logging.getLogger(__name__)
+
+# name -> (is_loaded, load); every heavy component is created on first use
+COMPONENTS: Dict[str, Tuple[Callable[[], bool], Callable[[], object]]] = {
+    "embedder": (lambda: embedding_model.loaded, lambda: embedding_model.inner),
+    "retriever": (retriever_loaded, get_retriever),
+    "chat_model": (chat_model_loaded, get_chat_model),
+    "whisper": (lambda: voice_handler.model_loaded, lambda: voice_handler.whisper_model),
+    "summarizer": (lambda: getattr(Summarizer._instance, "pipe", None) is not None, Summarizer),
+    "captioner": (lambda: getattr(ImageCaptioner._instance, "pipe", None) is not None, ImageCaptioner),
+    "reranker": (lambda: CrossEncoderReranker().model_loaded, lambda: CrossEncoderReranker().model),
+}
+
+_load_times: Dict[str, float] = {}
+_load_errors: Dict[str, str] = {}
+_warmup_lock = Lock()
+
+def readiness() -> Dict:
+    """
+    Load state of every component. The service is ready once all
+    WARMUP_COMPONENTS are loaded.
+    """
+    components = {
+        name: {
+            "loaded": is_loaded(),
+            "load_seconds": _load_times.get(name),
+            "error": _load_errors.get(name)
+        }
+        for name, (is_loaded, _) in COMPONENTS.items()
+    }
+    required = [name for name in settings.WARMUP_COMPONENTS if name in COMPONENTS]
+    return {
+        "ready": all(components[name]["loaded"] for name in required),
+        "required": required,
+        "components": components
+    }
+
+def warm_up(names: Optional[List[str]] = None) -> Dict:
+    """
+    Load the given components (default: WARMUP_COMPONENTS) now instead of on first use.
+
+    Args:
+        names (Optional[List[str]]): Component names, see COMPONENTS.
+
+    Returns:
+        Dict: Readiness after warm-up.
+    """
+    names = names or settings.WARMUP_COMPONENTS
+    unknown = [name for name in names if name not in COMPONENTS]
+    if unknown:
+        raise ValueError(f"Unknown components: {', '.join(unknown)}")
+
+    with _warmup_lock:
+        start_time = time.time()
+        for name in names:
+            is_loaded, load = COMPONENTS[name]
+            if is_loaded():
+                continue
+            component_start = time.time()
+            try:
+                load()
+                _load_times[name] = time.time() - component_start
+                _load_errors.pop(name, None)
+                logger.info(f"Loaded {name} in {_load_times[name]:.1f}s")
+            except Exception as e:
+                _load_errors[name] = str(e)
+                logger.error(f"Error loading {name}: {e}")
+
+        metrics_tracker.record_operation(
+            operation="warmup",
+            latency=time.time() - start_time,
+            success=not any(name in _load_errors for name in names),
+            metadata={"components": names, "load_seconds": {n: _load_times.get(n) for n in names}}
+        )
+
+    return readiness()
@@ -0,0 +1,145 @@
+import itertools
+import logging
+import queue
+import time
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dispatch order of queued requests; lower goes first
+QUERY_PRIORITY = 0
+DOCUMENT_PRIORITY = 1
+
+class EmbeddingBatcher:
+    """
+    Collects embed requests from concurrent callers and runs them through the
+    model as one batched forward pass. A batch is dispatched once it holds
+    max_batch texts or max_wait_ms after its first request, whichever comes
+    first. Callers get their vectors back through futures.
+
+    Query requests are dispatched before queued document (ingest) requests,
+    and a dispatch never takes more than max_batch texts, so a query waits
+    for at most one forward pass of ingest work.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        max_batch: int = settings.EMBEDDING_MAX_BATCH,
+        max_wait_ms: float = settings.EMBEDDING_MAX_WAIT_MS
+    ):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread = None
+        self._start_lock = Lock()
+        self._stats_lock = Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts: List[str], priority: int = DOCUMENT_PRIORITY) -> Future:
+        """
+        Queue texts for embedding.
+
+        Args:
+            texts (List[str]): The texts; callers split large inputs into max_batch pieces.
+            priority (int): QUERY_PRIORITY or DOCUMENT_PRIORITY. Requests of equal
+                priority are dispatched in arrival order.
+
+        Returns:
+            Future: Resolves to the list of vectors, in the order of texts.
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((priority, next(self._sequence), list(texts), future))
+        return future
+
+    def _run(self):
+        while True:
+            _, _, texts, future = self._queue.get()
+            batch = [(texts, future)]
+            size = len(texts)
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if size + len(item[2]) > self.max_batch:
+                    # Keeps its place in the queue for the next dispatch
+                    self._queue.put(item)
+                    break
+                batch.append((item[2], item[3]))
+                size += len(item[2])
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List):
+        # Concurrent callers often ask for the same text; embed it once
+        unique = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+        try:
+            vectors = dict(zip(unique, self.inner.embed_documents(unique))) if unique else {}
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(unique)} texts failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for texts, future in batch:
+            future.set_result([vectors[text] for text in texts])
+
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(unique)
+
+    def stats(self) -> Dict:
+        """Dispatch counters and average batch sizes."""
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+                "avg_texts_per_batch": self.texts / self.batches if self.batches else 0.0,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+class BatchedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that routes every call through an EmbeddingBatcher.
+    """
+    def __init__(self, batcher: EmbeddingBatcher):
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Queued in max_batch pieces, so queries can be dispatched in between
+        step = self.batcher.max_batch
+        futures = [self.batcher.submit(texts[start:start + step]) for start in range(0, len(texts), step)]
+        return [vector for future in futures for vector in future.result()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit([text], priority=QUERY_PRIORITY).result()[0]
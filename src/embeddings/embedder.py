@@ -1,15 +1,135 @@
-from typing import List
+from threading import Lock
+from typing import Callable, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
-from sentence_transformers import SentenceTransformer, util
+
+from config import settings
+from src.embeddings.batcher import BatchedEmbeddings, EmbeddingBatcher
+from src.embeddings.embedding_cache import EmbeddingCache
 
 model_name = "sentence-transformers/all-MiniLM-L6-v2"
 model_kwargs = {'device': 'cpu'}
 encode_kwargs = {'normalize_embeddings': False}
 
-embedder = HuggingFaceEmbeddings(
-    model_name=model_name,
-    model_kwargs=model_kwargs,
-    encode_kwargs=encode_kwargs
+def backend_model_kwargs(backend: str = settings.EMBEDDING_BACKEND) -> dict:
+    """
+    SentenceTransformer arguments for a backend: "torch" runs the PyTorch
+    model, "onnx" runs the exported (optionally int8-quantized) ONNX graph
+    on onnxruntime's CPU provider.
+    """
+    if backend == "onnx":
+        return {
+            **model_kwargs,
+            "backend": "onnx",
+            "model_kwargs": {
+                "file_name": settings.EMBEDDING_ONNX_FILE,
+                "provider": "CPUExecutionProvider"
+            }
+        }
+    if backend == "torch":
+        return model_kwargs
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def backend_model_id(backend: str = settings.EMBEDDING_BACKEND) -> str:
+    """
+    Identity of the model as seen by the embedding cache; backends produce
+    slightly different vectors, so they must not share entries.
+    """
+    model_id = f"{model_name}:{encode_kwargs['normalize_embeddings']}"
+    if backend == "onnx":
+        model_id += f":onnx:{settings.EMBEDDING_ONNX_FILE}"
+    return model_id
+
+def build_embedder(backend: str = settings.EMBEDDING_BACKEND) -> HuggingFaceEmbeddings:
+    """
+    Create an uncached LangChain embedder for the given backend.
+    """
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=backend_model_kwargs(backend),
+        encode_kwargs=encode_kwargs
+    )
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings proxy that builds the underlying model on first use, so
+    importing this module does not load model weights.
+    """
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self.factory = factory
+        self._inner: Optional[Embeddings] = None
+        self._lock = Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._inner is not None
+
+    @property
+    def inner(self) -> Embeddings:
+        if self._inner is None:
+            with self._lock:
+                if self._inner is None:
+                    self._inner = self.factory()
+        return self._inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+def _as_list(vector) -> List[float]:
+    return vector.tolist() if isinstance(vector, np.ndarray) else list(vector)
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that serves repeated texts from an EmbeddingCache
+    and embeds only the misses, in a single batched call.
+    """
+    def __init__(self, inner: Embeddings, model_id: str, cache: EmbeddingCache):
+        self.inner = inner
+        self.model_id = model_id
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.make_key(self.model_id, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update(computed)
+
+        return [_as_list(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = EmbeddingCache.make_key(self.model_id, text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return _as_list(cached[key])
+
+        vector = self.inner.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
+
+embedding_cache = EmbeddingCache()
+
+embedding_model = LazyEmbeddings(build_embedder)
+
+# Cache misses from concurrent callers share one forward pass
+embedding_batcher = EmbeddingBatcher(embedding_model)
+
+embedder = CachedEmbeddings(
+    BatchedEmbeddings(embedding_batcher),
+    model_id=backend_model_id(),
+    cache=embedding_cache
 )
 
 def embed_text(text: str) -> List[float]:
@@ -22,4 +142,4 @@ def embed_documents(texts: list) -> List[List[float]]:
     """
     Generate embeddings for a list of documents.
     """
-    return embedder.embed_documents(texts)
\ No newline at end of file
+    return embedder.embed_documents(texts)
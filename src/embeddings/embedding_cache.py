@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: an in-process LRU in front of a persistent
+    SQLite store. Vectors are kept as compact float32 arrays and keyed by
+    model identity plus a hash of the text.
+    """
+
+    def __init__(
+        self,
+        path: Path = settings.EMBEDDING_CACHE_PATH,
+        memory_items: int = settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+        disk_items: int = settings.EMBEDDING_CACHE_DISK_ITEMS
+    ):
+        self.path = Path(path)
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """Cache key for a text embedded by a given model."""
+        return hashlib.sha256(f"{model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up vectors by key, memory first, then disk. Missing keys are omitted.
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+
+            disk_keys = [key for key in dict.fromkeys(keys) if key not in found]
+            if disk_keys:
+                rows = []
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(disk_keys), 500):
+                    batch = disk_keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows += self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(rows)
+                self.misses += len(disk_keys) - len(rows)
+
+                if rows:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows]
+                    )
+                    self._conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        Store vectors in both levels and evict least recently used disk entries
+        beyond the configured size.
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            rows = []
+            for key, vector in items.items():
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember(key, array)
+                rows.append((key, array.tobytes(), now))
+
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._disk_count += self._conn.total_changes - before
+
+            if self._disk_count > self.disk_items:
+                # Evict down to 90% so eviction does not run on every insert
+                excess = self._disk_count - int(self.disk_items * 0.9)
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._disk_count -= excess
+                logger.info(f"Evicted {excess} embeddings from the disk cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Hit counters and sizes of both cache levels."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.disk_hits) / lookups) * 100 if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_max_entries": self.memory_items,
+                "disk_entries": self._disk_count,
+                "disk_max_entries": self.disk_items
+            }
@@ -0,0 +1,54 @@
+from threading import Lock
+from typing import List
+
+from config import settings
+from src.embeddings.embedder import model_name
+
+_tokenizer = None
+_tokenizer_lock = Lock()
+
+def get_tokenizer():
+    """
+    Returns the embedding model's (fast) tokenizer, loaded on first use.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return _tokenizer
+
+def split_windows(
+    text: str,
+    max_tokens: int = settings.EMBED_WINDOW_TOKENS,
+    stride: int = settings.EMBED_WINDOW_STRIDE
+) -> List[str]:
+    """
+    Splits text into overlapping windows of at most max_tokens word pieces,
+    so that every part of a long chunk fits the embedder's input length.
+
+    Args:
+        text (str): The chunk text.
+        max_tokens (int): Word pieces per window.
+        stride (int): Word pieces between the starts of consecutive windows.
+
+    Returns:
+        List[str]: The windows, in order. Text that fits in one window is returned as is.
+    """
+    offsets = get_tokenizer()(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False
+    )["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return [text]
+
+    windows = []
+    for start in range(0, len(offsets), max(1, stride)):
+        end = min(start + max_tokens, len(offsets))
+        windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+        if end == len(offsets):
+            break
+    return windows
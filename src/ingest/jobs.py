@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.ingest.loader.arxiv_loader import download_papers_by_id
+from src.ingest.pipeline import ingest_pdfs_parallel
+from src.monitoring.metrics_tracker import metrics_tracker
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PaperProgress:
+    """Progress of one paper inside an ingest job"""
+    paper_id: str
+    stage: str = "queued"  # queued, downloading, parsing, embedding, done, failed
+    pdf_path: Optional[str] = None
+    filename: Optional[str] = None
+    chunks_added: int = 0
+    error: Optional[str] = None
+
+@dataclass
+class IngestJob:
+    """A queued download/parse/embed/upsert run over one or more papers"""
+    job_id: str
+    kind: str  # upload, arxiv
+    status: str = "queued"  # queued, running, completed, failed
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    papers: List[PaperProgress] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> float:
+        """Share of papers that reached a final stage, in percent"""
+        if not self.papers:
+            return 100.0
+        finished = sum(1 for p in self.papers if p.stage in ("done", "failed"))
+        return (finished / len(self.papers)) * 100
+
+    def to_dict(self):
+        return {**asdict(self), "progress": self.progress}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IngestJob":
+        data = {k: v for k, v in data.items() if k != "progress"}
+        data["papers"] = [PaperProgress(**p) for p in data.get("papers", [])]
+        return cls(**data)
+
+class IngestJobQueue:
+    """Runs ingest jobs on a bounded worker pool and persists their state to disk"""
+    _instance = None
+    _lock = Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.jobs: Dict[str, IngestJob] = {}
+        self.jobs_dir = settings.JOBS_DIR
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._state_lock = Lock()
+        self._load_jobs()
+
+    def _load_jobs(self):
+        """Load persisted jobs from disk"""
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                job = IngestJob.from_dict(json.loads(path.read_text()))
+                self.jobs[job.job_id] = job
+            except Exception as e:
+                logger.error(f"Error loading job {path.name}: {e}")
+
+    def _save_job(self, job: IngestJob):
+        """Persist a job atomically"""
+        job.updated_at = datetime.now().isoformat()
+        path = self.jobs_dir / f"{job.job_id}.json"
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(job.to_dict()))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving job {job.job_id}: {e}")
+
+    def start(self):
+        """Start the worker pool and resume jobs interrupted by a restart"""
+        if self.executor is not None:
+            return
+        self.executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="ingest-job")
+
+        for job in sorted(self.jobs.values(), key=lambda j: j.created_at):
+            if job.status in ("queued", "running"):
+                logger.info(f"Resuming ingest job {job.job_id}")
+                with self._state_lock:
+                    job.status = "queued"
+                    for paper in job.papers:
+                        if paper.stage not in ("done", "failed"):
+                            paper.stage = "queued"
+                    self._save_job(job)
+                self.executor.submit(self._run, job.job_id)
+
+    def shutdown(self):
+        """Stop accepting work; running jobs resume on the next start"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _submit(self, kind: str, papers: List[PaperProgress]) -> IngestJob:
+        # Progress is tracked per paper_id; a duplicate entry would never advance and keep the job open
+        unique: Dict[str, PaperProgress] = {}
+        for paper in papers:
+            unique.setdefault(paper.paper_id, paper)
+        papers = list(unique.values())
+        job = IngestJob(job_id=str(uuid4()), kind=kind, papers=papers)
+        with self._state_lock:
+            self.jobs[job.job_id] = job
+            self._save_job(job)
+
+        self.start()
+        self.executor.submit(self._run, job.job_id)
+        logger.info(f"Queued {kind} ingest job {job.job_id} with {len(papers)} papers")
+        return job
+
+    def submit_upload(self, files: List[Tuple[str, str, str]]) -> IngestJob:
+        """
+        Queue already-saved uploads for ingestion.
+
+        Args:
+            files (List[Tuple[str, str, str]]): (filename, pdf_path, paper_id) triples.
+        """
+        return self._submit("upload", [
+            PaperProgress(paper_id=paper_id, pdf_path=pdf_path, filename=filename)
+            for filename, pdf_path, paper_id in files
+        ])
+
+    def submit_arxiv(self, paper_ids: List[str]) -> IngestJob:
+        """Queue ArXiv papers for download and ingestion."""
+        return self._submit("arxiv", [PaperProgress(paper_id=paper_id) for paper_id in paper_ids])
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a snapshot of a job"""
+        with self._state_lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict]:
+        """Get snapshots of the most recent jobs"""
+        with self._state_lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)[:limit]
+            return [job.to_dict() for job in jobs]
+
+    def _update(self, job: IngestJob, paper: PaperProgress, **changes):
+        with self._state_lock:
+            for key, value in changes.items():
+                setattr(paper, key, value)
+            self._save_job(job)
+
+    def _run(self, job_id: str):
+        job = self.jobs[job_id]
+        start_time = time.time()
+
+        with self._state_lock:
+            job.status = "running"
+            self._save_job(job)
+
+        papers = {paper.paper_id: paper for paper in job.papers if paper.stage not in ("done", "failed")}
+
+        try:
+            if job.kind == "arxiv":
+                to_download = [p for p in papers.values() if not p.pdf_path]
+                for paper in to_download:
+                    self._update(job, paper, stage="downloading")
+
+                pdf_paths = download_papers_by_id([p.paper_id for p in to_download], settings.RAW_PAPERS_DIR)
+                for paper in to_download:
+                    if pdf_paths.get(paper.paper_id):
+                        self._update(job, paper, pdf_path=pdf_paths[paper.paper_id])
+                    else:
+                        self._update(job, paper, stage="failed", error="Download failed")
+
+            pending = [p for p in papers.values() if p.stage != "failed"]
+            results = ingest_pdfs_parallel(
+                [(p.pdf_path, p.paper_id) for p in pending],
+                on_progress=lambda paper_id, stage: self._update(job, papers[paper_id], stage=stage)
+            )
+
+            for result in results:
+                paper = papers[result["paper_id"]]
+                if result["status"] == "success":
+                    self._update(job, paper, stage="done", chunks_added=result["chunks_added"])
+                else:
+                    self._update(job, paper, stage="failed", error=result.get("error"))
+
+            with self._state_lock:
+                job.status = "completed"
+                self._save_job(job)
+
+        except Exception as e:
+            logger.error(f"Ingest job {job_id} failed: {e}")
+            with self._state_lock:
+                job.status = "failed"
+                job.error = str(e)
+                for paper in job.papers:
+                    if paper.stage not in ("done", "failed"):
+                        paper.stage = "failed"
+                        paper.error = str(e)
+                self._save_job(job)
+
+        done = [p for p in job.papers if p.stage == "done"]
+        metrics_tracker.record_operation(
+            operation="pdf_upload" if job.kind == "upload" else "arxiv_ingest",
+            latency=time.time() - start_time,
+            success=job.status == "completed" and len(done) > 0,
+            tokens_used=sum(p.chunks_added for p in done) * 100,
+            metadata={
+                "job_id": job_id,
+                "requested": len(job.papers),
+                "successful": len(done),
+                "failed": len(job.papers) - len(done),
+                "error": job.error
+            }
+        )
+
+# Global instance
+job_queue = IngestJobQueue()
@@ -1,147 +1,398 @@
+import os
+import re
 import sys
+import json
+import time
+import logging
 import arxiv
 import urllib3
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-PROJECT_ROOT = Path(__file__).resolve().parents[3] 
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
 sys.path.append(str(PROJECT_ROOT))
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+VERSION_SUFFIX = re.compile(r"v\d+$")
+# New-style arXiv IDs start with the submission year and month: 2301.00001
+NEW_STYLE_ID = re.compile(r"^(\d{2})(\d{2})\.\d{4,5}")
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces request starts at least min_interval seconds apart.
+    """
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = Lock()
+
+    def wait(self):
+        """Block until the caller's slot comes up."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+def _build_session() -> requests.Session:
+    """
+    Create a pooled HTTP session shared by every download thread.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.DOWNLOAD_CONCURRENCY,
+        pool_maxsize=settings.DOWNLOAD_CONCURRENCY,
+        max_retries=retries
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.verify = False
+    return session
+
+# Shared across calls: one arXiv API client, one pooled HTTP session and one global rate limiter
+arxiv_client = arxiv.Client()
+http_session = _build_session()
+rate_limiter = RateLimiter(settings.DOWNLOAD_MIN_INTERVAL)
+# arxiv.Client keeps its paging and rate-limit state unlocked, so API calls take turns.
+# A lock of its own: the download limiter's would stall PDF downloads behind API paging.
+arxiv_api_lock = Lock()
+
+def _arxiv_results(search: arxiv.Search) -> List[arxiv.Result]:
+    """
+    Run an arXiv API search to completion on the shared client, one caller at
+    a time. The client's own delay between requests keeps applying across callers.
+    """
+    with arxiv_api_lock:
+        return list(arxiv_client.results(search))
+
+def _stream_pdf(pdf_url: str, pdf_path: Path):
+    """
+    Stream a PDF straight to disk in fixed-size blocks. Writes to a .part file
+    first so an interrupted download never leaves a truncated PDF behind.
+    """
+    tmp_path = pdf_path.with_name(f"{pdf_path.name}.part")
+    rate_limiter.wait()
+    try:
+        with http_session.get(pdf_url, stream=True, timeout=settings.DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for block in response.iter_content(chunk_size=settings.DOWNLOAD_CHUNK_BYTES):
+                    f.write(block)
+        os.replace(tmp_path, pdf_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+def _result_to_metadata(result: arxiv.Result) -> Dict:
+    """
+    Convert an arxiv.Result into the metadata dictionary returned by the API.
+    """
+    paper_id_full = result.entry_id.split('/')[-1]
+
+    if 'v' in paper_id_full:
+        paper_id_base = paper_id_full.split('v')[0]
+    else:
+        paper_id_base = paper_id_full
+
+    return {
+        "id": paper_id_full,
+        "id_base": paper_id_base,
+        "title": result.title,
+        "authors": [author.name for author in result.authors],
+        "abstract": result.summary[:300] + "..." if len(result.summary) > 300 else result.summary,
+        "published": result.published.strftime("%Y-%m-%d"),
+        "pdf_url": result.pdf_url,
+        "entry_id": result.entry_id
+    }
+
+class ArxivMetadataCache:
+    """
+    Local JSON cache of arXiv paper metadata, keyed by paper ID (with or without
+    version). Unversioned IDs resolve to whichever version was latest when cached.
+    """
+    def __init__(self, cache_path: Path = settings.ARXIV_METADATA_CACHE):
+        self.cache_path = Path(cache_path)
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._lock = Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_path.exists():
+                try:
+                    self._entries = json.loads(self.cache_path.read_text())
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable arXiv metadata cache: {e}")
+        return self._entries
+
+    def get_many(self, paper_ids: List[str]) -> Dict[str, Dict]:
+        """Return cached metadata for the IDs that are known."""
+        with self._lock:
+            entries = self._load()
+            return {paper_id: entries[paper_id] for paper_id in paper_ids if paper_id in entries}
+
+    def put_many(self, metadata: Dict[str, Dict]):
+        """Store metadata by ID and persist the cache."""
+        if not metadata:
+            return
+        with self._lock:
+            entries = self._load()
+            entries.update(metadata)
+
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.tmp")
+            tmp_path.write_text(json.dumps(entries))
+            os.replace(tmp_path, self.cache_path)
+
+metadata_cache = ArxivMetadataCache()
+
+def _cached_metadata(paper_id: str) -> Optional[Dict]:
+    """Cached arXiv metadata of a paper, looked up with and without its version."""
+    base_id = VERSION_SUFFIX.sub("", paper_id)
+    cached = metadata_cache.get_many([paper_id, base_id])
+    return cached.get(paper_id) or cached.get(base_id)
+
+def paper_title(paper_id: str) -> Optional[str]:
+    """
+    Title of a paper from the cached arXiv metadata (filled by
+    resolve_arxiv_metadata when the paper was looked up or downloaded).
+
+    Returns:
+        Optional[str]: The title, or None for papers that are not known.
+    """
+    metadata = _cached_metadata(paper_id)
+    return metadata.get("title") if metadata else None
+
+def paper_published(paper_id: str) -> Optional[int]:
+    """
+    Publication date of a paper as a YYYYMMDD integer, for date-filtered retrieval.
+    Uses the cached arXiv metadata, else the month encoded in a new-style ID
+    (as the first of that month).
+
+    Args:
+        paper_id (str): The ArXiv paper ID (with or without version).
+
+    Returns:
+        Optional[int]: The date, or None for papers that are not from arXiv.
+    """
+    metadata = _cached_metadata(paper_id)
+    if metadata and metadata.get("published"):
+        return int(metadata["published"].replace("-", ""))
+
+    match = NEW_STYLE_ID.match(VERSION_SUFFIX.sub("", paper_id))
+    if match and 1 <= int(match.group(2)) <= 12:
+        return (2000 + int(match.group(1))) * 10000 + int(match.group(2)) * 100 + 1
+    return None
+
+def _fetch_metadata(paper_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Fetch metadata for a batch of IDs with a single id_list query.
+    """
+    search = arxiv.Search(id_list=paper_ids, max_results=len(paper_ids))
+    requested = set(paper_ids)
+
+    found = {}
+    for result in _arxiv_results(search):
+        metadata = _result_to_metadata(result)
+        short_id = result.get_short_id()
+        # Match "2301.00001v2" as well as its unversioned form "2301.00001"
+        for key in (short_id, VERSION_SUFFIX.sub("", short_id)):
+            if key in requested:
+                found[key] = metadata
+    return found
+
+def resolve_arxiv_metadata(
+    paper_ids: List[str],
+    batch_size: int = settings.ARXIV_ID_BATCH_SIZE
+) -> Dict[str, Dict]:
+    """
+    Resolve metadata (title, PDF URL, ...) for many ArXiv IDs at once.
+    Known IDs come from the local cache; the rest are fetched in batched
+    id_list queries and cached.
+
+    Args:
+        paper_ids (List[str]): The ArXiv paper IDs (with or without version).
+        batch_size (int): Number of IDs per id_list query.
+
+    Returns:
+        Dict mapping each resolvable paper ID to its metadata. Unknown IDs are omitted.
+    """
+    resolved = metadata_cache.get_many(paper_ids)
+    missing = list(dict.fromkeys(paper_id for paper_id in paper_ids if paper_id not in resolved))
+
+    fetched = {}
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        try:
+            fetched.update(_fetch_metadata(batch))
+        except Exception as e:
+            # One malformed ID fails the whole id_list query; retry the batch one by one
+            logger.warning(f"Batched arXiv lookup failed ({e}), retrying individually")
+            for paper_id in batch:
+                try:
+                    fetched.update(_fetch_metadata([paper_id]))
+                except Exception as e:
+                    logger.warning(f"arXiv lookup failed for {paper_id}: {e}")
+
+    metadata_cache.put_many(fetched)
+    resolved.update(fetched)
+    return resolved
+
 def search_arxiv_papers(query: str, max_results: int = settings.MAX_PAPERS):
     """
     Search ArXiv and return metadata without downloading PDFs.
-    
+
     Args:
         query (str): The search query for arXiv papers.
         max_results (int): Maximum number of results to return.
-    
+
     Returns:
         List of paper metadata dictionaries.
     """
-    client = arxiv.Client()
     search = arxiv.Search(
         query=query,
         max_results=max_results,
         sort_by=arxiv.SortCriterion.Relevance,
         sort_order=arxiv.SortOrder.Descending,
     )
-    
-    results = []
-
-    for result in client.results(search):
-        paper_id_full = result.entry_id.split('/')[-1]
-
-        if 'v' in paper_id_full:
-            paper_id_base = paper_id_full.split('v')[0]
-        else:
-            paper_id_base = paper_id_full
-        
-        results.append({
-            "id": paper_id_full, 
-            "id_base": paper_id_base,
-            "title": result.title,
-            "authors": [author.name for author in result.authors],
-            "abstract": result.summary[:300] + "..." if len(result.summary) > 300 else result.summary,
-            "published": result.published.strftime("%Y-%m-%d"),
-            "pdf_url": result.pdf_url,
-            "entry_id": result.entry_id
-        })
-    
+
+    results = [_result_to_metadata(result) for result in _arxiv_results(search)]
+
+    # Selected results are usually ingested next; cache them so that needs no lookup
+    metadata_cache.put_many({metadata["id"]: metadata for metadata in results})
+
     return results
 
 def download_single_arxiv_paper(paper_id: str, save_dir: Path = settings.RAW_PAPERS_DIR):
     """
     Download a single ArXiv paper by ID.
-    
+
     Args:
         paper_id (str): The ArXiv paper ID (with or without version).
         save_dir (Path): Directory to save the downloaded paper.
-    
+
     Returns:
         str: Path to downloaded PDF, or None if failed.
     """
+    return download_papers_by_id([paper_id], save_dir)[paper_id]
+
+def download_papers_by_id(
+    paper_ids: List[str],
+    save_dir: Path = settings.RAW_PAPERS_DIR,
+    max_workers: int = settings.DOWNLOAD_CONCURRENCY
+) -> Dict[str, Optional[str]]:
+    """
+    Download several ArXiv papers by ID concurrently. PDF URLs are resolved
+    in bulk through resolve_arxiv_metadata.
+
+    Args:
+        paper_ids (List[str]): The ArXiv paper IDs.
+        save_dir (Path): Directory to save the downloaded papers.
+        max_workers (int): Maximum number of concurrent downloads.
+
+    Returns:
+        Dict mapping each paper ID to its PDF path, or None if it failed.
+    """
+    # Papers already on disk need neither a lookup nor a download
+    paths = {
+        paper_id: str(save_dir / f"{paper_id}.pdf")
+        for paper_id in paper_ids
+        if (save_dir / f"{paper_id}.pdf").exists()
+    }
+    missing = [paper_id for paper_id in paper_ids if paper_id not in paths]
+
+    metadata = resolve_arxiv_metadata(missing) if missing else {}
+    for paper_id in missing:
+        if paper_id not in metadata:
+            print(f"Paper not found: {paper_id}")
+
+    paths.update(download_pdfs(
+        [(paper_id, metadata[paper_id]["pdf_url"]) for paper_id in missing if paper_id in metadata],
+        save_dir,
+        max_workers
+    ))
+    return {paper_id: paths.get(paper_id) for paper_id in paper_ids}
+
+def download_pdfs(
+    pdfs: List[Tuple[str, str]],
+    save_dir: Path = settings.RAW_PAPERS_DIR,
+    max_workers: int = settings.DOWNLOAD_CONCURRENCY
+) -> Dict[str, Optional[str]]:
+    """
+    Download PDFs from known URLs concurrently over the shared session.
+
+    Args:
+        pdfs (List[Tuple[str, str]]): (paper_id, pdf_url) pairs.
+        save_dir (Path): Directory to save the downloaded papers.
+        max_workers (int): Maximum number of concurrent downloads.
+
+    Returns:
+        Dict mapping each paper ID to its PDF path, or None if it failed.
+    """
     save_dir.mkdir(parents=True, exist_ok=True)
-    
-    # if 'v' in paper_id:
-    #     paper_id_base = paper_id.split('v')[0]
-    # else:
-    
-    paper_id_base = paper_id
-    
-    client = arxiv.Client()
-    search = arxiv.Search(
-        query=f"id:{paper_id_base}",
-        max_results=1,
-    )
-    
-    try:
-        result = next(client.results(search))
-        filename = f"{paper_id}.pdf"
-        pdf_path = save_dir / filename
-        
-        if not pdf_path.exists():
-            print(f"Downloading {paper_id} from {result.pdf_url}...")
-            response = requests.get(result.pdf_url, verify=False, timeout=30)
-            response.raise_for_status()
-            pdf_path.write_bytes(response.content)
-            print(f"Downloaded: {pdf_path}")
-        else:
+
+    def download(item: Tuple[str, str]) -> Optional[str]:
+        paper_id, pdf_url = item
+        pdf_path = save_dir / f"{paper_id}.pdf"
+
+        if pdf_path.exists():
             print(f"Already exists: {pdf_path}")
-        
-        return str(pdf_path)
-        
-    except StopIteration:
-        print(f"Paper not found: {paper_id}")
-        return None
-    except Exception as e:
-        print(f"Error downloading {paper_id}: {e}")
-        return None
-    
+            return str(pdf_path)
+        if not pdf_url:
+            return None
+
+        try:
+            print(f"Downloading {paper_id} from {pdf_url}...")
+            _stream_pdf(pdf_url, pdf_path)
+            print(f"Downloaded: {pdf_path}")
+            return str(pdf_path)
+        except requests.RequestException as e:
+            print(f"Failed to download {pdf_url}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        paths = executor.map(download, pdfs)
+        return dict(zip([paper_id for paper_id, _ in pdfs], paths))
+
 def download_arxiv_papers(query: str, max_docs: int = settings.MAX_PAPERS, save_dir: Path = settings.RAW_PAPERS_DIR):
     """
     Downloads arXiv papers as PDF + metadata. Saves them to the specified directory.
-    
+
     Args:
         query (str): The search query for arXiv papers.
         max_docs (int): Maximum number of documents to download.
         save_dir (Path): Directory to save the downloaded papers.
-    
+
     Returns:
         List of file paths to the downloaded papers.
     """
-    save_dir.mkdir(parents=True, exist_ok=True)
-    client = arxiv.Client()
     search = arxiv.Search(
         query=query,
         max_results=max_docs,
         sort_by=arxiv.SortCriterion.SubmittedDate,
         sort_order=arxiv.SortOrder.Descending,
     )
-    
-    pdf_paths = []
-    
-    for result in client.results(search):
-        paper_id = result.entry_id.split('/')[-1]
-
-        filename = f"{paper_id}.pdf"
-        pdf_url = result.pdf_url
-        pdf_path = str(save_dir / filename)
-        
-        pdf_paths.append(pdf_path)
-        
-        if pdf_url and not Path(pdf_path).exists():
-            try:
-                print(f"Downloading {paper_id} from {pdf_url}...")
-                response = requests.get(pdf_url, verify=False, timeout=30)
-                response.raise_for_status()
-                Path(pdf_path).write_bytes(response.content)
-                print(f"Downloaded: {pdf_path}")
-            except requests.RequestException as e:
-                print(f"Failed to download {pdf_url}: {e}")
-                continue
-        else:
-            print(f"Already exists: {pdf_path}")
-    
-    return pdf_paths
+
+    pdfs = [
+        (result.entry_id.split('/')[-1], result.pdf_url)
+        for result in _arxiv_results(search)
+    ]
+    paths = download_pdfs(pdfs, save_dir)
+
+    return [path for path in paths.values() if path]
@@ -1,29 +1,181 @@
+import re
+import sys
+import tempfile
 from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from pypdf import PdfReader, PdfWriter
+from unstructured.chunking.title import chunk_by_title
 from unstructured.partition.pdf import partition_pdf
-from typing import List, Tuple
 
-def parse_pdf(pdf_path: str) -> Tuple[List, List, List]:
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+
+# Chunking applied to the partitioned elements
+CHUNKING_SETTINGS = {
+    "max_characters": 10000,
+    "combine_text_under_n_chars": 2000,
+    "new_after_n_chars": 6000,
+}
+
+# Layout/table/image model settings, used for whole documents (hi_res) or
+# for the pages the fast pass cannot handle (tiered)
+HI_RES_SETTINGS = {
+    "extract_images_in_pdf": True,
+    "infer_table_structure": True,
+    "strategy": "hi_res",
+    "languages": ["eng"],
+    "extract_image_block_types": ["Image", "Table"],
+    "extract_image_block_to_payload": True,
+    "size": {'longest_edge': 2048},
+}
+
+# Text-layer only pass
+FAST_SETTINGS = {
+    "strategy": "fast",
+    "languages": ["eng"],
+}
+
+# Full partition_pdf settings of the hi_res strategy
+PARSER_SETTINGS = {
+    **HI_RES_SETTINGS,
+    "chunking_strategy": "by_title",
+    **CHUNKING_SETTINGS,
+}
+
+# Captions that indicate a table or figure on the page
+TABLE_CAPTION = re.compile(r"^\s*(Table|TABLE)\s+[IVX\d]+", re.MULTILINE)
+FIGURE_CAPTION = re.compile(r"^\s*(Figure|FIGURE|Fig\.)\s*\d+", re.MULTILINE)
+
+def parser_fingerprint(strategy: str = settings.PARSE_STRATEGY) -> Dict:
+    """
+    Returns every setting that affects the parse output. Part of the parse
+    cache key, so any change here invalidates previously cached parses.
+    """
+    fingerprint = {"strategy": strategy, "hi_res": PARSER_SETTINGS}
+    if strategy == "tiered":
+        fingerprint.update({
+            "fast": FAST_SETTINGS,
+            "chunking": CHUNKING_SETTINGS,
+            "min_page_chars": settings.PARSE_MIN_PAGE_CHARS,
+        })
+    return fingerprint
+
+def _pages_with_xobjects(reader: PdfReader) -> Set[int]:
+    """
+    Returns the (1-based) pages that embed images or form XObjects, which is
+    how raster and vector figures end up in a PDF.
+    """
+    pages = set()
+    for page_number, page in enumerate(reader.pages, 1):
+        try:
+            resources = page.get("/Resources")
+            xobjects = resources.get_object().get("/XObject") if resources else None
+            if xobjects and len(xobjects.get_object()) > 0:
+                pages.add(page_number)
+        except Exception:
+            # Unreadable resources: let the layout model decide
+            pages.add(page_number)
+    return pages
+
+def _select_hi_res_pages(reader: PdfReader, fast_elements: List) -> Dict[int, str]:
+    """
+    Decides which pages need the layout model and why: figures, tables, or
+    too little text from the text layer (scanned or broken pages).
+    """
+    page_text = {page_number: "" for page_number in range(1, len(reader.pages) + 1)}
+    for elem in fast_elements:
+        page_number = getattr(elem.metadata, "page_number", None)
+        if page_number in page_text:
+            page_text[page_number] += (elem.text or "") + "\n"
+
+    reasons = {}
+    figure_pages = _pages_with_xobjects(reader)
+    for page_number, text in page_text.items():
+        if len(text.strip()) < settings.PARSE_MIN_PAGE_CHARS:
+            reasons[page_number] = "no_text"
+        elif TABLE_CAPTION.search(text):
+            reasons[page_number] = "table"
+        elif page_number in figure_pages or FIGURE_CAPTION.search(text):
+            reasons[page_number] = "figure"
+    return reasons
+
+def _partition_pages_hi_res(pdf_path: Path, reader: PdfReader, pages: List[int]) -> List:
+    """
+    Runs the hi_res model over a subset of pages and maps the elements back
+    to their original page numbers.
+    """
+    writer = PdfWriter()
+    for page_number in pages:
+        writer.add_page(reader.pages[page_number - 1])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        subset_path = Path(tmp_dir) / pdf_path.name
+        with open(subset_path, "wb") as f:
+            writer.write(f)
+        elements = partition_pdf(filename=str(subset_path), **HI_RES_SETTINGS)
+
+    for elem in elements:
+        subset_page = getattr(elem.metadata, "page_number", None)
+        if subset_page:
+            elem.metadata.page_number = pages[subset_page - 1]
+        elem.metadata.filename = pdf_path.name
+        elem.metadata.file_directory = str(pdf_path.parent)
+    return elements
+
+def _parse_tiered(pdf_path: Path) -> Tuple[List, Dict[int, str]]:
+    """
+    Fast text-layer pass over the whole document, then hi_res only on pages
+    with images, tables or failed text extraction.
+    """
+    fast_elements = partition_pdf(filename=str(pdf_path), **FAST_SETTINGS)
+    reader = PdfReader(str(pdf_path))
+    hi_res_reasons = _select_hi_res_pages(reader, fast_elements)
+
+    page_strategies = {
+        page_number: "hi_res" if page_number in hi_res_reasons else "fast"
+        for page_number in range(1, len(reader.pages) + 1)
+    }
+
+    elements = [
+        elem for elem in fast_elements
+        if getattr(elem.metadata, "page_number", None) not in hi_res_reasons
+    ]
+    if hi_res_reasons:
+        elements += _partition_pages_hi_res(pdf_path, reader, sorted(hi_res_reasons))
+
+    # Restore reading order: stable sort keeps each page's element order
+    elements.sort(key=lambda elem: getattr(elem.metadata, "page_number", None) or 0)
+
+    return chunk_by_title(elements, **CHUNKING_SETTINGS), page_strategies
+
+def parse_pdf(pdf_path: str, strategy: str = settings.PARSE_STRATEGY) -> Tuple[List, Dict[int, str]]:
     """
     Extracts text, tables, figures from PDF using unstructured.
-    Returns dict with raw elements + HF-summarized versions.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        strategy (str): "tiered" (fast text pass, hi_res where needed) or "hi_res".
+
+    Returns:
+        Tuple[List, Dict[int, str]]: Chunked elements and the strategy
+        ("fast" or "hi_res") used for each page number.
     """
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-    elements = partition_pdf(
-        filename=str(pdf_path),
-        extract_images_in_pdf=True,
-        infer_table_structure=True,
-        strategy="hi_res",
-        languages=["eng"],
-        extract_image_block_types=["Image", "Table"],
-        extract_image_block_to_payload=True,
-        chunking_strategy="by_title",
-        max_characters=10000,
-        combine_text_under_n_chars=2000,
-        new_after_n_chars=6000,
-        size={'longest_edge': 2048}
-    )
-
-    return elements
\ No newline at end of file
+    if strategy == "tiered":
+        return _parse_tiered(pdf_path)
+
+    elements = partition_pdf(filename=str(pdf_path), **PARSER_SETTINGS)
+
+    page_strategies = {}
+    for elem in elements:
+        for orig in getattr(elem.metadata, "orig_elements", None) or []:
+            page_number = getattr(orig.metadata, "page_number", None)
+            if page_number:
+                page_strategies[page_number] = "hi_res"
+
+    return elements, page_strategies
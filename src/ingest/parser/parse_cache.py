@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.append(str(PROJECT_ROOT))
+
+from config import settings
+from src.ingest.parser.multimodal_parser import parser_fingerprint
+from src.models.document import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached chunk layout or the chunk building logic changes
+CACHE_FORMAT_VERSION = 3
+
+class ParseCache:
+    """
+    On-disk cache of parsed PDF chunks, keyed by the PDF content hash plus the
+    parser settings. Entries are stored paper-agnostic so the same PDF uploaded
+    under another name is still a hit.
+    """
+
+    def __init__(self, cache_dir: Path = settings.PARSE_CACHE_DIR, max_bytes: int = settings.PARSE_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._settings_digest = hashlib.sha256(
+            json.dumps([CACHE_FORMAT_VERSION, parser_fingerprint()], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def key_for(self, pdf_path: str) -> str:
+        """
+        Compute the cache key for a PDF: sha256 of its bytes and the parser settings.
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest.update(self._settings_digest.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, key: str, paper_id: str) -> Optional[List[DocumentChunk]]:
+        """
+        Return the cached chunks for a key, re-stamped with paper_id, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch so eviction treats the entry as recently used
+        os.utime(path)
+
+        with self._lock:
+            self.hits += 1
+            self.seconds_saved += entry.get("parse_seconds", 0.0)
+
+        return [
+            DocumentChunk(
+                paper_id=paper_id,
+                chunk_id=f"{paper_id}_{c['chunk_suffix']}",
+                type=c["type"],
+                content=c["content"],
+                metadata=c["metadata"]
+            )
+            for c in entry["chunks"]
+        ]
+
+    def put(self, key: str, chunks: List[DocumentChunk], parse_seconds: float = 0.0):
+        """
+        Store parsed chunks under a key and evict old entries if over the size limit.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "created": time.time(),
+            "parse_seconds": parse_seconds,
+            "chunks": [
+                {
+                    "chunk_suffix": c.chunk_id[len(c.paper_id) + 1:],
+                    "type": c.type.value,
+                    "content": c.content,
+                    "metadata": c.metadata
+                }
+                for c in chunks
+            ]
+        }
+
+        path = self._entry_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write parse cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def _entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        for path in self.cache_dir.glob("*.json.gz"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        if total <= self.max_bytes:
+            return
+
+        for path, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            logger.info(f"Evicted parse cache entry {path.name}")
+
+    def stats(self) -> Dict:
+        """
+        Hit/miss counters for this process plus the current on-disk footprint.
+        """
+        entries = self._entries() if self.cache_dir.exists() else []
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) * 100 if lookups else 0.0,
+                "seconds_saved": self.seconds_saved,
+                "entries": len(entries),
+                "bytes": sum(stat.st_size for _, stat in entries),
+                "max_bytes": self.max_bytes
+            }
+
+# Global instance
+parse_cache = ParseCache()
@@ -1,14 +1,33 @@
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from config import settings
 
-from src.ingest.processor import process_pdf
-from src.stores.vector_store import upsert_chunks
-from src.ingest.loader.arxiv_loader import download_arxiv_papers
+from src.ingest.processor import process_pdf, parse_and_cache
+from src.ingest.parser.parse_cache import parse_cache
+from src.stores.vector_store import delete_chunks, upsert_chunk_stream, sync_paper_chunks
+from src.ingest.loader.arxiv_loader import download_arxiv_papers, paper_published, paper_title
+from src.monitoring.metrics_tracker import metrics_tracker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def stamp_published(paper_id: str, chunks: List):
+    """
+    Adds the paper's publication date (YYYYMMDD) to its chunks' metadata so
+    retrieval can filter on a date range, and its arXiv title so the paper
+    catalog can show it. Unknown values are left out.
+    """
+    published = paper_published(paper_id)
+    title = paper_title(paper_id)
+    for chunk in chunks:
+        if published is not None:
+            chunk.metadata["published"] = published
+        if title:
+            chunk.metadata["title"] = title
+
 async def process_single_pdf(pdf_path: str, paper_id: str) -> int:
     """
     Process a single PDF file asynchronously.
@@ -24,13 +43,181 @@ async def process_single_pdf(pdf_path: str, paper_id: str) -> int:
     chunks = process_pdf(pdf_path, paper_id)
     
     if chunks:
-        logger.info(f"Upserting {len(chunks)} chunks...")
-        upsert_chunks(chunks)
+        stamp_published(paper_id, chunks)
+        # Only new or changed chunks are embedded
+        changed, stale_ids, _ = sync_paper_chunks(paper_id, chunks)
+        logger.info(f"Upserting {len(changed)} of {len(chunks)} chunks...")
+        stats = upsert_chunk_stream(changed)
+        # Stale chunks go only once their replacements are stored
+        delete_chunks(stale_ids)
+        metrics_tracker.record_operation(
+            operation="embed_upsert",
+            latency=stats["seconds"],
+            success=True,
+            metadata={
+                "paper_id": paper_id,
+                "chunks": stats["chunks"],
+                "chunks_per_sec": stats["chunks_per_sec"]
+            }
+        )
         return len(chunks)
     else:
         logger.warning(f"No chunks extracted from {paper_id}")
         return 0
 
+def iter_parsed_papers(
+    papers: List[Tuple[str, str]],
+    max_workers: int = settings.INGEST_WORKERS
+) -> Iterator[Tuple[str, List, Optional[str]]]:
+    """
+    Parse PDFs across a process pool and yield results as each paper finishes.
+
+    Args:
+        papers (List[Tuple[str, str]]): (pdf_path, paper_id) pairs.
+        max_workers (int): Number of parse processes. 1 parses inline.
+
+    Yields:
+        Tuple[str, List, Optional[str]]: (paper_id, chunks, error). A failed
+        paper yields an empty chunk list and its error message.
+    """
+    if max_workers <= 1 or len(papers) <= 1:
+        for pdf_path, paper_id in papers:
+            try:
+                yield paper_id, process_pdf(pdf_path, paper_id), None
+            except Exception as e:
+                logger.error(f"Error parsing {paper_id}: {e}")
+                yield paper_id, [], str(e)
+        return
+
+    # Spawn rather than fork: the parent may already hold torch models and
+    # Chroma handles that are not fork-safe.
+    context = multiprocessing.get_context("spawn")
+    workers = min(max_workers, len(papers))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        # Cache lookups happen here so hit/miss counters stay in this process;
+        # all misses are submitted to the pool before any hit is yielded.
+        ready = []
+        futures = {}
+        for pdf_path, paper_id in papers:
+            try:
+                cache_key = parse_cache.key_for(pdf_path)
+            except Exception as e:
+                logger.error(f"Error reading {paper_id}: {e}")
+                ready.append((paper_id, [], str(e)))
+                continue
+
+            cached = parse_cache.get(cache_key, paper_id)
+            if cached is not None:
+                ready.append((paper_id, cached, None))
+            else:
+                futures[executor.submit(parse_and_cache, pdf_path, paper_id, cache_key)] = paper_id
+
+        yield from ready
+
+        for future in as_completed(futures):
+            paper_id = futures[future]
+            try:
+                yield paper_id, future.result(), None
+            except Exception as e:
+                logger.error(f"Error parsing {paper_id}: {e}")
+                yield paper_id, [], str(e)
+
+def ingest_pdfs_parallel(
+    papers: List[Tuple[str, str]],
+    max_workers: int = settings.INGEST_WORKERS,
+    on_progress: Optional[Callable[[str, str], None]] = None
+) -> List[Dict]:
+    """
+    Parse PDFs in parallel and embed/upsert each paper as soon as it is
+    parsed, while the remaining papers are still parsing. A paper that fails
+    to parse or to embed is reported and skipped; the rest of the batch
+    still gets ingested.
+
+    Args:
+        papers (List[Tuple[str, str]]): (pdf_path, paper_id) pairs.
+        max_workers (int): Number of parse processes.
+        on_progress (Callable): Optional callback, called as on_progress(paper_id, stage)
+            when a paper enters the "parsing" or "embedding" stage.
+
+    Returns:
+        List[Dict]: One result per paper with its status and chunk count or error.
+        A paper is only reported as "success" once all of its chunks are written.
+    """
+    if not papers:
+        return []
+
+    results = {}
+    embedded = 0
+    seconds = 0.0
+
+    def report(paper_id: str, stage: str):
+        if on_progress:
+            on_progress(paper_id, stage)
+
+    for _, paper_id in papers:
+        report(paper_id, "parsing")
+
+    for paper_id, chunks, error in iter_parsed_papers(papers, max_workers):
+        if error:
+            results[paper_id] = {
+                "paper_id": paper_id,
+                "error": error,
+                "status": "processing_failed"
+            }
+            continue
+
+        if not chunks:
+            # Leave whatever is stored untouched rather than syncing to nothing
+            logger.warning(f"No chunks extracted from {paper_id}")
+            results[paper_id] = {
+                "paper_id": paper_id,
+                "chunks_added": 0,
+                "status": "success"
+            }
+            continue
+
+        report(paper_id, "embedding")
+        try:
+            stamp_published(paper_id, chunks)
+            # Only new or changed chunks are embedded
+            changed, stale_ids, counts = sync_paper_chunks(paper_id, chunks)
+            stats = upsert_chunk_stream(changed)
+            # Stale chunks go only once their replacements are stored
+            delete_chunks(stale_ids)
+        except Exception as e:
+            logger.error(f"Error embedding {paper_id}: {e}")
+            results[paper_id] = {
+                "paper_id": paper_id,
+                "error": str(e),
+                "status": "processing_failed"
+            }
+            continue
+
+        embedded += stats["chunks"]
+        seconds += stats["seconds"]
+        results[paper_id] = {
+            "paper_id": paper_id,
+            "chunks_added": len(chunks),
+            "chunks_embedded": len(changed),
+            "chunks_unchanged": counts["unchanged"],
+            "chunks_deleted": counts["deleted"],
+            "status": "success"
+        }
+
+    metrics_tracker.record_operation(
+        operation="embed_upsert",
+        latency=seconds,
+        success=all(result["status"] == "success" for result in results.values()),
+        metadata={
+            "papers": len(papers),
+            "chunks": embedded,
+            "chunks_per_sec": embedded / seconds if seconds > 0 else 0.0
+        }
+    )
+
+    return [results[paper_id] for _, paper_id in papers if paper_id in results]
+
 def run_pipeline():
     logger.info("Starting pipeline...")
 
@@ -40,17 +227,14 @@ def run_pipeline():
         save_dir=settings.RAW_PAPERS_DIR
     )
 
-    all_chunks = []
-    for pdf_path in pdf_paths:
-        paper_id = Path(pdf_path).stem
-        logger.info(f"Processing {paper_id}")
-        chunks = process_pdf(pdf_path, paper_id)
-        all_chunks.extend(chunks)
+    papers = [(pdf_path, Path(pdf_path).stem) for pdf_path in pdf_paths]
+    results = ingest_pdfs_parallel(papers)
 
-    if all_chunks:
-        logger.info(f"Upserting {len(all_chunks)} chunks...")
-        upsert_chunks(all_chunks)
-    else:
-        logger.warning("No chunks were extracted from the PDFs. Nothing to upsert.")
+    ingested = sum(r.get("chunks_added", 0) for r in results)
+    failed = [r["paper_id"] for r in results if r["status"] != "success"]
+    if not ingested:
+        logger.warning("No chunks were extracted from the PDFs. Nothing was upserted.")
+    if failed:
+        logger.warning(f"Failed to process: {failed}")
         
-    logger.info("Pipeline complete!")
\ No newline at end of file
+    logger.info("Pipeline complete!")
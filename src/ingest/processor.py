@@ -1,34 +1,77 @@
 import sys
+import time
+import base64
 from pathlib import Path
+from typing import Dict, List, Optional
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(PROJECT_ROOT))
 
 from config import TextCategory
 from src.ingest.parser.multimodal_parser import parse_pdf
+from src.ingest.parser.parse_cache import parse_cache
 from src.models.document import DocumentChunk
+from src.stores.blob_store import blob_store
 
-def process_pdf(pdf_path: str, paper_id: str):
+TEXT_CATEGORIES = {
+    TextCategory.NARRATIVE_TEXT,
+    TextCategory.TITLE,
+    TextCategory.TEXT,
+    TextCategory.LIST_ITEM,
+    TextCategory.ABSTRACT,
+    TextCategory.UNCATEGORIZED,
+    TextCategory.FIGURECAPTION,
+    TextCategory.FORMULA,
+    TextCategory.CODESNIPPET
+}
+
+def _page_metadata(elem, page_strategies: Dict[int, str]) -> dict:
     """
-    Processes a PDF file to extract text, tables, and figures, and returns structured document chunks.
+    Returns the page number and the parse strategy used for that page.
     """
-    elements = parse_pdf(pdf_path)
+    page_number = getattr(elem.metadata, "page_number", None)
+    if page_number is None:
+        return {}
+    return {"page": page_number, "parse_strategy": page_strategies.get(page_number, "unknown")}
 
-    # Build chunks
+def _figure_caption(orig_elements: List, j: int) -> str:
+    """
+    Returns the caption next to the figure at position j, if there is one.
+    """
+    for k in (j + 1, j - 1):
+        if 0 <= k < len(orig_elements) and getattr(orig_elements[k], "category", "") == TextCategory.FIGURECAPTION:
+            return getattr(orig_elements[k], "text", "") or ""
+    return ""
+
+def _figure_chunk(elem, orig_elements: List, j: int, paper_id: str, chunk_id: str, page_metadata: dict) -> DocumentChunk:
+    """
+    Moves the figure bytes into the blob store and keeps only a reference and a
+    textual surrogate (caption and OCR text), which is what gets embedded and indexed.
+    """
+    image_base64 = getattr(elem.metadata, "image_base64", "") or ""
+    caption = _figure_caption(orig_elements, j)
+    ocr_text = (getattr(elem, "text", "") or "").strip()
+
+    metadata = {"caption": caption, **page_metadata}
+    if image_base64:
+        metadata["image_ref"] = blob_store.put(base64.b64decode(image_base64))
+        metadata["image_mime"] = getattr(elem.metadata, "image_mime_type", None) or "image/jpeg"
+
+    surrogate = "\n".join(part for part in (f"Figure: {caption}" if caption else "Figure", ocr_text) if part)
+
+    return DocumentChunk(
+        paper_id=paper_id, chunk_id=chunk_id, type=TextCategory.FIGURE,
+        content=surrogate,
+        metadata=metadata
+    )
+
+def build_chunks(elements: List, paper_id: str, page_strategies: Optional[Dict[int, str]] = None) -> List[DocumentChunk]:
+    """
+    Builds structured document chunks from parsed unstructured elements.
+    """
+    page_strategies = page_strategies or {}
     chunks = []
 
-    TEXT_CATEGORIES = {
-        TextCategory.NARRATIVE_TEXT,
-        TextCategory.TITLE,
-        TextCategory.TEXT,
-        TextCategory.LIST_ITEM,
-        TextCategory.ABSTRACT,
-        TextCategory.UNCATEGORIZED,
-        TextCategory.FIGURECAPTION,
-        TextCategory.FORMULA,
-        TextCategory.CODESNIPPET
-    }
-    
     for i, composite_elem in enumerate(elements):
         try:
             orig_elements = composite_elem.metadata.orig_elements
@@ -41,24 +84,46 @@ def process_pdf(pdf_path: str, paper_id: str):
             chunk_id = f"{paper_id}_{i}_{j}" 
             
             category = getattr(elem, "category", "")
+            page_metadata = _page_metadata(elem, page_strategies)
 
             if category in TEXT_CATEGORIES:
                 chunks.append(DocumentChunk(
-                    paper_id=paper_id, chunk_id=chunk_id, type=TEXT_CATEGORIES.TextCategory.TEXT,
+                    paper_id=paper_id, chunk_id=chunk_id, type=TextCategory(category),
                     content=getattr(elem, "text", ""), 
+                    metadata=page_metadata
                 ))
             
             elif category == "Table":
                 chunks.append(DocumentChunk(
-                    paper_id=paper_id, chunk_id=chunk_id, type=TEXT_CATEGORIES.TextCategory.TEXT,
+                    paper_id=paper_id, chunk_id=chunk_id, type=TextCategory.TABLE,
                     content=getattr(elem, "text", ""), 
-                    metadata={"html": getattr(elem.metadata, "text_as_html", "") or ""}
+                    metadata={"html": getattr(elem.metadata, "text_as_html", "") or "", **page_metadata}
                 ))
 
             elif category == "Image":
-                chunks.append(DocumentChunk(
-                    paper_id=paper_id, chunk_id=chunk_id, type=TEXT_CATEGORIES.TextCategory.FIGURE,
-                    content=getattr(elem.metadata, "image_base64", ""),
-                ))
+                chunks.append(_figure_chunk(elem, orig_elements, j, paper_id, chunk_id, page_metadata))
     
-    return chunks
\ No newline at end of file
+    return chunks
+
+def parse_and_cache(pdf_path: str, paper_id: str, cache_key: Optional[str] = None) -> List[DocumentChunk]:
+    """
+    Parses a PDF into chunks unconditionally and stores the result in the parse cache.
+    """
+    start_time = time.time()
+    elements, page_strategies = parse_pdf(pdf_path)
+    chunks = build_chunks(elements, paper_id, page_strategies)
+
+    parse_cache.put(cache_key or parse_cache.key_for(pdf_path), chunks, parse_seconds=time.time() - start_time)
+    return chunks
+
+def process_pdf(pdf_path: str, paper_id: str) -> List[DocumentChunk]:
+    """
+    Processes a PDF file to extract text, tables, and figures, and returns structured document chunks.
+    Skips parsing entirely when the same PDF was already parsed with the current parser settings.
+    """
+    cache_key = parse_cache.key_for(pdf_path)
+    cached = parse_cache.get(cache_key, paper_id)
+    if cached is not None:
+        return cached
+
+    return parse_and_cache(pdf_path, paper_id, cache_key)
@@ -1,4 +1,7 @@
+import re
 import sys
+import json
+import hashlib
 from pathlib import Path 
 from typing import List
 from pydantic import BaseModel
@@ -8,6 +11,24 @@ sys.path.append(str(PROJECT_ROOT))
 
 from config import TextCategory
 
+# arXiv IDs with a version suffix, new style (2301.00001v2) or old style (hep-th/9901001v1)
+ARXIV_VERSIONED_ID = re.compile(r"^(\d{4}\.\d{4,5}|[a-z\-]+(\.[A-Z]{2})?/\d{7})v\d+$")
+
+def base_paper_id(paper_id: str) -> str:
+    """
+    Strips the version suffix from an arXiv paper ID. Other IDs are returned unchanged.
+    """
+    match = ARXIV_VERSIONED_ID.match(paper_id)
+    return match.group(1) if match else paper_id
+
+def hash_content(chunk_type: str, content: str) -> str:
+    """
+    Returns a hash of what is embedded for a chunk: its type and text.
+    Metadata is left out, so metadata-only changes do not force a re-embed.
+    """
+    payload = json.dumps([chunk_type, content])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 class DocumentChunk(BaseModel):
     """
     Model representing a chunk of a document.
@@ -18,14 +39,21 @@ class DocumentChunk(BaseModel):
     content: str
     metadata: dict = {}
 
+    def content_hash(self) -> str:
+        """
+        Returns a hash of what is embedded for the chunk (see hash_content).
+        """
+        return hash_content(self.type.value, self.content)
+
     def to_qdrant_payload(self, vector: List[float]) -> dict:
         """
         Converts the DocumentChunk to a Qdrant payload dictionary.
         """
         return {
             "paper_id": self.paper_id,
+            "paper_base_id": base_paper_id(self.paper_id),
             "chunk_id": self.chunk_id,
             "type": self.type.value,
-            "content": self.content,
+            "content_hash": self.content_hash(),
             **self.metadata
-        }, vector
\ No newline at end of file
+        }, vector
@@ -1,3 +1,4 @@
+from datetime import date
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -16,9 +17,16 @@ class ArxivSearchRequest(BaseModel):
 class IngestPapersRequest(BaseModel):
     paper_ids: List[str]
 
+class RetrievalFilters(BaseModel):
+    paper_ids: Optional[List[str]] = None
+    chunk_types: Optional[List[str]] = None
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+
 class QueryRequest(BaseModel):
     query: str
     image_base64: Optional[str] = None
+    filters: Optional[RetrievalFilters] = None
 
 class QueryResponse(BaseModel):
     response: str
@@ -8,6 +8,8 @@ from threading import Lock
 import time
 from functools import wraps
 
+from config import settings
+
 @dataclass
 class MetricRecord:
     """Single metric record"""
@@ -45,7 +47,7 @@ class MetricsTracker:
     
     def _initialize(self):
         self.metrics: List[MetricRecord] = []
-        self.metrics_file = Path("data/metrics_log.jsonl")
+        self.metrics_file = Path(settings.METRICS_LOG_FILE)
         self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
         self._load_metrics()
     
@@ -212,6 +214,22 @@ class MetricsTracker:
             "time_window_hours": hours
         }
     
+    def get_cache_summary(self, operation: str = "retrieval_cache", hours: int = 24) -> Dict:
+        """Get hit rate and saved latency of a cache for the last N hours"""
+        cutoff = datetime.now().timestamp() - (hours * 3600)
+        lookups = [
+            m for m in self.metrics
+            if m.operation == operation and datetime.fromisoformat(m.timestamp).timestamp() > cutoff
+        ]
+        hits = [m for m in lookups if m.metadata.get("hit")]
+        
+        return {
+            "lookups": len(lookups),
+            "hits": len(hits),
+            "hit_rate": (len(hits) / len(lookups)) * 100 if lookups else 0.0,
+            "saved_seconds": sum(m.metadata.get("saved_seconds", 0.0) for m in hits)
+        }
+    
     def get_recent_errors(self, limit: int = 10) -> List[Dict]:
         """Get recent error records"""
         errors = [
@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class BlobStore:
+    """
+    Content-addressed on-disk store for binary payloads such as figure images.
+    Blobs are stored once per sha256 digest, so re-ingesting a paper or the
+    same figure in two papers does not duplicate bytes.
+    """
+
+    def __init__(self, root: Path = settings.BLOB_STORE_DIR):
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        """
+        Returns the path of a blob, fanned out by the first two hex digits.
+        """
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest}")
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """
+        Stores a blob and returns its sha256 digest.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        Returns the bytes of a blob, or None if it does not exist.
+        """
+        try:
+            return self.path_for(digest).read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def exists(self, digest: str) -> bool:
+        try:
+            return self.path_for(digest).exists()
+        except ValueError:
+            return False
+
+# Global instance
+blob_store = BlobStore()
@@ -0,0 +1,470 @@
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from config import settings
+from src.stores.filters import FILTER_COLUMNS, build_columns, columns_mask, filter_fields, matches_filters
+
+logger = logging.getLogger(__name__)
+
+def tokenize(text: str) -> List[str]:
+    """Whitespace tokenization, the same as LangChain's BM25Retriever default."""
+    return text.split()
+
+class BM25Index:
+    """
+    On-disk BM25 (Okapi) inverted index.
+
+    Compacted documents live in an immutable segment: a CSR term-document
+    matrix (offsets, doc indexes, term frequencies) saved as .npy files and
+    loaded with mmap. Documents written since the last compaction are kept in an
+    in-memory delta, and deleted or replaced segment documents are masked by
+    tombstones. Texts and metadata live in a SQLite doc store, which is the
+    source of truth: the delta and tombstones are rebuilt from it on load.
+
+    Filter fields (paper, chunk type, published date) are stored as
+    per-document columns next to the segment, so filtered searches drop
+    postings of non-matching documents before scoring.
+    """
+
+    def __init__(
+        self,
+        index_dir: Path = settings.BM25_INDEX_DIR,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25
+    ):
+        self.index_dir = Path(index_dir)
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self._lock = RLock()
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_dir / "docs.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs (chunk_id TEXT PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL, segment_idx INTEGER)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tombstones (segment_idx INTEGER PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._load()
+
+    # Loading
+
+    def _load(self):
+        """Map the current segment and rebuild the delta and tombstones from SQLite."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'segment'").fetchone()
+            self.segment_name = row[0] if row else None
+            segment_dir = self.index_dir / self.segment_name if self.segment_name else None
+
+            if segment_dir and segment_dir.exists():
+                self.vocab = {term: i for i, term in enumerate(json.loads((segment_dir / "vocab.json").read_text()))}
+                self.segment_ids = json.loads((segment_dir / "doc_ids.json").read_text())
+                self.offsets = np.load(segment_dir / "offsets.npy", mmap_mode="r")
+                self.postings_docs = np.load(segment_dir / "postings_docs.npy", mmap_mode="r")
+                self.postings_tfs = np.load(segment_dir / "postings_tfs.npy", mmap_mode="r")
+                self.doc_lengths = np.load(segment_dir / "doc_lengths.npy", mmap_mode="r")
+                if (segment_dir / "columns.json").exists():
+                    self.column_values = json.loads((segment_dir / "columns.json").read_text())
+                    self.column_codes = {
+                        column: np.load(segment_dir / f"{column}.npy", mmap_mode="r") for column in FILTER_COLUMNS
+                    }
+                    self.published = np.load(segment_dir / "published.npy", mmap_mode="r")
+                else:
+                    # Segment written before filter columns existed
+                    metadatas = [{} for _ in self.segment_ids]
+                    for segment_idx, metadata in self._conn.execute(
+                        "SELECT segment_idx, metadata FROM docs WHERE segment_idx IS NOT NULL"
+                    ):
+                        if segment_idx < len(metadatas):
+                            metadatas[segment_idx] = json.loads(metadata)
+                    self.column_codes, self.column_values, self.published = build_columns(metadatas)
+            else:
+                self.vocab = {}
+                self.segment_ids = []
+                self.offsets = np.zeros(1, dtype=np.int32)
+                self.postings_docs = np.zeros(0, dtype=np.int32)
+                self.postings_tfs = np.zeros(0, dtype=np.float32)
+                self.doc_lengths = np.zeros(0, dtype=np.float32)
+                self.column_codes, self.column_values, self.published = build_columns([])
+
+            # Term-document matrix over the mapped arrays (rows: terms, columns: segment docs)
+            self.matrix = csr_matrix(
+                (self.postings_tfs, self.postings_docs, self.offsets),
+                shape=(len(self.vocab), len(self.segment_ids)),
+                copy=False
+            )
+
+            self.alive = np.ones(len(self.segment_ids), dtype=bool)
+            for (segment_idx,) in self._conn.execute("SELECT segment_idx FROM tombstones"):
+                if segment_idx < len(self.alive):
+                    self.alive[segment_idx] = False
+
+            self._delta: Dict[str, Tuple[Counter, int]] = {}
+            self._delta_postings: Dict[str, Dict[str, int]] = {}
+            self._delta_fields: Dict[str, Dict] = {}
+            for chunk_id, text, metadata in self._conn.execute(
+                "SELECT chunk_id, text, metadata FROM docs WHERE segment_idx IS NULL"
+            ):
+                self._add_delta(chunk_id, text, json.loads(metadata))
+
+            self._stats = None
+
+    def _add_delta(self, chunk_id: str, text: str, metadata: Optional[Dict]):
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        self._delta[chunk_id] = (counts, len(tokens))
+        self._delta_fields[chunk_id] = filter_fields(metadata)
+        for term, tf in counts.items():
+            self._delta_postings.setdefault(term, {})[chunk_id] = tf
+
+    def _remove_delta(self, chunk_id: str):
+        entry = self._delta.pop(chunk_id, None)
+        self._delta_fields.pop(chunk_id, None)
+        if entry is None:
+            return
+        for term in entry[0]:
+            postings = self._delta_postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._delta_postings[term]
+
+    # Updates
+
+    def _retire(self, chunk_ids: List[str]):
+        """Tombstone the segment copies of the given chunks and drop their delta entries."""
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT segment_idx FROM docs WHERE chunk_id IN ({placeholders}) AND segment_idx IS NOT NULL", batch
+            ).fetchall()
+            if rows:
+                self._conn.executemany("INSERT OR IGNORE INTO tombstones (segment_idx) VALUES (?)", rows)
+                for (segment_idx,) in rows:
+                    self.alive[segment_idx] = False
+        for chunk_id in chunk_ids:
+            self._remove_delta(chunk_id)
+
+    def upsert(self, chunk_ids: List[str], texts: List[str], metadatas: List[Optional[Dict]]):
+        """
+        Add or replace documents. Blank texts are removed from the index.
+        """
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._retire(list(chunk_ids))
+
+            rows = []
+            blank = []
+            for chunk_id, text, metadata in zip(chunk_ids, texts, metadatas):
+                if text and text.strip():
+                    rows.append((chunk_id, text, json.dumps(metadata or {})))
+                    self._add_delta(chunk_id, text, metadata)
+                else:
+                    blank.append((chunk_id,))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs (chunk_id, text, metadata, segment_idx) VALUES (?, ?, ?, NULL)", rows
+            )
+            self._conn.executemany("DELETE FROM docs WHERE chunk_id = ?", blank)
+            self._conn.commit()
+            self._stats = None
+            self._maybe_compact()
+
+    def delete(self, chunk_ids: List[str]):
+        """Remove documents by chunk id."""
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._retire(list(chunk_ids))
+            self._conn.executemany("DELETE FROM docs WHERE chunk_id = ?", [(chunk_id,) for chunk_id in chunk_ids])
+            self._conn.commit()
+            self._stats = None
+            self._maybe_compact()
+
+    def rebuild(self, docs: Iterable[Tuple[str, str, Optional[Dict]]]):
+        """
+        Replace the whole index with the given (chunk_id, text, metadata) documents.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM tombstones")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs (chunk_id, text, metadata, segment_idx) VALUES (?, ?, ?, NULL)",
+                (
+                    (chunk_id, text, json.dumps(metadata or {}))
+                    for chunk_id, text, metadata in docs
+                    if text and text.strip()
+                )
+            )
+            self._conn.commit()
+            self.compact()
+
+    # Compaction
+
+    def _maybe_compact(self):
+        pending = len(self._delta) + int(len(self.alive) - self.alive.sum())
+        if pending >= max(settings.BM25_COMPACT_MIN_DOCS, settings.BM25_COMPACT_RATIO * len(self.segment_ids)):
+            self.compact()
+
+    def compact(self):
+        """
+        Merge the segment, delta and tombstones into a new segment. The switch
+        to the new segment is a single SQLite transaction.
+        """
+        with self._lock:
+            start_time = time.time()
+            rows = self._conn.execute("SELECT chunk_id, text, metadata FROM docs ORDER BY chunk_id").fetchall()
+
+            vocab: Dict[str, int] = {}
+            term_idx, doc_idx, tfs, lengths = [], [], [], []
+            for i, (_, text, _) in enumerate(rows):
+                tokens = tokenize(text)
+                lengths.append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    term_idx.append(vocab.setdefault(term, len(vocab)))
+                    doc_idx.append(i)
+                    tfs.append(tf)
+
+            term_idx = np.asarray(term_idx, dtype=np.int64)
+            order = np.argsort(term_idx, kind="stable")  # term-major, doc order within a term
+            # int32 postings unless the segment outgrows them; offsets and doc indexes
+            # share a dtype so the CSR matrix can use the mapped arrays without a copy
+            index_dtype = np.int32 if len(term_idx) < np.iinfo(np.int32).max else np.int64
+            offsets = np.zeros(len(vocab) + 1, dtype=index_dtype)
+            np.cumsum(np.bincount(term_idx, minlength=len(vocab)), out=offsets[1:])
+
+            segment_name = f"segment-{time.time_ns()}"
+            segment_dir = self.index_dir / segment_name
+            segment_dir.mkdir(parents=True)
+            np.save(segment_dir / "offsets.npy", offsets)
+            np.save(segment_dir / "postings_docs.npy", np.asarray(doc_idx, dtype=index_dtype)[order])
+            np.save(segment_dir / "postings_tfs.npy", np.asarray(tfs, dtype=np.float32)[order])
+            np.save(segment_dir / "doc_lengths.npy", np.asarray(lengths, dtype=np.float32))
+            (segment_dir / "vocab.json").write_text(json.dumps(list(vocab)))
+            (segment_dir / "doc_ids.json").write_text(json.dumps([chunk_id for chunk_id, _, _ in rows]))
+
+            column_codes, column_values, published = build_columns([json.loads(metadata) for _, _, metadata in rows])
+            for column, codes in column_codes.items():
+                np.save(segment_dir / f"{column}.npy", codes)
+            np.save(segment_dir / "published.npy", published)
+            (segment_dir / "columns.json").write_text(json.dumps(column_values))
+
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE docs SET segment_idx = ? WHERE chunk_id = ?",
+                    [(i, chunk_id) for i, (chunk_id, _, _) in enumerate(rows)]
+                )
+                self._conn.execute("DELETE FROM tombstones")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('segment', ?)", (segment_name,)
+                )
+
+            old_segment = self.segment_name
+            self._load()
+            if old_segment and old_segment != segment_name:
+                shutil.rmtree(self.index_dir / old_segment, ignore_errors=True)
+
+            logger.info(
+                f"Compacted BM25 index: {len(rows)} docs, {len(vocab)} terms in {time.time() - start_time:.2f}s"
+            )
+
+    # Search
+
+    def _prepare(self) -> Dict:
+        """
+        Precomputes everything a query needs, once per index change: document
+        count, IDF per term (with rank_bm25's epsilon floor), length norms per
+        document, and a small CSR matrix for the delta.
+        """
+        if self._stats is not None:
+            return self._stats
+
+        k1, b = self.k1, self.b
+
+        # Live document frequency per segment term, ignoring tombstoned docs
+        alive_postings = self.alive[self.postings_docs].astype(np.int64)
+        if len(alive_postings):
+            segment_df = np.add.reduceat(alive_postings, self.offsets[:-1].astype(np.int64))
+        else:
+            segment_df = np.zeros(len(self.vocab), dtype=np.int64)
+
+        delta_terms = list(self._delta_postings)
+        delta_df = np.array([len(self._delta_postings[term]) for term in delta_terms], dtype=np.int64)
+        in_segment = np.array([self.vocab.get(term, -1) for term in delta_terms], dtype=np.int64)
+        shared = in_segment >= 0
+        np.add.at(segment_df, in_segment[shared], delta_df[shared])
+        # Terms seen in both parts share one document frequency
+        delta_df[shared] = segment_df[in_segment[shared]]
+
+        doc_count = int(self.alive.sum()) + len(self._delta)
+        delta_lengths = np.array([length for _, length in self._delta.values()], dtype=np.float64)
+        total_length = float(np.asarray(self.doc_lengths, dtype=np.float64)[self.alive].sum()) + float(delta_lengths.sum())
+        avgdl = (total_length / doc_count if doc_count else 0.0) or 1.0
+
+        def idf_of(df: np.ndarray) -> np.ndarray:
+            return np.log(doc_count - df + 0.5) - np.log(df + 0.5)
+
+        live_df = np.concatenate([segment_df[segment_df > 0], delta_df[~shared]])
+        average_idf = float(idf_of(live_df).mean()) if len(live_df) else 0.0
+        floor = self.epsilon * average_idf
+
+        segment_idf = idf_of(segment_df)
+        segment_idf[segment_idf < 0] = floor
+        delta_idf = idf_of(delta_df)
+        delta_idf[delta_idf < 0] = floor
+
+        # Delta as its own (terms x docs) CSR matrix, so both parts share one scorer
+        delta_ids = list(self._delta)
+        delta_positions = {chunk_id: i for i, chunk_id in enumerate(delta_ids)}
+        indptr = np.zeros(len(delta_terms) + 1, dtype=np.int64)
+        indices, data = [], []
+        for row, term in enumerate(delta_terms):
+            postings = self._delta_postings[term]
+            indices += [delta_positions[chunk_id] for chunk_id in postings]
+            data += postings.values()
+            indptr[row + 1] = len(indices)
+        delta_matrix = csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(delta_terms), len(delta_ids))
+        )
+
+        self._stats = {
+            "doc_count": doc_count,
+            "avgdl": avgdl,
+            "segment_idf": segment_idf,
+            "segment_norms": k1 * (1 - b + b * np.asarray(self.doc_lengths, dtype=np.float64) / avgdl),
+            "delta_ids": delta_ids,
+            "delta_vocab": {term: row for row, term in enumerate(delta_terms)},
+            "delta_matrix": delta_matrix,
+            "delta_idf": delta_idf,
+            "delta_norms": k1 * (1 - b + b * delta_lengths / avgdl),
+        }
+        return self._stats
+
+    def _score(
+        self,
+        matrix: csr_matrix,
+        rows: List[int],
+        idf: np.ndarray,
+        norms: np.ndarray,
+        mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        BM25 scores of every column (document) of a term-document CSR matrix
+        for the given query term rows. Repeated query terms count repeatedly,
+        as in rank_bm25. With a document mask, postings of masked-out
+        documents are dropped before scoring and those documents score 0.
+        """
+        if not rows or matrix.shape[1] == 0:
+            return np.zeros(matrix.shape[1], dtype=np.float64)
+        selected = matrix[rows]
+        indices = selected.indices
+        tf = selected.data.astype(np.float64)
+        weights = np.repeat(idf[rows], np.diff(selected.indptr))
+        if mask is not None:
+            keep = mask[indices]
+            indices, tf, weights = indices[keep], tf[keep], weights[keep]
+        contributions = weights * tf * (self.k1 + 1) / (tf + norms[indices])
+        return np.bincount(indices, weights=contributions, minlength=matrix.shape[1])
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indexes of the k best positive scores, best first."""
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def search(self, query: str, k: int = 5, filters: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        Scores live documents against the query. IDF and length statistics
+        stay corpus-wide, so a filter only decides which documents compete.
+
+        Args:
+            query (str): The keyword query.
+            k (int): Number of hits to return.
+            filters (Dict): Optional normalized filters (see src.stores.filters.normalize_filters).
+
+        Returns:
+            List[Tuple[str, float]]: Up to k (chunk_id, score) pairs of documents
+            that match at least one query term, best first.
+        """
+        terms = tokenize(query)
+        with self._lock:
+            prepared = self._prepare()
+            if not terms or prepared["doc_count"] == 0 or k <= 0:
+                return []
+
+            segment_mask = delta_mask = None
+            if filters:
+                segment_mask = self.alive & columns_mask(self.column_codes, self.column_values, self.published, filters)
+                delta_mask = np.array(
+                    [matches_filters(self._delta_fields.get(chunk_id), filters) for chunk_id in prepared["delta_ids"]],
+                    dtype=bool
+                )
+
+            segment_rows = [self.vocab[term] for term in terms if term in self.vocab]
+            segment_scores = self._score(
+                self.matrix, segment_rows, prepared["segment_idf"], prepared["segment_norms"], segment_mask
+            )
+            if segment_mask is None and not self.alive.all():
+                segment_scores[~self.alive] = 0.0
+
+            delta_rows = [prepared["delta_vocab"][term] for term in terms if term in prepared["delta_vocab"]]
+            delta_scores = self._score(
+                prepared["delta_matrix"], delta_rows, prepared["delta_idf"], prepared["delta_norms"], delta_mask
+            )
+
+            hits = [(self.segment_ids[i], float(segment_scores[i])) for i in self._top_k(segment_scores, k)]
+            hits += [(prepared["delta_ids"][i], float(delta_scores[i])) for i in self._top_k(delta_scores, k)]
+
+        hits.sort(key=lambda item: item[1], reverse=True)
+        return hits[:k]
+
+    def get_documents(self, chunk_ids: List[str]) -> Dict[str, Tuple[str, Dict]]:
+        """Text and metadata of the given chunks, by chunk id."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for chunk_id, text, metadata in self._conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM docs WHERE chunk_id IN ({placeholders})", batch
+                ):
+                    found[chunk_id] = (text, json.loads(metadata))
+        return found
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        with self._lock:
+            return int(self.alive.sum()) + len(self._delta)
+
+    def stats(self) -> Dict:
+        """Sizes of the segment, delta and tombstones."""
+        with self._lock:
+            return {
+                "documents": int(self.alive.sum()) + len(self._delta),
+                "segment_documents": len(self.segment_ids),
+                "segment_terms": len(self.vocab),
+                "segment_postings": int(len(self.postings_docs)),
+                "delta_documents": len(self._delta),
+                "tombstones": int(len(self.alive) - self.alive.sum())
+            }
+
+# Global instance
+bm25_index = BM25Index()
@@ -0,0 +1,157 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import TextCategory
+
+# Chunk types by lowercase name, so "table" and "Table" both match stored chunks
+CHUNK_TYPES = {category.value.lower(): category.value for category in TextCategory}
+
+# Metadata fields that local indexes keep as per-document code arrays, for filtering
+FILTER_COLUMNS = ("paper_id", "paper_base_id", "type")
+
+def published_value(value: Any) -> Optional[int]:
+    """
+    Converts a date (or "YYYY-MM-DD" string) to the YYYYMMDD integer stored
+    in chunk metadata, which Chroma and the BM25 index can compare as a range.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.year * 10000 + value.month * 100 + value.day
+
+def normalize_filters(filters: Any) -> Optional[Dict]:
+    """
+    Normalizes retrieval filters from a request model or a dict.
+
+    Args:
+        filters: RetrievalFilters, a dict with paper_ids, chunk_types,
+            published_from and published_to, or None.
+
+    Returns:
+        Optional[Dict]: Only the filters that are set, with dates as YYYYMMDD
+        integers, or None when nothing is filtered.
+    """
+    if filters is None:
+        return None
+    if hasattr(filters, "model_dump"):
+        filters = filters.model_dump()
+
+    normalized = {}
+    if filters.get("paper_ids"):
+        normalized["paper_ids"] = list(dict.fromkeys(filters["paper_ids"]))
+    if filters.get("chunk_types"):
+        normalized["chunk_types"] = list(dict.fromkeys(
+            CHUNK_TYPES.get(chunk_type.lower(), chunk_type) for chunk_type in filters["chunk_types"]
+        ))
+    for key in ("published_from", "published_to"):
+        value = published_value(filters.get(key))
+        if value is not None:
+            normalized[key] = value
+    return normalized or None
+
+def chroma_where(filters: Optional[Dict]) -> Optional[Dict]:
+    """
+    Translates normalized filters into a Chroma where clause. Paper IDs match
+    with or without a version suffix.
+    """
+    if not filters:
+        return None
+
+    clauses = []
+    if filters.get("paper_ids"):
+        clauses.append({"$or": [
+            {"paper_id": {"$in": filters["paper_ids"]}},
+            {"paper_base_id": {"$in": filters["paper_ids"]}}
+        ]})
+    if filters.get("chunk_types"):
+        clauses.append({"type": {"$in": filters["chunk_types"]}})
+    if filters.get("published_from") is not None:
+        clauses.append({"published": {"$gte": filters["published_from"]}})
+    if filters.get("published_to") is not None:
+        clauses.append({"published": {"$lte": filters["published_to"]}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def matches_filters(metadata: Optional[Dict], filters: Optional[Dict]) -> bool:
+    """
+    Whether a chunk's metadata passes normalized filters. Chunks without a
+    published date never pass a date filter.
+    """
+    if not filters:
+        return True
+    metadata = metadata or {}
+
+    paper_ids = filters.get("paper_ids")
+    if paper_ids and metadata.get("paper_id") not in paper_ids and metadata.get("paper_base_id") not in paper_ids:
+        return False
+    chunk_types = filters.get("chunk_types")
+    if chunk_types and metadata.get("type") not in chunk_types:
+        return False
+
+    published = metadata.get("published")
+    if filters.get("published_from") is not None and (published is None or published < filters["published_from"]):
+        return False
+    if filters.get("published_to") is not None and (published is None or published > filters["published_to"]):
+        return False
+    return True
+
+def filter_fields(metadata: Optional[Dict]) -> Dict:
+    """The part of a chunk's metadata that retrieval filters look at."""
+    metadata = metadata or {}
+    return {key: metadata[key] for key in (*FILTER_COLUMNS, "published") if metadata.get(key) is not None}
+
+def build_columns(metadatas: List[Dict]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]], np.ndarray]:
+    """
+    Encodes per-document filter fields as arrays: a code per document for
+    each of FILTER_COLUMNS (-1 when missing) plus the published date
+    (YYYYMMDD, 0 when unknown).
+    """
+    codes, values = {}, {}
+    for column in FILTER_COLUMNS:
+        lookup: Dict[str, int] = {}
+        codes[column] = np.asarray(
+            [lookup.setdefault(str(m[column]), len(lookup)) if m.get(column) is not None else -1 for m in metadatas],
+            dtype=np.int32
+        )
+        values[column] = list(lookup)
+    published = np.asarray([int(m.get("published") or 0) for m in metadatas], dtype=np.int32)
+    return codes, values, published
+
+def columns_mask(
+    codes: Dict[str, np.ndarray],
+    values: Dict[str, List[str]],
+    published: np.ndarray,
+    filters: Dict
+) -> np.ndarray:
+    """
+    Documents (as encoded by build_columns) that pass normalized filters,
+    the vectorized counterpart of matches_filters.
+    """
+    mask = np.ones(len(published), dtype=bool)
+
+    paper_ids = filters.get("paper_ids")
+    if paper_ids:
+        by_paper = np.zeros(len(mask), dtype=bool)
+        for column in ("paper_id", "paper_base_id"):
+            wanted = [code for code, value in enumerate(values[column]) if value in paper_ids]
+            by_paper |= np.isin(codes[column], wanted)
+        mask &= by_paper
+
+    chunk_types = filters.get("chunk_types")
+    if chunk_types:
+        wanted = [code for code, value in enumerate(values["type"]) if value in chunk_types]
+        mask &= np.isin(codes["type"], wanted)
+
+    # Unknown dates are stored as 0 and fail any date bound
+    if filters.get("published_from") is not None:
+        mask &= published >= filters["published_from"]
+    if filters.get("published_to") is not None:
+        mask &= (published > 0) & (published <= filters["published_to"])
+    return mask
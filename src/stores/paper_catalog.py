@@ -0,0 +1,253 @@
+import hashlib
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from config import TextCategory, settings
+
+logger = logging.getLogger(__name__)
+
+# Characters of chunk text kept for paper listings
+PREVIEW_CHARS = 200
+
+def id_checksum(ids: Iterable[str]) -> int:
+    """
+    Order-independent checksum of a set of ids, so two id sets can be
+    compared while streaming through them.
+    """
+    total = 0
+    for id_ in ids:
+        total = (total + int.from_bytes(hashlib.blake2b(id_.encode(), digest_size=8).digest(), "big")) % 2**64
+    return total
+
+class PaperCatalog:
+    """
+    Paper-level index over the vector store, kept in SQLite: one row per
+    paper (title, chunk count, total size, ingest time) and one per chunk
+    (paper, type, page, length, preview). It is updated next to every
+    Chroma write, so paper listings and lookups never scan the collection.
+    """
+
+    # Papers without an arXiv title (e.g. uploads) are named after their first Title chunk
+    _HEADING_TITLE = (
+        "UPDATE papers SET title = (SELECT TRIM(preview) FROM chunks WHERE chunks.paper_id = papers.paper_id "
+        "AND type = ? AND TRIM(preview) != '' ORDER BY rowid LIMIT 1)"
+    )
+
+    def __init__(self, path: Path = settings.PAPER_CATALOG_PATH):
+        self.path = Path(path)
+        self._lock = Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "paper_id TEXT PRIMARY KEY, title TEXT, chunk_count INTEGER NOT NULL DEFAULT 0, "
+            "total_size INTEGER NOT NULL DEFAULT 0, ingested_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, paper_id TEXT NOT NULL, type TEXT, page INTEGER, "
+            "content_length INTEGER NOT NULL, preview TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_paper_id ON chunks (paper_id)")
+        # Catalogs written before titles were filled in
+        self._conn.execute(f"{self._HEADING_TITLE} WHERE title IS NULL", (TextCategory.TITLE.value,))
+        self._conn.commit()
+
+    def _paper_ids_of(self, chunk_ids: List[str]) -> set:
+        paper_ids = set()
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            paper_ids.update(
+                paper_id for (paper_id,) in self._conn.execute(
+                    f"SELECT DISTINCT paper_id FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                )
+            )
+        return paper_ids
+
+    def _refresh(self, paper_ids: Iterable[str]):
+        """Recount the given papers, name untitled ones and drop those left without chunks."""
+        now = time.time()
+        rows = [(now, paper_id) for paper_id in paper_ids]
+        self._conn.executemany(
+            "UPDATE papers SET "
+            "chunk_count = (SELECT COUNT(*) FROM chunks WHERE chunks.paper_id = papers.paper_id), "
+            "total_size = (SELECT COALESCE(SUM(content_length), 0) FROM chunks WHERE chunks.paper_id = papers.paper_id), "
+            "updated_at = ? WHERE paper_id = ?",
+            rows
+        )
+        self._conn.executemany(
+            f"{self._HEADING_TITLE} WHERE paper_id = ? AND title IS NULL",
+            [(TextCategory.TITLE.value, paper_id) for _, paper_id in rows]
+        )
+        self._conn.executemany(
+            "DELETE FROM papers WHERE paper_id = ? AND chunk_count = 0", [(paper_id,) for _, paper_id in rows]
+        )
+
+    def upsert(self, chunk_ids: List[str], texts: List[str], metadatas: List[Optional[Dict]]):
+        """
+        Record written chunks. A paper's title is taken from its chunks'
+        metadata (the arXiv title) when present, else from its first Title
+        chunk; its ingest time is kept from the first write.
+        """
+        if not chunk_ids:
+            return
+        with self._lock, self._conn:
+            self._write_chunks(chunk_ids, texts, metadatas)
+
+    def _write_chunks(self, chunk_ids: List[str], texts: List[str], metadatas: List[Optional[Dict]]):
+        """Upsert rows; the caller holds the lock and the transaction."""
+        now = time.time()
+        affected = self._paper_ids_of(list(chunk_ids))
+
+        papers = {}
+        chunk_rows = []
+        for chunk_id, text, metadata in zip(chunk_ids, texts, metadatas):
+            metadata = metadata or {}
+            paper_id = metadata.get("paper_id", "Unknown")
+            if metadata.get("title") or paper_id not in papers:
+                papers[paper_id] = metadata.get("title")
+            text = text or ""
+            chunk_rows.append(
+                (chunk_id, paper_id, metadata.get("type", "text"), metadata.get("page"), len(text), text[:PREVIEW_CHARS])
+            )
+        affected.update(papers)
+
+        self._conn.executemany(
+            "INSERT INTO papers (paper_id, title, ingested_at, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (paper_id) DO UPDATE SET title = COALESCE(excluded.title, papers.title)",
+            [(paper_id, title, now, now) for paper_id, title in papers.items()]
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO chunks (chunk_id, paper_id, type, page, content_length, preview) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            chunk_rows
+        )
+        self._refresh(affected)
+
+    def delete(self, chunk_ids: List[str]):
+        """Forget deleted chunks, and papers that have none left."""
+        if not chunk_ids:
+            return
+        with self._lock:
+            affected = self._paper_ids_of(list(chunk_ids))
+            with self._conn:
+                self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in chunk_ids])
+                self._refresh(affected)
+
+    def rebuild(self, docs: Iterable[Dict], batch_size: int = 1000):
+        """
+        Replace the catalog with the given documents, as returned by
+        vector_store.iter_all_documents (id, document, metadata).
+
+        The lock is held and one transaction is open for the whole rebuild:
+        readers see the old catalog until the new one is committed, and
+        writes made meanwhile wait and are applied on top. Pass a lazy
+        iterator so documents are read from the store while the lock is
+        held; a snapshot taken earlier would miss writes in between.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM papers")
+            batch = []
+            for doc in docs:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    self._write_chunks([d["id"] for d in batch], [d["document"] for d in batch], [d["metadata"] for d in batch])
+                    batch = []
+            if batch:
+                self._write_chunks([d["id"] for d in batch], [d["document"] for d in batch], [d["metadata"] for d in batch])
+
+    def clear(self):
+        """Remove every paper and chunk."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM papers")
+
+    # Lookups
+
+    @staticmethod
+    def _paper_row(row) -> Dict:
+        paper_id, title, chunk_count, total_size, ingested_at, updated_at = row
+        return {
+            "paper_id": paper_id,
+            "title": title or "Unknown Title",
+            "chunk_count": chunk_count,
+            "total_size": total_size,
+            "ingested_at": ingested_at,
+            "updated_at": updated_at
+        }
+
+    def list_papers(self) -> List[Dict]:
+        """All papers, sorted by paper_id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT paper_id, title, chunk_count, total_size, ingested_at, updated_at FROM papers ORDER BY paper_id"
+            ).fetchall()
+        return [self._paper_row(row) for row in rows]
+
+    def get_paper(self, paper_id: str) -> Optional[Dict]:
+        """One paper, or None if it is not in the catalog."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paper_id, title, chunk_count, total_size, ingested_at, updated_at FROM papers WHERE paper_id = ?",
+                (paper_id,)
+            ).fetchone()
+        return self._paper_row(row) if row else None
+
+    def get_chunks(self, paper_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Chunk summaries (chunk_id, paper_id, type, page, content_length,
+        content_preview) of the given papers, or of all papers.
+        """
+        query = "SELECT chunk_id, paper_id, type, page, content_length, preview FROM chunks"
+        with self._lock:
+            if paper_ids is None:
+                rows = self._conn.execute(f"{query} ORDER BY paper_id, rowid").fetchall()
+            else:
+                rows = []
+                for start in range(0, len(paper_ids), 500):
+                    batch = paper_ids[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows += self._conn.execute(
+                        f"{query} WHERE paper_id IN ({placeholders}) ORDER BY paper_id, rowid", batch
+                    ).fetchall()
+        return [
+            {
+                "chunk_id": chunk_id,
+                "paper_id": paper_id,
+                "type": chunk_type,
+                "page": page,
+                "content_length": content_length,
+                "content_preview": preview
+            }
+            for chunk_id, paper_id, chunk_type, page, content_length, preview in rows
+        ]
+
+    def chunk_ids(self, paper_ids: List[str]) -> List[str]:
+        """Ids of every chunk of the given papers."""
+        return [chunk["chunk_id"] for chunk in self.get_chunks(paper_ids)]
+
+    def paper_count(self) -> int:
+        """Exact number of papers."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def chunk_count(self) -> int:
+        """Number of catalogued chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def chunk_checksum(self) -> int:
+        """id_checksum of every catalogued chunk id."""
+        with self._lock:
+            return id_checksum(chunk_id for (chunk_id,) in self._conn.execute("SELECT chunk_id FROM chunks"))
+
+# Global instance
+paper_catalog = PaperCatalog()
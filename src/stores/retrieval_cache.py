@@ -0,0 +1,103 @@
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+class RetrievalCache:
+    """
+    In-process LRU cache of fused retrieval results, keyed by the normalized
+    query, filters and k. Entries expire after a TTL and are dropped as a
+    whole when the corpus changes: every write to the stores bumps a
+    generation counter, and results computed under an older generation are
+    never stored.
+    """
+
+    def __init__(self, max_items: int = settings.RETRIEVAL_CACHE_ITEMS, ttl_seconds: float = settings.RETRIEVAL_CACHE_TTL):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        # key -> (results, created_at, latency of the retrieval that produced them)
+        self._entries: "OrderedDict[str, Tuple[List[Any], float, float]]" = OrderedDict()
+        self._lock = Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(query: str, filters: Optional[Dict], k: int, mode: str = "") -> str:
+        """
+        Cache key for a retrieval. Whitespace is collapsed; case is kept, since
+        BM25 matches terms case-sensitively. The mode tells apart result
+        selections for the same query (e.g. diversified ones).
+        """
+        normalized_filters = {
+            key: sorted(value) if isinstance(value, list) else value
+            for key, value in (filters or {}).items()
+        }
+        return json.dumps([" ".join(query.split()), normalized_filters, k, mode], sort_keys=True)
+
+    def get(self, key: str) -> Optional[Tuple[List[Any], float]]:
+        """
+        Cached results for a key and the retrieval latency the hit saved, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            return list(entry[0]), entry[2]
+
+    def put(self, key: str, results: List[Any], generation: int, latency: float):
+        """
+        Stores results computed while the corpus was at the given generation,
+        unless it has changed since.
+        """
+        with self._lock:
+            if generation != self.generation or self.max_items <= 0:
+                return
+            self._entries[key] = (list(results), time.monotonic(), latency)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bump_generation(self):
+        """Invalidates every entry; called after each write to the corpus."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit counters, saved latency and size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) * 100 if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "entries": len(self._entries),
+                "max_items": self.max_items,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+                "generation": self.generation,
+                "invalidations": self.invalidations
+            }
+
+# Global instance
+retrieval_cache = RetrievalCache()
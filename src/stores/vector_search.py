@@ -0,0 +1,350 @@
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from src.stores.filters import FILTER_COLUMNS, build_columns, columns_mask, filter_fields, matches_filters
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product; float16 blocks are widened to float32 (NumPy has no
+# float16 BLAS), and cache-sized blocks keep that conversion cheap
+SEARCH_BLOCK_ROWS = 4096
+
+def hnsw_metadata() -> Dict:
+    """Collection metadata that creates Chroma's HNSW index with the configured parameters."""
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": settings.HNSW_M,
+        "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": settings.HNSW_SEARCH_EF
+    }
+
+class ExactVectorIndex:
+    """
+    Brute-force cosine search over the window vectors, for collections small
+    enough that scanning every vector is cheap and exact.
+
+    Vectors are L2-normalized and saved as one float32 or float16 matrix,
+    loaded with mmap, with the window ids, parent chunk ids and filter
+    columns next to it. Writes since the last compaction are kept in an
+    in-memory delta and replaced rows are masked. Chroma stays the source
+    of truth: the index is rebuilt from it unless it was flushed at a clean
+    shutdown with no write since (see is_clean) and its size still matches.
+
+    Writes are mirrored from the moment the index is created, also before
+    it is synced, until disable() is called for collections that use HNSW.
+    """
+
+    def __init__(
+        self,
+        index_dir: Path = settings.EXACT_INDEX_DIR,
+        dtype: str = settings.EXACT_SEARCH_DTYPE,
+        compact_min: int = 1000,
+        compact_ratio: float = 0.1
+    ):
+        self.index_dir = Path(index_dir)
+        self.dtype = np.dtype(dtype)
+        self.compact_min = compact_min
+        self.compact_ratio = compact_ratio
+        self.enabled = True
+        self.synced = False
+        self._lock = RLock()
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._clean_marker = self.index_dir / "CLEAN"
+        self._clean = self._clean_marker.exists()
+        self._load()
+
+    # Loading
+
+    def _load(self):
+        """Map the current segment, if any, and start with an empty delta."""
+        with self._lock:
+            current = self.index_dir / "CURRENT"
+            self.segment_name = current.read_text().strip() if current.exists() else None
+            segment_dir = self.index_dir / self.segment_name if self.segment_name else None
+
+            if segment_dir and segment_dir.exists():
+                self.vectors = np.load(segment_dir / "vectors.npy", mmap_mode="r")
+                self.window_ids = json.loads((segment_dir / "window_ids.json").read_text())
+                self.chunk_ids = json.loads((segment_dir / "chunk_ids.json").read_text())
+                self.column_values = json.loads((segment_dir / "columns.json").read_text())
+                self.column_codes = {
+                    column: np.load(segment_dir / f"{column}.npy", mmap_mode="r") for column in FILTER_COLUMNS
+                }
+                self.published = np.load(segment_dir / "published.npy", mmap_mode="r")
+            else:
+                self.vectors = np.zeros((0, 0), dtype=self.dtype)
+                self.window_ids, self.chunk_ids = [], []
+                self.column_codes, self.column_values, self.published = build_columns([])
+
+            self.alive = np.ones(len(self.window_ids), dtype=bool)
+            self._row_of = {window_id: row for row, window_id in enumerate(self.window_ids)}
+            self._rows_of_chunk: Dict[str, List[int]] = {}
+            for row, chunk_id in enumerate(self.chunk_ids):
+                self._rows_of_chunk.setdefault(chunk_id, []).append(row)
+
+            # window_id -> (normalized float32 vector, chunk_id, filter fields)
+            self._delta: Dict[str, Tuple[np.ndarray, str, Dict]] = {}
+            self._delta_ids: List[str] = []
+            self._delta_matrix: Optional[np.ndarray] = None
+
+    # Updates
+
+    def upsert(self, window_ids: List[str], vectors: List[List[float]], metadatas: List[Dict]):
+        """Add or replace window vectors; each metadata must carry chunk_id."""
+        if not self.enabled or not window_ids:
+            return
+        with self._lock:
+            self._mark_dirty()
+            self._add_delta(window_ids, vectors, metadatas)
+            self._maybe_compact()
+
+    def _add_delta(self, window_ids: List[str], vectors: List[List[float]], metadatas: List[Dict]):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+        for window_id, vector, metadata in zip(window_ids, matrix, metadatas):
+            row = self._row_of.get(window_id)
+            if row is not None:
+                self.alive[row] = False
+            self._delta[window_id] = (vector, metadata["chunk_id"], filter_fields(metadata))
+        self._delta_matrix = None
+
+    def delete_chunks(self, chunk_ids: Iterable[str]):
+        """Remove every window of the given chunks."""
+        if not self.enabled:
+            return
+        chunk_ids = set(chunk_ids)
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._mark_dirty()
+            for chunk_id in chunk_ids:
+                for row in self._rows_of_chunk.get(chunk_id, []):
+                    self.alive[row] = False
+            for window_id in [w for w, (_, chunk_id, _) in self._delta.items() if chunk_id in chunk_ids]:
+                del self._delta[window_id]
+            self._delta_matrix = None
+            self._maybe_compact()
+
+    def rebuild(self, windows: Iterable[Tuple[str, List[float], Dict]]):
+        """Replace the whole index with the given (window_id, vector, metadata) windows."""
+        with self._lock:
+            self._mark_dirty()
+            self.window_ids, self.chunk_ids = [], []
+            self.alive = np.zeros(0, dtype=bool)
+            self._row_of, self._rows_of_chunk = {}, {}
+            self._delta = {}
+            # One compaction at the end rather than one per batch
+            batch = []
+            for window in windows:
+                batch.append(window)
+                if len(batch) >= 1000:
+                    self._add_delta(*map(list, zip(*batch)))
+                    batch = []
+            if batch:
+                self._add_delta(*map(list, zip(*batch)))
+            self.compact()
+
+    def clear(self):
+        """Drop every vector."""
+        self.rebuild([])
+
+    def disable(self):
+        """
+        Stop mirroring writes and drop the unsaved delta. The saved segment
+        no longer follows Chroma, so it is marked stale.
+        """
+        with self._lock:
+            self.enabled = False
+            self.synced = False
+            self._mark_dirty()
+            self._load()
+
+    # Freshness
+
+    @property
+    def is_clean(self) -> bool:
+        """
+        Whether the saved segment was flushed with every write mirrored and
+        nothing has been written since. A size match alone cannot tell a
+        fresh index from one that missed re-ingests or equal-sized deletes
+        and adds.
+        """
+        return self._clean
+
+    def _mark_dirty(self):
+        # Removed before the write is applied, so a crash mid-write leaves the index stale
+        if self._clean:
+            self._clean_marker.unlink(missing_ok=True)
+            self._clean = False
+
+    # Compaction
+
+    def _maybe_compact(self):
+        pending = len(self._delta) + int(len(self.alive) - self.alive.sum())
+        if pending >= max(self.compact_min, self.compact_ratio * len(self.window_ids)):
+            self.compact()
+
+    def compact(self):
+        """Write live segment rows plus the delta as a new segment and switch to it."""
+        with self._lock:
+            start_time = time.time()
+            rows = np.flatnonzero(self.alive)
+            delta = list(self._delta.items())
+
+            parts = []
+            if len(rows):
+                parts.append(np.asarray(self.vectors[rows], dtype=self.dtype))
+            if delta:
+                parts.append(np.stack([vector for _, (vector, _, _) in delta]).astype(self.dtype))
+            dimension = parts[0].shape[1] if parts else 0
+            vectors = np.concatenate(parts) if parts else np.zeros((0, dimension), dtype=self.dtype)
+
+            window_ids = [self.window_ids[row] for row in rows] + [window_id for window_id, _ in delta]
+            chunk_ids = [self.chunk_ids[row] for row in rows] + [chunk_id for _, (_, chunk_id, _) in delta]
+            fields = [
+                {
+                    **{column: self.column_values[column][self.column_codes[column][row]]
+                       for column in FILTER_COLUMNS if self.column_codes[column][row] >= 0},
+                    **({"published": int(self.published[row])} if self.published[row] else {})
+                }
+                for row in rows
+            ] + [fields for _, (_, _, fields) in delta]
+            column_codes, column_values, published = build_columns(fields)
+
+            segment_name = f"segment-{time.time_ns()}"
+            segment_dir = self.index_dir / segment_name
+            segment_dir.mkdir(parents=True)
+            np.save(segment_dir / "vectors.npy", vectors)
+            (segment_dir / "window_ids.json").write_text(json.dumps(window_ids))
+            (segment_dir / "chunk_ids.json").write_text(json.dumps(chunk_ids))
+            for column, codes in column_codes.items():
+                np.save(segment_dir / f"{column}.npy", codes)
+            np.save(segment_dir / "published.npy", published)
+            (segment_dir / "columns.json").write_text(json.dumps(column_values))
+
+            # Atomic switch: readers of CURRENT see either the old or the new segment
+            tmp_path = self.index_dir / "CURRENT.tmp"
+            tmp_path.write_text(segment_name)
+            os.replace(tmp_path, self.index_dir / "CURRENT")
+
+            old_segment = self.segment_name
+            self._load()
+            if old_segment and old_segment != segment_name:
+                shutil.rmtree(self.index_dir / old_segment, ignore_errors=True)
+
+            logger.info(f"Compacted exact vector index: {len(window_ids)} vectors in {time.time() - start_time:.2f}s")
+
+    def flush(self):
+        """Persist the delta, e.g. at shutdown, so the next start needs no rebuild."""
+        with self._lock:
+            if not self.enabled:
+                return
+            if self._delta or not self.alive.all():
+                self.compact()
+            self._clean_marker.write_text(str(self.count()))
+            self._clean = True
+
+    # Search
+
+    def _delta_arrays(self) -> Tuple[List[str], np.ndarray]:
+        if self._delta_matrix is None:
+            self._delta_ids = list(self._delta)
+            self._delta_matrix = (
+                np.stack([self._delta[window_id][0] for window_id in self._delta_ids])
+                if self._delta_ids else np.zeros((0, 0), dtype=np.float32)
+            )
+        return self._delta_ids, self._delta_matrix
+
+    def search(self, query_vector: List[float], n: int, filters: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        Exact cosine similarity of the query to every live window.
+
+        Args:
+            query_vector (List[float]): The query embedding.
+            n (int): Number of windows to return.
+            filters (Dict): Optional normalized filters (see src.stores.filters.normalize_filters).
+
+        Returns:
+            List[Tuple[str, float]]: Up to n (chunk_id, similarity) pairs, one per
+            window, best first.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        with self._lock:
+            candidates: List[Tuple[str, float]] = []
+
+            if len(self.window_ids):
+                scores = np.empty(len(self.window_ids), dtype=np.float32)
+                for start in range(0, len(scores), SEARCH_BLOCK_ROWS):
+                    block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+                    scores[start:start + len(block)] = np.asarray(block, dtype=np.float32) @ query
+                mask = self.alive
+                if filters:
+                    mask = mask & columns_mask(self.column_codes, self.column_values, self.published, filters)
+                scores[~mask] = -np.inf
+                candidates += [(self.chunk_ids[row], float(scores[row])) for row in self._top_n(scores, n)]
+
+            delta_ids, delta_matrix = self._delta_arrays()
+            if delta_ids:
+                scores = delta_matrix @ query
+                if filters:
+                    mask = np.array([matches_filters(self._delta[w][2], filters) for w in delta_ids], dtype=bool)
+                    scores[~mask] = -np.inf
+                candidates += [(self._delta[delta_ids[i]][1], float(scores[i])) for i in self._top_n(scores, n)]
+
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return candidates[:n]
+
+    @staticmethod
+    def _top_n(scores: np.ndarray, n: int) -> np.ndarray:
+        """Indexes of the n best finite scores, best first."""
+        candidates = np.flatnonzero(np.isfinite(scores))
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-scores[candidates], n - 1)[:n]]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def count(self) -> int:
+        """Number of live window vectors."""
+        with self._lock:
+            return int(self.alive.sum()) + len(self._delta)
+
+    def stats(self) -> Dict:
+        """Size, storage type and sync state."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "synced": self.synced,
+                "clean": self._clean,
+                "vectors": int(self.alive.sum()) + len(self._delta),
+                "dtype": self.dtype.name,
+                "segment_vectors": len(self.window_ids),
+                "delta_vectors": len(self._delta),
+                "matrix_bytes": int(self.vectors.nbytes)
+            }
+
+# Global instance
+exact_index = ExactVectorIndex()
+
+def search_mode() -> str:
+    """
+    The vector search used for queries: "exact" or "hnsw". In auto mode the
+    exact index serves collections of up to EXACT_SEARCH_MAX_VECTORS windows.
+    Until the exact index is in sync with Chroma, HNSW is used.
+    """
+    mode = settings.VECTOR_SEARCH_MODE
+    if mode == "hnsw" or not exact_index.synced:
+        return "hnsw"
+    if mode == "auto" and exact_index.count() > settings.EXACT_SEARCH_MAX_VECTORS:
+        return "hnsw"
+    return "exact"
@@ -1,12 +1,34 @@
+import base64
+import binascii
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 from src.embeddings.embedder import embed_text, embed_documents
-from config import settings
+from src.embeddings.windows import split_windows
+from src.stores.blob_store import blob_store
+from src.stores.bm25_index import bm25_index
+from src.stores.filters import chroma_where
+from src.stores.paper_catalog import id_checksum, paper_catalog
+from src.stores.retrieval_cache import retrieval_cache
+from src.stores.vector_search import exact_index, hnsw_metadata, search_mode
+from src.models.document import DocumentChunk, base_paper_id, hash_content
+from config import TextCategory, settings
 import logging
-from typing import List
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Written once a backfill pass found every chunk windowed; lives with the collections it describes
+WINDOWS_BACKFILLED_MARKER = Path(settings.CHROMA_PERSIST_DIR) / "windows_backfilled"
+_windows_backfilled = False
+# Written once no figure chunk holds its base64 image in the collection any more
+FIGURES_BACKFILLED_MARKER = Path(settings.CHROMA_PERSIST_DIR) / "figures_backfilled"
+
+# Payload keys set by DocumentChunk.to_qdrant_payload, plus the content copy older payloads carried
+_PAYLOAD_KEYS = {"paper_id", "paper_base_id", "chunk_id", "type", "content_hash", "content"}
+
 # Initialize ChromaDB client
 chroma_client = chromadb.PersistentClient(
     path=settings.CHROMA_PERSIST_DIR,
@@ -26,9 +48,10 @@ def init_collection():
     except Exception:
         collection = chroma_client.create_collection(
             name=settings.VECTOR_COLLECTION,
-            metadata={"hnsw:space": "cosine"}  # Use cosine similarity
+            metadata=hnsw_metadata()  # Cosine similarity, HNSW parameters from settings
         )
         logger.info(f"Created collection '{settings.VECTOR_COLLECTION}'.")
+    get_window_collection()
     return collection
 
 def get_collection():
@@ -37,42 +60,292 @@ def get_collection():
     """
     return chroma_client.get_collection(name=settings.VECTOR_COLLECTION)
 
-def upsert_chunks(chunks):
+def get_window_collection():
     """
-    Embeds chunks and upserts them into the ChromaDB collection.
+    Get (or create) the collection of per-window vectors. Every window
+    carries its parent chunk's metadata, including chunk_id.
     """
-    if not chunks:
-        logger.warning("No chunks provided to upsert. Skipping.")
+    return chroma_client.get_or_create_collection(
+        name=settings.WINDOW_COLLECTION,
+        metadata=hnsw_metadata()
+    )
+
+def check_hnsw_settings():
+    """
+    Warns when existing collections were built with other HNSW parameters
+    than the settings ask for. Chroma fixes them when a collection is
+    created, so changes only apply after the collections are rebuilt.
+    """
+    wanted = hnsw_metadata()
+    try:
+        collections = [get_collection(), get_window_collection()]
+    except Exception:
+        # Nothing ingested yet; collections will be created with the settings
         return
-    
-    collection = get_collection()
-    
-    # Prepare data for ChromaDB
+    for collection in collections:
+        current = collection.metadata or {}
+        stale = {key: current.get(key) for key, value in wanted.items() if current.get(key, value) != value}
+        if stale:
+            logger.warning(
+                f"Collection '{collection.name}' was built with {stale}; "
+                f"HNSW settings apply to newly created collections only."
+            )
+
+def window_id(chunk_id: str, window: int) -> str:
+    return f"{chunk_id}#w{window}"
+
+def _embed_windows(texts: List[str]) -> Tuple[List[List[float]], List[List[List[float]]]]:
+    """
+    Embeds every token window of every text in a single forward pass.
+
+    Returns:
+        Tuple: One vector per text (the mean of its windows) and the window
+        vectors of each text.
+    """
+    windows = [split_windows(text) for text in texts]
+    vectors = embed_documents([window for text_windows in windows for window in text_windows])
+
+    parent_vectors = []
+    window_vectors = []
+    offset = 0
+    for text_windows in windows:
+        text_vectors = vectors[offset:offset + len(text_windows)]
+        offset += len(text_windows)
+        window_vectors.append(text_vectors)
+        parent_vectors.append(np.mean(text_vectors, axis=0).tolist())
+    return parent_vectors, window_vectors
+
+def _upsert_windows(window_collection, chunk_ids: List[str], payloads: List[Dict], window_vectors: List[List]):
+    """
+    Replaces the windows of the given chunks.
+    """
+    # A chunk that got shorter would otherwise keep its old trailing windows
+    window_collection.delete(where={"chunk_id": {"$in": chunk_ids}})
+    exact_index.delete_chunks(chunk_ids)
+
+    ids, embeddings, metadatas = [], [], []
+    for chunk_id, payload, vectors in zip(chunk_ids, payloads, window_vectors):
+        for window, vector in enumerate(vectors):
+            ids.append(window_id(chunk_id, window))
+            embeddings.append(vector)
+            metadatas.append({**payload, "window": window})
+
+    if ids:
+        window_collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+        exact_index.upsert(ids, embeddings, metadatas)
+
+def _flush_batch(collection, window_collection, batch: List[DocumentChunk]) -> None:
+    """
+    Embeds one micro-batch of chunks (all of their windows) in a single
+    forward pass and upserts chunks and windows.
+    """
+    texts = [chunk.content or "" for chunk in batch]
+    vectors, window_vectors = _embed_windows(texts)
+
     ids = []
-    embeddings = []
-    documents = []
     metadatas = []
-    
-    for chunk in chunks:
-        text = chunk.content or ""
-        vector = embed_text(text)
+    for chunk, vector in zip(batch, vectors):
         payload, _ = chunk.to_qdrant_payload(vector)
-        
         # ChromaDB requires string IDs
         ids.append(chunk.chunk_id)
-        embeddings.append(vector)
-        documents.append(text)
         metadatas.append(payload)
-    
+
     # Upsert to ChromaDB (handles both insert and update)
     collection.upsert(
         ids=ids,
-        embeddings=embeddings,
-        documents=documents,
+        embeddings=vectors,
+        documents=texts,
         metadatas=metadatas
     )
-    
-    logger.info(f"Upserted {len(chunks)} chunks to ChromaDB.")
+    _upsert_windows(window_collection, ids, metadatas, window_vectors)
+    bm25_index.upsert(ids, texts, metadatas)
+    paper_catalog.upsert(ids, texts, metadatas)
+    retrieval_cache.bump_generation()
+
+def upsert_chunk_stream(chunks: Iterable[DocumentChunk], batch_size: int = settings.EMBED_BATCH_SIZE) -> Dict:
+    """
+    Streams chunks into ChromaDB: embeds them (window by window) in micro-batches
+    via embed_documents and flushes every batch as soon as it fills, so only one batch of vectors is
+    held in memory at a time.
+
+    Args:
+        chunks (Iterable[DocumentChunk]): Any iterable of chunks, e.g. a generator.
+        batch_size (int): Number of chunks per embedding pass / upsert call.
+
+    Returns:
+        Dict: Throughput stats (chunks, batches, seconds, chunks_per_sec).
+    """
+    batch_size = max(1, batch_size)
+    collection = get_collection()
+    window_collection = get_window_collection()
+    start_time = time.time()
+
+    total = 0
+    batches = 0
+    batch = []
+
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            _flush_batch(collection, window_collection, batch)
+            total += len(batch)
+            batches += 1
+            batch = []
+
+    if batch:
+        _flush_batch(collection, window_collection, batch)
+        total += len(batch)
+        batches += 1
+
+    elapsed = time.time() - start_time
+    stats = {
+        "chunks": total,
+        "batches": batches,
+        "seconds": elapsed,
+        "chunks_per_sec": total / elapsed if elapsed > 0 else 0.0
+    }
+
+    logger.info(
+        f"Upserted {total} chunks in {batches} batches "
+        f"({elapsed:.2f}s, {stats['chunks_per_sec']:.1f} chunks/sec)."
+    )
+    return stats
+
+def sync_paper_chunks(paper_id: str, chunks: List[DocumentChunk]) -> Tuple[List[DocumentChunk], List[str], Dict]:
+    """
+    Reconciles a freshly parsed paper with what is already stored. Chunks are
+    matched by what is embedded (type and text, see hash_content), computed
+    from the stored documents so hashes written by older versions still
+    match. Earlier versions of the same arXiv paper are matched through
+    paper_base_id.
+
+    - Unchanged chunks (same id, same content, same metadata) are skipped.
+    - Chunks whose metadata changed (e.g. a new published date or parse
+      strategy) are rewritten in place with their stored vectors.
+    - Chunks whose content already exists under another id (shifted
+      positions, a previous version) are written with the stored embedding.
+    - Stored chunks that are no longer produced are returned as stale. The
+      caller deletes them (delete_chunks) only after the chunks to embed were
+      flushed, so a failed re-ingest keeps the old version of the paper.
+
+    Args:
+        paper_id (str): Identifier of the paper being ingested.
+        chunks (List[DocumentChunk]): All chunks parsed for the paper.
+
+    Returns:
+        Tuple[List[DocumentChunk], List[str], Dict]: The chunks that still need
+        embedding and upserting, the stale chunk ids, and counts of
+        unchanged/updated/reused/deleted chunks.
+    """
+    collection = get_collection()
+
+    base_id = base_paper_id(paper_id)
+    if base_id == paper_id:
+        where = {"paper_id": paper_id}
+    else:
+        where = {"$or": [{"paper_id": paper_id}, {"paper_base_id": base_id}]}
+
+    existing = collection.get(where=where, include=["documents", "metadatas", "embeddings"])
+
+    stored_vectors = existing["embeddings"] if existing["embeddings"] is not None else []
+
+    stored = {}
+    source_by_hash = {}
+    for chunk_id, document, metadata, vector in zip(existing["ids"], existing["documents"], existing["metadatas"], stored_vectors):
+        metadata = metadata or {}
+        content_hash = hash_content(metadata.get("type", ""), document or "")
+        stored[chunk_id] = (content_hash, metadata, vector)
+        source_by_hash[content_hash] = chunk_id
+
+    to_embed = []
+    reused = []  # (chunk, id of the stored chunk whose vectors it takes)
+    unchanged = 0
+    updated = 0
+    for chunk in chunks:
+        content_hash = chunk.content_hash()
+        stored_hash, stored_metadata, _ = stored.get(chunk.chunk_id, (None, None, None))
+        if stored_hash == content_hash:
+            if stored_metadata == chunk.to_qdrant_payload(None)[0]:
+                unchanged += 1
+            else:
+                updated += 1
+                reused.append((chunk, chunk.chunk_id))
+        elif content_hash in source_by_hash:
+            reused.append((chunk, source_by_hash[content_hash]))
+        else:
+            to_embed.append(chunk)
+
+    # Reused chunks need their windows too; content without stored windows is re-embedded
+    window_collection = get_window_collection()
+    if reused:
+        stored_windows = window_collection.get(
+            where={"chunk_id": {"$in": list({source_id for _, source_id in reused})}},
+            include=["metadatas", "embeddings"]
+        )
+        windows_by_chunk: Dict[str, Dict[int, List[float]]] = {}
+        window_embeddings = stored_windows["embeddings"] if stored_windows["embeddings"] is not None else []
+        for metadata, vector in zip(stored_windows["metadatas"], window_embeddings):
+            windows_by_chunk.setdefault(metadata["chunk_id"], {})[metadata["window"]] = vector
+
+        to_embed += [chunk for chunk, source_id in reused if source_id not in windows_by_chunk]
+        reused = [(chunk, source_id) for chunk, source_id in reused if source_id in windows_by_chunk]
+
+    # Reused vectors may come from stale chunks, which are still stored at this point
+    if reused:
+        ids, embeddings, documents, metadatas, window_vectors = [], [], [], [], []
+        for chunk, source_id in reused:
+            vector = stored[source_id][2]
+            payload, _ = chunk.to_qdrant_payload(vector)
+            ids.append(chunk.chunk_id)
+            embeddings.append(vector)
+            documents.append(chunk.content or "")
+            metadatas.append(payload)
+            windows = windows_by_chunk[source_id]
+            window_vectors.append([windows[window] for window in sorted(windows)])
+        collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        _upsert_windows(window_collection, ids, metadatas, window_vectors)
+        bm25_index.upsert(ids, documents, metadatas)
+        paper_catalog.upsert(ids, documents, metadatas)
+        retrieval_cache.bump_generation()
+
+    new_ids = {chunk.chunk_id for chunk in chunks}
+    stale_ids = [chunk_id for chunk_id in stored if chunk_id not in new_ids]
+
+    counts = {
+        "unchanged": unchanged,
+        "updated": updated,
+        "reused": len(reused) - updated,
+        "to_embed": len(to_embed),
+        "deleted": len(stale_ids)
+    }
+    logger.info(f"Incremental sync for {paper_id}: {counts}")
+    return to_embed, stale_ids, counts
+
+def delete_chunks(chunk_ids: List[str]):
+    """
+    Deletes chunks by id from the collection, together with their windows,
+    BM25 entries and catalog entries.
+    """
+    if not chunk_ids:
+        return
+    collection = get_collection()
+    collection.delete(ids=chunk_ids)
+    get_window_collection().delete(where={"chunk_id": {"$in": list(chunk_ids)}})
+    exact_index.delete_chunks(chunk_ids)
+    bm25_index.delete(list(chunk_ids))
+    paper_catalog.delete(list(chunk_ids))
+    retrieval_cache.bump_generation()
+    logger.info(f"Deleted {len(chunk_ids)} chunks.")
+
+def upsert_chunks(chunks):
+    """
+    Embeds chunks and upserts them into the ChromaDB collection.
+    """
+    if not chunks:
+        logger.warning("No chunks provided to upsert. Skipping.")
+        return
+
+    return upsert_chunk_stream(chunks)
 
 def query_collection(query_text: str, n_results: int = 10):
     """
@@ -89,47 +362,398 @@ def query_collection(query_text: str, n_results: int = 10):
     
     return results
 
-def get_all_documents():
+def windows_backfilled() -> bool:
+    """Whether every stored chunk is known to have windows (see backfill_windows)."""
+    global _windows_backfilled
+    if not _windows_backfilled:
+        _windows_backfilled = WINDOWS_BACKFILLED_MARKER.exists()
+    return _windows_backfilled
+
+def _unwindowed_hits(query_embedding: List[float], k: int, filters: Optional[Dict]) -> List[Tuple[str, float]]:
     """
-    Retrieve all documents from the collection.
-    Useful for BM25 indexing.
+    Chunk-vector hits for chunks that have no windows yet, so legacy chunks
+    stay searchable while the window backfill runs.
+    """
+    collection = get_collection()
+    if collection.count() == 0:
+        return []
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=k,
+        where=chroma_where(filters),
+        include=["distances"]
+    )
+    chunk_ids = results["ids"][0]
+    if not chunk_ids:
+        return []
+    first_windows = get_window_collection().get(ids=[window_id(chunk_id, 0) for chunk_id in chunk_ids], include=[])
+    windowed = {existing.rsplit("#w", 1)[0] for existing in first_windows["ids"]}
+    return [
+        (chunk_id, 1 - distance)
+        for chunk_id, distance in zip(chunk_ids, results["distances"][0])
+        if chunk_id not in windowed
+    ]
+
+def query_windows(
+    query_embedding: List[float],
+    k: int = 10,
+    aggregation: str = settings.WINDOW_AGGREGATION,
+    fanout: int = settings.WINDOW_QUERY_FANOUT,
+    filters: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    Searches the window vectors and aggregates their similarities per parent chunk.
+    Windows carry their parent's metadata, so filters are applied during the
+    search rather than to its results.
+
+    Small collections are searched exactly in the exact index, larger ones
+    through Chroma's HNSW index (see search_mode). Until the window backfill
+    has finished, chunks without windows are searched by their chunk vector.
+
+    Args:
+        query_embedding (List[float]): The embedded query.
+        k (int): Number of chunks to return.
+        aggregation (str): "max" (best window) or "sum" (all matching windows).
+        fanout (int): Windows fetched per requested chunk before aggregation.
+        filters (Dict): Optional normalized filters (see src.stores.filters.normalize_filters).
+
+    Returns:
+        List[Dict]: Up to k chunks (chunk_id, score, document, metadata), best first,
+        each chunk at most once.
+    """
+    collection = get_collection()
+    n_windows = k * max(1, fanout)
+
+    if search_mode() == "exact":
+        hits = exact_index.search(query_embedding, n_windows, filters)
+    elif get_window_collection().count() == 0:
+        hits = []
+    else:
+        results = get_window_collection().query(
+            query_embeddings=[query_embedding],
+            n_results=n_windows,
+            where=chroma_where(filters),
+            include=["metadatas", "distances"]
+        )
+        hits = [
+            (metadata["chunk_id"], 1 - distance)
+            for metadata, distance in zip(results["metadatas"][0], results["distances"][0])
+        ]
+
+    if not windows_backfilled():
+        # A chunk without windows has one vector, so it scores the same under max and sum
+        hits += _unwindowed_hits(query_embedding, k, filters)
+
+    scores: Dict[str, float] = {}
+    for chunk_id, similarity in hits:
+        if aggregation == "sum":
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + similarity
+        else:
+            scores[chunk_id] = max(scores.get(chunk_id, similarity), similarity)
+
+    top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    if not top:
+        return []
+
+    parents = collection.get(ids=[chunk_id for chunk_id, _ in top], include=["documents", "metadatas"])
+    by_id = {
+        chunk_id: (document, metadata)
+        for chunk_id, document, metadata in zip(parents["ids"], parents["documents"], parents["metadatas"])
+    }
+    return [
+        {"chunk_id": chunk_id, "score": score, "document": by_id[chunk_id][0], "metadata": by_id[chunk_id][1]}
+        for chunk_id, score in top if chunk_id in by_id
+    ]
+
+def get_chunk_embeddings(chunk_ids: List[str]) -> Dict[str, List[float]]:
+    """
+    Stored chunk vectors by id, in one lookup. Ids that are not stored are omitted.
+    """
+    if not chunk_ids:
+        return {}
+    stored = get_collection().get(ids=list(chunk_ids), include=["embeddings"])
+    embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+    return dict(zip(stored["ids"], embeddings))
+
+def backfill_windows(batch_size: int = settings.EMBED_BATCH_SIZE) -> int:
+    """
+    Adds windows for stored chunks that have none (chunks ingested before
+    windowed indexing). Chunk vectors are left unchanged.
+
+    Chunks can have several windows, so window and chunk counts say nothing
+    about completeness; every chunk is checked for its first window instead.
+    Passes repeat until one finds nothing missing (concurrent deletes can
+    shift the pages), and only then is the completion marker written, so an
+    interrupted backfill resumes on the next start.
+
+    Returns:
+        int: Number of chunks that were windowed.
+    """
+    if windows_backfilled():
+        return 0
+
+    backfilled = 0
+    while True:
+        windowed = _backfill_windows_pass(batch_size)
+        backfilled += windowed
+        if windowed == 0:
+            break
+
+    WINDOWS_BACKFILLED_MARKER.parent.mkdir(parents=True, exist_ok=True)
+    WINDOWS_BACKFILLED_MARKER.write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+    if backfilled:
+        logger.info(f"Backfilled windows for {backfilled} chunks.")
+    return backfilled
+
+def _backfill_windows_pass(batch_size: int) -> int:
+    """One pass over all chunks, windowing those without a first window."""
+    collection = get_collection()
+    window_collection = get_window_collection()
+
+    backfilled = 0
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=[])
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+
+        first_windows = window_collection.get(ids=[window_id(chunk_id, 0) for chunk_id in page["ids"]], include=[])
+        windowed = {existing.rsplit("#w", 1)[0] for existing in first_windows["ids"]}
+        missing_ids = [chunk_id for chunk_id in page["ids"] if chunk_id not in windowed]
+        if missing_ids:
+            missing = collection.get(ids=missing_ids, include=["documents", "metadatas"])
+            _, window_vectors = _embed_windows([document or "" for document in missing["documents"]])
+            _upsert_windows(
+                window_collection,
+                missing["ids"],
+                [{**(metadata or {}), "chunk_id": chunk_id} for chunk_id, metadata in zip(missing["ids"], missing["metadatas"])],
+                window_vectors
+            )
+            # Fused results cached before now ranked these chunks by their chunk vector
+            retrieval_cache.bump_generation()
+            backfilled += len(missing["ids"])
+
+        if len(page["ids"]) < batch_size:
+            break
+
+    return backfilled
+
+def backfill_figures(batch_size: int = settings.EMBED_BATCH_SIZE) -> int:
+    """
+    Moves the base64 images of figure chunks stored before the blob store
+    existed into the blob store. Each such chunk is rewritten like a freshly
+    parsed one: an image_ref and image_mime in its metadata and a textual
+    surrogate as its document, which is embedded in place of the base64 text.
+    Run it before backfill_windows, which would otherwise window the base64.
+
+    Like backfill_windows, passes repeat until one finds nothing left, and
+    only then is the completion marker written.
+
+    Returns:
+        int: Number of figure chunks migrated.
+    """
+    if FIGURES_BACKFILLED_MARKER.exists():
+        return 0
+
+    migrated = 0
+    while True:
+        moved = _backfill_figures_pass(batch_size)
+        migrated += moved
+        if moved == 0:
+            break
+
+    FIGURES_BACKFILLED_MARKER.parent.mkdir(parents=True, exist_ok=True)
+    FIGURES_BACKFILLED_MARKER.write_text(time.strftime("%Y-%m-%dT%H:%M:%S"))
+    if migrated:
+        logger.info(f"Moved the images of {migrated} figure chunks into the blob store.")
+    return migrated
+
+def _backfill_figures_pass(batch_size: int) -> int:
+    """One pass over all figure chunks, migrating those that still hold base64."""
+    collection = get_collection()
+    window_collection = get_window_collection()
+
+    migrated = 0
+    offset = 0
+    while True:
+        page = collection.get(
+            where={"type": TextCategory.FIGURE.value},
+            limit=batch_size,
+            offset=offset,
+            include=["documents", "metadatas"]
+        )
+        if not page["ids"]:
+            break
+        offset += len(page["ids"])
+
+        legacy = []
+        for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            # Figure chunks built since the blob store always carry a caption key
+            if "caption" in metadata:
+                continue
+            figure_metadata = {key: value for key, value in metadata.items() if key not in _PAYLOAD_KEYS}
+            figure_metadata["caption"] = ""
+            try:
+                data = base64.b64decode(document or "", validate=True)
+            except (binascii.Error, ValueError):
+                data = b""
+            if data:
+                figure_metadata["image_ref"] = blob_store.put(data)
+                figure_metadata["image_mime"] = "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+            legacy.append(DocumentChunk(
+                paper_id=metadata.get("paper_id", ""),
+                chunk_id=chunk_id,
+                type=TextCategory.FIGURE,
+                content="Figure",  # no caption or OCR text was kept for these
+                metadata=figure_metadata
+            ))
+
+        if legacy:
+            _flush_batch(collection, window_collection, legacy)
+            migrated += len(legacy)
+
+        if len(page["ids"]) < batch_size:
+            break
+
+    return migrated
+
+def figure_mime(digest: str) -> Optional[str]:
+    """The image_mime stored with the figure chunk that references a blob, if any."""
+    stored = get_collection().get(where={"image_ref": digest}, limit=1, include=["metadatas"])
+    if not stored["ids"]:
+        return None
+    return (stored["metadatas"][0] or {}).get("image_mime")
+
+def _collection_id_checksum(collection, limit: int = 5000) -> int:
+    """id_checksum of every id in a collection, paging through ids only."""
+    def ids():
+        offset = 0
+        while True:
+            page = collection.get(limit=limit, offset=offset, include=[])
+            yield from page["ids"]
+            offset += len(page["ids"])
+            if len(page["ids"]) < limit:
+                break
+    return id_checksum(ids())
+
+def backfill_paper_catalog() -> int:
+    """
+    Rebuilds the paper catalog from the collection when it does not hold
+    exactly the collection's chunk ids (chunks stored before the catalog
+    existed, a lost catalog file, or a crash between a Chroma write and its
+    catalog write). Ids are compared by checksum, since equal counts can
+    hide deletes plus adds. Afterwards the catalog is kept up to date by
+    every write.
+
+    Returns:
+        int: Number of chunks catalogued, 0 if the catalog was in sync.
+    """
+    collection = get_collection()
+    count = collection.count()
+    if paper_catalog.chunk_count() == count and paper_catalog.chunk_checksum() == _collection_id_checksum(collection):
+        return 0
+
+    paper_catalog.rebuild(iter_all_documents())
+    logger.info(f"Backfilled the paper catalog: {paper_catalog.paper_count()} papers, {count} chunks.")
+    return count
+
+def sync_exact_index(batch_size: int = 1000) -> int:
+    """
+    Brings the exact index in line with the window collection, or disables
+    it when VECTOR_SEARCH_MODE is "hnsw" or (in auto mode) the collection is
+    too large for exact search. The saved index is kept only if it was
+    flushed cleanly with no write since and its size matches; otherwise it
+    is rebuilt from Chroma. Writes made meanwhile are mirrored as usual.
+
+    Returns:
+        int: Number of windows loaded, 0 if the index was in sync or is not used.
+    """
+    window_collection = get_window_collection()
+    count = window_collection.count()
+    mode = settings.VECTOR_SEARCH_MODE
+    if mode == "hnsw" or (mode == "auto" and count > settings.EXACT_SEARCH_MAX_VECTORS):
+        exact_index.disable()
+        logger.info(f"Vector search uses HNSW ({count} windows, mode {mode}).")
+        return 0
+
+    if exact_index.is_clean and exact_index.count() == count:
+        exact_index.synced = True
+        return 0
+
+    def windows():
+        offset = 0
+        while True:
+            page = window_collection.get(limit=batch_size, offset=offset, include=["embeddings", "metadatas"])
+            if not page["ids"]:
+                break
+            yield from zip(page["ids"], page["embeddings"], page["metadatas"])
+            offset += len(page["ids"])
+            if len(page["ids"]) < batch_size:
+                break
+
+    start_time = time.time()
+    exact_index.rebuild(windows())
+    exact_index.synced = True
+    logger.info(f"Rebuilt the exact vector index: {count} windows in {time.time() - start_time:.1f}s.")
+    return count
+
+def index_stats() -> Dict:
+    """
+    Sizes of the chunk and window indexes, including the extra vector storage
+    the windows take.
+    """
+    chunks = get_collection().count()
+    window_collection = get_window_collection()
+    windows = window_collection.count()
+
+    dimension: Optional[int] = None
+    if windows:
+        sample = window_collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if sample is not None and len(sample):
+            dimension = len(sample[0])
+
+    return {
+        "chunks": chunks,
+        "windows": windows,
+        "windows_per_chunk": windows / chunks if chunks else 0.0,
+        "window_vector_bytes": windows * dimension * 4 if dimension else 0,
+        "search_mode": search_mode(),
+        "exact_index": exact_index.stats()
+    }
+
+def iter_all_documents(limit: int = 1000) -> Iterable[Dict]:
+    """
+    Yield every document of the collection ({id, document, metadata}),
+    one page at a time.
     """
     collection = get_collection()
-    
-    # Get all documents (ChromaDB has a limit, so we page through)
-    all_docs = []
     offset = 0
-    limit = 1000
-    
     while True:
         results = collection.get(
             limit=limit,
             offset=offset,
             include=["documents", "metadatas"]
         )
-        
+
         if not results["ids"]:
             break
-            
-        all_docs.extend([
-            {
-                "id": id_,
-                "document": doc,
-                "metadata": meta
-            }
-            for id_, doc, meta in zip(
-                results["ids"],
-                results["documents"],
-                results["metadatas"]
-            )
-        ])
-        
+
+        for id_, doc, meta in zip(results["ids"], results["documents"], results["metadatas"]):
+            yield {"id": id_, "document": doc, "metadata": meta}
+
         offset += limit
-        
+
         if len(results["ids"]) < limit:
             break
-    
-    return all_docs
+
+def get_all_documents():
+    """
+    Retrieve all documents from the collection.
+    Useful for BM25 indexing.
+    """
+    return list(iter_all_documents())
 
 def delete_collection():
     """
@@ -137,6 +761,11 @@ def delete_collection():
     """
     try:
         chroma_client.delete_collection(name=settings.VECTOR_COLLECTION)
+        chroma_client.delete_collection(name=settings.WINDOW_COLLECTION)
+        exact_index.clear()
+        bm25_index.rebuild([])
+        paper_catalog.clear()
+        retrieval_cache.bump_generation()
         logger.info(f"Deleted collection '{settings.VECTOR_COLLECTION}'.")
     except Exception as e:
         logger.error(f"Error deleting collection: {e}")
\ No newline at end of file